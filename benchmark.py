@@ -0,0 +1,221 @@
+"""
+This module benchmarks the claim generation, the treaty application and the statistics.
+
+Every benchmark is run for several numbers of simulations and development pattern lengths,
+the frequency and severity of config.yaml being kept. The best time of a few repeats is
+recorded, in seconds, under a name such as 'apply_treaty[xs_aad]/nb=100000/years=3'.
+
+Usage:
+    python benchmark.py --save      Record the timings as the baseline.
+    python benchmark.py             Compare the timings with the baseline, the exit code is 1
+                                    when a benchmark is slower than the threshold allows.
+
+Everything runs locally, the baseline being a JSON file.
+
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from functools import partial
+from config import DEFAULT_PATH, load_config  # pylint: disable=import-error
+from claims import generate_claims, generate_claims_batch  # pylint: disable=import-error
+from main import apply_treaty, price_claims, compute_statistics, treaty_recoveries  # pylint: disable=import-error
+from reinsurance import ExcessOfLoss, QuotaShare, TreatyProgram  # pylint: disable=import-error
+
+BASELINE = 'benchmark_baseline.json'
+
+TREATIES = {
+    'qs': {'name': 'qs', 'type': QuotaShare, 'parameters': {'share': 0.8}},
+    'xs': {'name': 'xs', 'type': ExcessOfLoss,
+           'parameters': {'deductible': 5e6, 'limit': 10e6, 'aad': 0, 'aal': 0}},
+    'xs_aad': {'name': 'xs_aad', 'type': ExcessOfLoss,
+               'parameters': {'deductible': 5e6, 'limit': 10e6, 'aad': 2e6, 'aal': 0}},
+    'xs_aal': {'name': 'xs_aal', 'type': ExcessOfLoss,
+               'parameters': {'deductible': 5e6, 'limit': 10e6, 'aad': 0, 'aal': 12e6}},
+    'xs_aad_aal': {'name': 'xs_aad_aal', 'type': ExcessOfLoss,
+                   'parameters': {'deductible': 5e6, 'limit': 10e6, 'aad': 2e6, 'aal': 12e6}},
+}
+
+# A quota share inuring to a tower of five stacked excess of loss layers.
+PROGRAM = {'name': 'tower', 'type': TreatyProgram, 'parameters': {'layers': [
+    {'name': 'qs', 'type': 'qs', 'parameters': {'share': 0.2}},
+    {'name': 'xs 1', 'type': 'xs', 'net_of': ['qs'],
+     'parameters': {'deductible': 2e6, 'limit': 3e6, 'aad': 1e6, 'aal': 0}},
+    *({'name': f'xs {layer}', 'type': 'xs', 'net_of': ['qs'],
+       'parameters': {'limit': 5e6 * layer, 'aad': 0, 'aal': 10e6 * layer}}
+      for layer in range(2, 6)),
+]}}
+
+
+def best_time(function, repeats):
+    """
+    Time a function.
+
+    Args:
+        function (callable): The function to time, called without arguments.
+        repeats (int): The number of calls.
+
+    Returns:
+        float: The shortest duration of a call, in seconds.
+    """
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        durations += [time.perf_counter() - start]
+    return min(durations)
+
+
+def generate_claims_seeded(**parameters):
+    """Generate claims with the per-claim generator from a fixed seed."""
+    random.seed(0)
+    return generate_claims(**parameters)
+
+
+def apply_treaty_every_year(claims, treaty):
+    """Apply a treaty to the claims of every development year, as main.py did per year."""
+    return [apply_treaty(claims_year, treaty) for claims_year in claims]
+
+
+def run_benchmarks(sizes, pattern_lengths, repeats=3, scalar_max_size=100_000,
+                   simulations=None) -> dict:
+    """
+    Run every benchmark.
+
+    Args:
+        sizes (list[int]): The numbers of simulations.
+        pattern_lengths (list[int]): The numbers of development years.
+        repeats (int, optional): The number of calls per benchmark. Defaults to 3.
+        scalar_max_size (int, optional): The largest number of simulations for the per-claim
+            generator, which is much slower. Defaults to 100_000.
+        simulations (dict, optional): The simulations section of a configuration, whose
+            frequency and severity are simulated. Defaults to None, those of config.yaml.
+
+    Returns:
+        dict[str, float]: The best time of every benchmark, in seconds.
+    """
+    if simulations is None:
+        simulations = load_config()['simulations']
+    timings = {}
+    for pattern_length in pattern_lengths:
+        development_pattern = [1 / pattern_length] * pattern_length
+        for size in sizes:
+            suffix = f'/nb={size}/years={pattern_length}'
+            parameters = {'size': size, 'frequency': simulations['frequency'],
+                          'severity': simulations['severity'],
+                          'development_pattern': development_pattern}
+
+            if size <= scalar_max_size:
+                timings['generate_claims' + suffix] = best_time(
+                    partial(generate_claims_seeded, **parameters), repeats)
+            timings['generate_claims_batch' + suffix] = best_time(
+                partial(generate_claims_batch, **parameters, seed=0), repeats)
+
+            claims = generate_claims_batch(**parameters, seed=0)
+            timings.update({name + suffix: duration for name, duration
+                            in run_pricing_benchmarks(claims, repeats).items()})
+    return timings
+
+
+def run_pricing_benchmarks(claims, repeats) -> dict:
+    """
+    Run the benchmarks of the pricing of generated claims.
+
+    Args:
+        claims (ClaimTable): The claims.
+        repeats (int): The number of calls per benchmark.
+
+    Returns:
+        dict[str, float]: The best time of every benchmark, in seconds.
+    """
+    timings = {}
+    for name, treaty in TREATIES.items():
+        timings[f'apply_treaty[{name}]'] = best_time(
+            partial(apply_treaty_every_year, claims, treaty), repeats)
+
+    timings['apply_program[tower]'] = best_time(
+        partial(treaty_recoveries, claims, PROGRAM), repeats)
+
+    treaties = list(TREATIES.values())
+    results = price_claims(claims, treaties)
+    timings['price_claims'] = best_time(partial(price_claims, claims, treaties), repeats)
+    timings['compute_statistics'] = best_time(
+        partial(compute_statistics, results, 0.08), repeats)
+    return timings
+
+
+def compare(timings, baseline, threshold, noise=0.002) -> list[str]:
+    """
+    Compare timings with a baseline.
+
+    Args:
+        timings (dict[str, float]): The current timings.
+        baseline (dict[str, float]): The baseline timings.
+        threshold (float): The tolerated relative slowdown, e.g. 0.2 for 20%.
+        noise (float, optional): The tolerated absolute slowdown in seconds, which keeps the
+            timer noise of the shortest benchmarks from being reported. Defaults to 0.002.
+
+    Returns:
+        list[str]: A description of every benchmark slower than the thresholds allow.
+    """
+    regressions = []
+    for name, duration in timings.items():
+        if (name in baseline and duration > baseline[name] * (1 + threshold)
+                and duration > baseline[name] + noise):
+            regressions += [f'{name}: {duration:.4f}s vs {baseline[name]:.4f}s '
+                            f'(+{duration / baseline[name] - 1:.0%})']
+    return regressions
+
+
+def main(argv=None):
+    """
+    Run the benchmarks and compare them with the baseline.
+
+    Args:
+        argv (list[str], optional): The arguments. Defaults to None, the arguments of the
+            process.
+
+    Returns:
+        int: The exit code, 1 if a benchmark is slower than the baseline and 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the simulation pipeline.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000])
+    parser.add_argument('--pattern-lengths', type=int, nargs='+', default=[3, 10])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='tolerated relative slowdown')
+    parser.add_argument('--noise', type=float, default=0.002,
+                        help='tolerated absolute slowdown in seconds')
+    parser.add_argument('--save', action='store_true', help='record the baseline')
+    parser.add_argument('--config', default=DEFAULT_PATH,
+                        help=f'configuration file of the distributions (default: {DEFAULT_PATH})')
+    arguments = parser.parse_args(argv)
+
+    benchmarks = run_benchmarks(arguments.sizes, arguments.pattern_lengths, arguments.repeats,
+                                simulations=load_config(arguments.config)['simulations'])
+    for benchmark, best in benchmarks.items():
+        print(f'{benchmark:<55} {best:10.4f}s')
+
+    if arguments.save:
+        with open(arguments.baseline, 'w', encoding='UTF-8') as file:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'timings': benchmarks}, file, indent=2)
+    elif os.path.exists(arguments.baseline):
+        with open(arguments.baseline, 'r', encoding='UTF-8') as file:
+            slowdowns = compare(benchmarks, json.load(file)['timings'],
+                                arguments.threshold, arguments.noise)
+        for slowdown in slowdowns:
+            print('SLOWER', slowdown)
+        return 1 if slowdowns else 0
+    else:
+        print(f'No baseline {arguments.baseline}, record one with --save.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,28 @@
+"""
+This module provides a class for testing the benchmark suite.
+"""
+import unittest
+from benchmark import compare, run_benchmarks # pylint: disable=import-error
+
+
+class BenchmarkTests(unittest.TestCase):
+    """Test cases for the benchmark functions."""
+
+    def test_compare(self):
+        """Test that only the slowdowns beyond both thresholds are reported."""
+        baseline = {'slower': 1.0, 'noisy': 0.001, 'faster': 1.0}
+        timings = {'slower': 1.5, 'noisy': 0.002, 'faster': 0.5, 'new': 1.0}
+        regressions = compare(timings, baseline, threshold=0.2)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith('slower'))
+
+    def test_run_benchmarks(self):
+        """Test that every benchmark is timed."""
+        timings = run_benchmarks([100], [2], repeats=1)
+        self.assertEqual(len(timings), 10)
+        self.assertIn('apply_treaty[xs_aad_aal]/nb=100/years=2', timings)
+        self.assertIn('apply_program[tower]/nb=100/years=2', timings)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,19 +2,195 @@
 This module provides functions for parsing the config file
 
 """
-from random_variables import r_poisson, r_pareto # pylint: disable=import-error
+from array import array
+from collections.abc import Mapping
+from dataclasses import dataclass
+import numpy as np
+import random_variables as rv  # pylint: disable=import-error
+import sampling  # pylint: disable=import-error
 
-distribution_map = {'Poisson': r_poisson,
-                    'Pareto': r_pareto}
+
+@dataclass
+class Distribution:
+    """Class representing a sampler drawing either one random number or a whole array."""
+
+    name: str
+    sample: callable  # sample(**parameters) -> float
+    sample_batch: callable  # sample_batch(size, generator, **parameters) -> np.ndarray
+    quantile: callable = None  # quantile(uniforms, **parameters) -> np.ndarray
+    cdf: callable = None  # cdf(value, **parameters) -> float
+
+    def __call__(self, **parameters):
+        """Draw one random number, like the functions of random_variables."""
+        return self.sample(**parameters)
+
+    def batch(self, size, generator, **parameters):
+        """Draw an array of size random numbers from a numpy Generator."""
+        return self.sample_batch(size, generator, **parameters)
+
+
+distribution_map = {}
+
+
+def register_distribution(name, sample, sample_batch, quantile=None, cdf=None):  # pylint: disable=too-many-arguments
+    """
+    Register a distribution under the name used in the config file.
+
+    Args:
+        name (str): The name of the distribution in the config file.
+        sample (callable): The function drawing one random number.
+        sample_batch (callable): The function drawing an array of random numbers.
+        quantile (callable, optional): The inverse CDF, required by the variance reduction
+            methods. Defaults to None.
+        cdf (callable, optional): The CDF, required by the importance sampling of severities.
+            Defaults to None.
+    """
+    distribution_map[name] = Distribution(name, sample, sample_batch, quantile, cdf)
+
+
+register_distribution('Poisson', rv.r_poisson, rv.r_poisson_batch, rv.poisson_quantile)
+register_distribution('NegativeBinomial', rv.r_negative_binomial, rv.r_negative_binomial_batch,
+                      rv.negative_binomial_quantile)
+register_distribution('Pareto', rv.r_pareto, rv.r_pareto_batch, rv.pareto_quantile,
+                      rv.pareto_cdf)
+register_distribution('TruncatedPareto', rv.r_truncated_pareto, rv.r_truncated_pareto_batch,
+                      rv.truncated_pareto_quantile, rv.truncated_pareto_cdf)
+register_distribution('Lognormal', rv.r_lognormal, rv.r_lognormal_batch)
+register_distribution('Gamma', rv.r_gamma, rv.r_gamma_batch)
+
+
+COLUMNS = ('simId', 'claimId', 'claimDevelopmentYear', 'claimAmount')
+
+
+class ClaimTable:
+    """
+    Class representing simulated claims, stored once for all the development years.
+
+    The simulation ids, claim ids and ultimate amounts are typed arrays holding one value per
+    claim, and the developed amounts of a development year are computed on demand from the
+    cumulative development pattern. Indexing the table by a development year gives a read-only
+    mapping with the 'simId', 'claimId', 'claimDevelopmentYear' and 'claimAmount' columns, so
+    the table can be used like the list of dictionaries of the claim generators.
+    """
+
+    __slots__ = ('sim_ids', 'claim_ids', 'ultimate_amounts', 'development_factors', 'weights')
+
+    def __init__(self, sim_ids, claim_ids, ultimate_amounts, development_factors,  # pylint: disable=too-many-arguments
+                 weights=None):
+        """Initialize the table.
+
+        Args:
+            sim_ids (array-like): The simulation id of every claim, from 0.
+            claim_ids (array-like): The claim id of every claim, within its simulation.
+            ultimate_amounts (array-like): The ultimate amount of every claim.
+            development_factors (array-like): The cumulative development pattern.
+            weights (array-like, optional): The weight of every simulation, by simulation id,
+                when the simulations are not equally likely. Defaults to None.
+        """
+        self.sim_ids = np.asarray(sim_ids, dtype=np.int32)
+        self.claim_ids = np.asarray(claim_ids, dtype=np.int32)
+        self.ultimate_amounts = np.asarray(ultimate_amounts, dtype=np.float64)
+        self.development_factors = np.asarray(development_factors, dtype=np.float64)
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+
+    @classmethod
+    def from_pattern(cls, sim_ids, claim_ids, ultimate_amounts, development_pattern):
+        """Create a table from the development pattern coefficients rather than their sum."""
+        development_factors = []
+        development_factor = 0.0
+        for development_coefficient in development_pattern:
+            development_factor += development_coefficient
+            development_factors += [development_factor]
+        return cls(sim_ids, claim_ids, ultimate_amounts, development_factors)
+
+    def __len__(self):
+        """Return the number of development years."""
+        return len(self.development_factors)
+
+    def __getitem__(self, development_year):
+        """Return the claims of a development year."""
+        return ClaimYear(self, range(len(self))[development_year])
+
+    def __iter__(self):
+        """Iterate over the claims of every development year."""
+        return (ClaimYear(self, development_year) for development_year in range(len(self)))
+
+    @property
+    def nb_claims(self) -> int:
+        """The number of claims, including the placeholder rows of simulations without claims."""
+        return len(self.sim_ids)
+
+    @property
+    def nbytes(self) -> int:
+        """The memory held by the columns, in bytes."""
+        return sum(column.nbytes for column in (self.sim_ids, self.claim_ids,
+                                                self.ultimate_amounts, self.development_factors,
+                                                self.weights) if column is not None)
+
+    def claim_amounts(self, development_year=None) -> np.ndarray:
+        """
+        Compute the developed claim amounts.
+
+        Args:
+            development_year (int, optional): The development year. Defaults to None, every
+                development year.
+
+        Returns:
+            np.ndarray: The developed amounts of the claims, with one row per development year
+                when development_year is None.
+        """
+        if development_year is None:
+            return self.development_factors[:, None] * self.ultimate_amounts
+        return self.ultimate_amounts * self.development_factors[development_year]
+
+
+class ClaimYear(Mapping):
+    """Class representing the claims of a development year of a ClaimTable, as columns."""
+
+    __slots__ = ('table', 'development_year')
+
+    def __init__(self, table, development_year):
+        """Initialize the view.
+
+        Args:
+            table (ClaimTable): The claims.
+            development_year (int): The development year.
+        """
+        self.table = table
+        self.development_year = development_year
+
+    def __getitem__(self, column):
+        """Return a column, the development years and amounts being computed on demand."""
+        if column == 'simId':
+            return self.table.sim_ids
+        if column == 'claimId':
+            return self.table.claim_ids
+        if column == 'claimDevelopmentYear':
+            return np.full(self.table.nb_claims, self.development_year, dtype=np.int32)
+        if column == 'claimAmount':
+            return self.table.claim_amounts(self.development_year)
+        raise KeyError(column)
+
+    def __iter__(self):
+        """Iterate over the column names."""
+        return iter(COLUMNS)
+
+    def __len__(self):
+        """Return the number of columns."""
+        return len(COLUMNS)
 
 
 def generate_claims(size: int,
                     frequency: dict[callable, dict[float]],
                     severity: dict[callable, dict[float]],
-                    development_pattern: list[float]) -> list[dict[list]]:
+                    development_pattern: list[float]) -> ClaimTable:
     """
     Generate simulated claims based on provided parameters.
 
+    The claims are drawn one at a time, their ids and ultimate amounts being appended to
+    typed arrays, and the developed amounts are derived from the development pattern by the
+    returned table.
+
     Args:
         size (int): The number of simulations/claims to generate.
         frequency (dict[callable, dict[float]]): A dictionary specifying the frequency distribution
@@ -24,35 +200,123 @@ def generate_claims(size: int,
         development_pattern (list[float]): A list of development pattern coefficients.
 
     Returns:
-        list[dict[list]]: A list of dictionaries representing the generated claims. Each dictionary
-            contains the following keys: 'simId', 'claimId', 'claimDevelopmentYear',
-            and 'claimAmount'.
+        ClaimTable: The generated claims. Each development year of the table has the following
+            columns: 'simId', 'claimId', 'claimDevelopmentYear', and 'claimAmount'.
 
     """
-    claims = [{'simId': [],
-               'claimId': [],
-               'claimDevelopmentYear': [],
-               'claimAmount': []} for _ in development_pattern]
+    sim_ids = array('i')
+    claim_ids = array('i')
+    ultimate_claim_amounts = array('d')
 
     for sim in range(size):
         nb_claims = frequency['distribution'](**frequency['parameters'])
         if nb_claims == 0:
-            for development_year, development_coefficient in enumerate(development_pattern):
-                claims[development_year]['simId'] += [sim]
-                claims[development_year]['claimId'] += [0]
-                claims[development_year]['claimDevelopmentYear'] += [development_year]
-                claims[development_year]['claimAmount'] += [0]
-                continue
+            sim_ids.append(sim)
+            claim_ids.append(0)
+            ultimate_claim_amounts.append(0.0)
 
         for claim_id in range(nb_claims):
-            ultimate_claim_amount = severity['distribution'](
-                **severity['parameters'])
-            development_factor = 0.0
-            for development_year, development_coefficient in enumerate(development_pattern):
-                development_factor += development_coefficient
-                claims[development_year]['simId'] += [sim]
-                claims[development_year]['claimId'] += [claim_id]
-                claims[development_year]['claimDevelopmentYear'] += [development_year]
-                claims[development_year]['claimAmount'] += [
-                    ultimate_claim_amount * development_factor]
-    return claims
+            sim_ids.append(sim)
+            claim_ids.append(claim_id)
+            ultimate_claim_amounts.append(severity['distribution'](**severity['parameters']))
+    return ClaimTable.from_pattern(sim_ids, claim_ids, ultimate_claim_amounts,
+                                   development_pattern)
+
+
+def generate_claims_batch(size: int,  # pylint: disable=too-many-arguments,too-many-locals
+                          frequency: dict[Distribution, dict[float]],
+                          severity: dict[Distribution, dict[float]],
+                          development_pattern: list[float],
+                          seed: int = None,
+                          variance_reduction: dict = None) -> ClaimTable:
+    """
+    Generate simulated claims with numpy, drawing all the random numbers in two calls.
+
+    All the frequencies are drawn at once, then all the severities at once. The layout is
+    identical to generate_claims, including the zero-claim placeholder rows.
+
+    The variance_reduction 'method' changes the uniforms turned into claims by the inverse
+    CDF of the distributions:
+    - 'antithetic': the simulations come in pairs whose frequency and severity uniforms are
+      one minus each other.
+    - 'quasi': the frequency and the first 'dimensions' - 1 severities of the simulations
+      come from a scrambled Halton point set.
+    - 'importance': a 'tail_share' of the severities is drawn above the 'threshold', and every
+      simulation gets the likelihood ratio of its severities as weight.
+
+    Args:
+        size (int): The number of simulations/claims to generate.
+        frequency (dict[Distribution, dict[float]]): A dictionary specifying the frequency
+            distribution and its parameters.
+        severity (dict[Distribution, dict[float]]): A dictionary specifying the severity
+            distribution and its parameters.
+        development_pattern (list[float]): A list of development pattern coefficients.
+        seed (int, optional): The seed of the numpy random generator. Defaults to None.
+        variance_reduction (dict, optional): The 'method' and its settings. Defaults to None,
+            plain Monte Carlo.
+
+    Returns:
+        ClaimTable: The generated claims. Each development year of the table has the following
+            columns: 'simId', 'claimId', 'claimDevelopmentYear', and 'claimAmount'.
+
+    Raises:
+        ValueError: If the method is unknown or the distributions lack the functions it needs.
+
+    """
+    generator = np.random.default_rng(seed)
+    variance_reduction = variance_reduction or {}
+    method = variance_reduction.get('method') or ''
+    if method not in ('', 'antithetic', 'quasi', 'importance'):
+        raise ValueError(f'Unknown variance reduction method {method!r}.')
+    if method in ('antithetic', 'quasi') and frequency['distribution'].quantile is None:
+        raise ValueError(f'{method} sampling requires the quantile function of '
+                         f'{frequency["distribution"].name}.')
+    if method and severity['distribution'].quantile is None:
+        raise ValueError(f'{method} sampling requires the quantile function of '
+                         f'{severity["distribution"].name}.')
+
+    points = None
+    if method == 'antithetic':
+        nb_claims = frequency['distribution'].quantile(
+            sampling.antithetic_uniforms(size, generator), **frequency['parameters'])
+    elif method == 'quasi':
+        points = sampling.scrambled_halton(size, variance_reduction.get('dimensions', 8),
+                                           generator)
+        nb_claims = frequency['distribution'].quantile(points[:, 0], **frequency['parameters'])
+    else:
+        nb_claims = frequency['distribution'].batch(size, generator, **frequency['parameters'])
+    nb_claims = np.asarray(nb_claims, dtype=np.int64)
+
+    # A simulation without claims still gets one placeholder row.
+    nb_rows = np.maximum(nb_claims, 1)
+    first_rows = np.cumsum(nb_rows) - nb_rows
+    sim_ids = np.repeat(np.arange(size, dtype=np.int32), nb_rows)
+    claim_ids = np.arange(len(sim_ids), dtype=np.int32) - np.repeat(
+        first_rows.astype(np.int32), nb_rows)
+
+    ultimate_claim_amounts = np.zeros(len(sim_ids))
+    has_claims = np.repeat(nb_claims > 0, nb_rows)
+    weights = None
+    if method in ('antithetic', 'quasi'):
+        ultimate_claim_amounts[has_claims] = severity['distribution'].quantile(
+            sampling.severity_uniforms(method, nb_claims, generator, points),
+            **severity['parameters'])
+    elif method == 'importance':
+        if severity['distribution'].cdf is None:
+            raise ValueError('importance sampling requires the CDF of '
+                             f'{severity["distribution"].name}.')
+        uniforms, likelihood_ratios = sampling.importance_uniforms(
+            int(nb_claims.sum()), generator,
+            1 - severity['distribution'].cdf(variance_reduction['threshold'],
+                                             **severity['parameters']),
+            variance_reduction.get('tail_share', 0.5))
+        ultimate_claim_amounts[has_claims] = severity['distribution'].quantile(
+            uniforms, **severity['parameters'])
+        weights = np.exp(np.bincount(sim_ids[has_claims], weights=np.log(likelihood_ratios),
+                                     minlength=size))
+    else:
+        ultimate_claim_amounts[has_claims] = severity['distribution'].batch(
+            int(nb_claims.sum()), generator, **severity['parameters'])
+
+    return ClaimTable(sim_ids, claim_ids, ultimate_claim_amounts,
+                      np.cumsum(development_pattern, dtype=float), weights)
@@ -0,0 +1,218 @@
+"""
+This module provides an on-disk cache of simulated claim sets.
+
+A claim set is identified by a hash of the simulations section of the config (the settings
+that do not change the claims, such as the number of workers, are left out) together with the
+size and seed of the random stream. The columns of its claim table are stored as .npy files in
+a directory named after the hash and are loaded back memory-mapped, without copying them in
+memory.
+
+The cache is bounded in size: after every insertion the least recently used claim sets are
+evicted until the cache fits. Running the module invalidates the claim sets of a configuration
+file, config.yaml by default, or clears its whole cache with --all.
+
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from claims import ClaimTable  # pylint: disable=import-error
+
+# Settings of the simulations section which do not change the simulated claims.
+IGNORED_SETTINGS = ('workers', 'treaty_workers', 'streaming', 'adaptive', 'cache', 'export')
+
+# The attributes of the claim tables, stored as <attribute>.npy files, with weights.npy for
+# weighted simulations.
+COLUMNS = ('sim_ids', 'claim_ids', 'ultimate_amounts', 'development_factors')
+
+
+def _json_default(value):
+    """Serialize the non JSON values of the simulations section."""
+    if isinstance(value, np.random.SeedSequence):
+        return {'entropy': value.entropy, 'spawn_key': list(value.spawn_key)}
+    # Distributions are identified by their name in the config, functions by their name.
+    return getattr(value, 'name', getattr(value, '__name__', repr(value)))
+
+
+def simulations_key(simulations, size=None, seed=None) -> str:
+    """
+    Hash the settings which determine a simulated claim set.
+
+    Args:
+        simulations (dict): The simulations section of the config.
+        size (int, optional): The number of simulations, overrides simulations["nb"].
+        seed (int | np.random.SeedSequence, optional): The seed, overrides simulations["seed"].
+
+    Returns:
+        str: The hexadecimal hash of the claim set.
+    """
+    settings = {key: value for key, value in simulations.items() if key not in IGNORED_SETTINGS}
+    settings['nb'] = settings['nb'] if size is None else size
+    settings['seed'] = settings['seed'] if seed is None else seed
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=_json_default)
+                          .encode('UTF-8')).hexdigest()
+
+
+class ClaimCache:
+    """Class representing a size bounded directory of cached claim sets."""
+
+    def __init__(self, directory, max_size_mb=None):
+        """Initialize the cache.
+
+        Args:
+            directory (str): The directory holding the claim sets, created if missing.
+            max_size_mb (float, optional): The maximal size of the cache in megabytes.
+                Defaults to None, no limit.
+        """
+        self.directory = directory
+        self.max_size = None if max_size_mb is None else max_size_mb * 1024 ** 2
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """Load a cached claim set.
+
+        Args:
+            key (str): The hash of the claim set.
+
+        Returns:
+            ClaimTable | None: The claims, with read-only memory-mapped columns, or None if the
+                claim set is not cached.
+        """
+        path = self._path(key)
+        if not os.path.isdir(path):
+            return None
+        try:
+            columns = [np.load(os.path.join(path, column + '.npy'), mmap_mode='r')
+                       for column in COLUMNS]
+        except (FileNotFoundError, ValueError):
+            # Written in another format, the claim set is simulated and stored again.
+            self.invalidate(key)
+            return None
+        weights = os.path.join(path, 'weights.npy')
+        weights = np.load(weights, mmap_mode='r') if os.path.exists(weights) else None
+        # The modification time of the directory records the last use for the eviction.
+        os.utime(path)
+        return ClaimTable(*columns, weights)
+
+    def put(self, key, claims):
+        """Store a claim set and evict the least recently used ones if the cache is full.
+
+        Args:
+            key (str): The hash of the claim set.
+            claims (ClaimTable): The claims.
+        """
+        temporary = tempfile.mkdtemp(dir=self.directory, prefix='.tmp-')
+        for column in COLUMNS:
+            np.save(os.path.join(temporary, column + '.npy'), getattr(claims, column))
+        if claims.weights is not None:
+            np.save(os.path.join(temporary, 'weights.npy'), claims.weights)
+        try:
+            os.rename(temporary, self._path(key))
+        except OSError:
+            # Another process stored the same claim set first.
+            shutil.rmtree(temporary, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        """List the cached claim sets.
+
+        Returns:
+            list[tuple]: The key, last use time and size in bytes of every claim set.
+        """
+        entries = []
+        for key in os.listdir(self.directory):
+            path = self._path(key)
+            if key.startswith('.') or not os.path.isdir(path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path))
+            entries += [(key, os.stat(path).st_mtime, size)]
+        return entries
+
+    def evict(self):
+        """Remove the least recently used claim sets until the cache fits its maximal size."""
+        if self.max_size is None:
+            return
+        entries = sorted(self.entries(), key=lambda entry: entry[1])
+        total_size = sum(size for _, _, size in entries)
+        for key, _, size in entries:
+            if total_size <= self.max_size:
+                break
+            self.invalidate(key)
+            total_size -= size
+
+    def invalidate(self, key):
+        """Remove a claim set from the cache.
+
+        Args:
+            key (str): The hash of the claim set.
+        """
+        shutil.rmtree(self._path(key), ignore_errors=True)
+
+    def clear(self):
+        """Remove every claim set from the cache."""
+        for key, _, _ in self.entries():
+            self.invalidate(key)
+
+
+def cached_claims(simulations, simulate, size=None, seed=None):
+    """
+    Load a claim set from the cache configured in simulations["cache"], or simulate and store it.
+
+    Args:
+        simulations (dict): The simulations section of the config.
+        simulate (callable): The function simulating the claims when they are not cached.
+        size (int, optional): The number of simulations, overrides simulations["nb"].
+        seed (int | np.random.SeedSequence, optional): The seed, overrides simulations["seed"].
+
+    Returns:
+        ClaimTable: The claims.
+    """
+    cache = ClaimCache(simulations['cache']['directory'],
+                       simulations['cache'].get('max_size_mb'))
+    key = simulations_key(simulations, size, seed)
+    claims = cache.get(key)
+    if claims is None:
+        claims = simulate()
+        cache.put(key, claims)
+    return claims
+
+
+def main(argv=None):
+    """
+    Invalidate the cached claim sets of a configuration file.
+
+    Args:
+        argv (list[str], optional): The arguments. Defaults to None, the arguments of the
+            process.
+    """
+    from config import DEFAULT_PATH, load_config  # pylint: disable=import-error,import-outside-toplevel
+    from main import shard_arguments  # pylint: disable=import-error,import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description='Invalidate cached claim sets.')
+    parser.add_argument('--all', action='store_true', help='clear the whole cache')
+    parser.add_argument('--config', default=DEFAULT_PATH,
+                        help=f'configuration file of the claim sets (default: {DEFAULT_PATH})')
+    arguments = parser.parse_args(argv)
+    config = load_config(arguments.config)
+
+    claim_cache = ClaimCache(config['simulations']['cache']['directory'])
+    if arguments.all:
+        claim_cache.clear()
+    else:
+        # Invalidate the single stream claim set and the claim sets of every shard.
+        claim_cache.invalidate(simulations_key(config['simulations']))
+        if config['simulations'].get('shard_size'):
+            _, _, _, sizes, seeds = shard_arguments(config['simulations'], config['treaties'])
+            for shard_size, shard_seed in zip(sizes, seeds):
+                claim_cache.invalidate(simulations_key(config['simulations'], shard_size,
+                                                       shard_seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+This module provides classes for testing the claim set cache.
+"""
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+import yaml
+from config import config, load_config # pylint: disable=import-error
+from config_test import raw_config # pylint: disable=import-error
+from claims_cache import ClaimCache, main, simulations_key # pylint: disable=import-error
+from main import simulate_claims # pylint: disable=import-error
+
+
+class SimulationsKeyTests(unittest.TestCase):
+    """Test cases for the simulations_key function."""
+
+    def test_ignored_settings(self):
+        """Test that the settings which do not change the claims do not change the key."""
+        simulations = config['simulations']
+        self.assertEqual(simulations_key(simulations),
+                         simulations_key({**simulations, 'workers': 8, 'streaming': True}))
+
+    def test_claim_settings(self):
+        """Test that the settings which change the claims change the key."""
+        simulations = config['simulations']
+        severity = {**simulations['severity'], 'parameters': {'shape': 1.5, 'scale': 2e6}}
+        self.assertNotEqual(simulations_key(simulations),
+                            simulations_key({**simulations, 'severity': severity}))
+        self.assertNotEqual(simulations_key(simulations), simulations_key(simulations, seed=1))
+        seeds = np.random.SeedSequence(0).spawn(2)
+        self.assertNotEqual(simulations_key(simulations, 10, seeds[0]),
+                            simulations_key(simulations, 10, seeds[1]))
+
+
+class ClaimCacheTests(unittest.TestCase):
+    """Test cases for the ClaimCache class."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.simulations = {**config['simulations'], 'nb': 1_000, 'mode': 'batch',
+                            'cache': {'directory': self.directory.name}}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cached_claims_are_memory_mapped(self):
+        """Test that a second run loads the same claims memory-mapped."""
+        claims = simulate_claims(self.simulations)
+        cached = simulate_claims(self.simulations)
+        self.assertIsInstance(cached.ultimate_amounts.base, np.memmap)
+        for claims_year, cached_year in zip(claims, cached):
+            for column in claims_year:
+                self.assertTrue(np.array_equal(claims_year[column], cached_year[column]))
+
+    def test_eviction_and_invalidation(self):
+        """Test that the least recently used claim sets are evicted first."""
+        cache = ClaimCache(self.directory.name)
+        claims = simulate_claims({**self.simulations, 'cache': {}})
+        cache.put('first', claims)
+        # Room for two claim sets.
+        cache.max_size = 2.5 * cache.entries()[0][2]
+        time.sleep(0.01)
+        cache.put('second', claims)
+        self.assertEqual(sorted(key for key, _, _ in cache.entries()), ['first', 'second'])
+        time.sleep(0.01)
+        self.assertIsNotNone(cache.get('first'))
+        cache.put('third', claims)
+        self.assertEqual(sorted(key for key, _, _ in cache.entries()), ['first', 'third'])
+
+        cache.invalidate('first')
+        self.assertIsNone(cache.get('first'))
+        cache.clear()
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_main_invalidates_the_claims_of_a_configuration(self):
+        """Test that the command line invalidates the claim set of the given configuration."""
+        content = raw_config()
+        content['simulations'].update({'nb': 1_000, 'mode': 'batch',
+                                       'cache': {'directory': self.directory.name}})
+        path = os.path.join(self.directory.name, 'small.yaml')
+        with open(path, 'w', encoding='UTF-8') as file:
+            yaml.safe_dump(content, file)
+        simulations = load_config(path)['simulations']
+        simulate_claims(simulations)
+        cache = ClaimCache(self.directory.name)
+        self.assertIsNotNone(cache.get(simulations_key(simulations)))
+        main(['--config', path])
+        self.assertIsNone(cache.get(simulations_key(simulations)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+This module provides a class for testing the claim generators.
+"""
+import random
+import unittest
+import numpy as np
+from claims import (generate_claims, generate_claims_batch, distribution_map,  # pylint: disable=import-error
+                    ClaimTable)
+
+
+class GenerateClaimsBatchTests(unittest.TestCase):
+    """Test cases for the generate_claims_batch function."""
+
+    frequency = {'distribution': distribution_map['Poisson'], 'parameters': {'rate': 1}}
+    severity = {'distribution': distribution_map['Pareto'],
+                'parameters': {'shape': 1.2, 'scale': 2e6}}
+    development_pattern = [0.3, 0.6, 0.1]
+
+    def generate(self, seed=0, size=1_000):
+        """Generate a small batch of claims."""
+        return generate_claims_batch(size=size, frequency=self.frequency,
+                                     severity=self.severity,
+                                     development_pattern=self.development_pattern,
+                                     seed=seed)
+
+    def test_columns_and_years(self):
+        """Test that every development year has the generate_claims columns."""
+        claims = self.generate()
+        self.assertEqual(len(claims), 3)
+        for development_year, claims_year in enumerate(claims):
+            self.assertEqual(list(claims_year),
+                             ['simId', 'claimId', 'claimDevelopmentYear', 'claimAmount'])
+            self.assertTrue(np.all(claims_year['claimDevelopmentYear'] == development_year))
+
+    def test_every_simulation_has_a_row(self):
+        """Test that simulations without claims keep a zero placeholder row."""
+        claims = self.generate()[0]
+        self.assertTrue(np.array_equal(np.unique(claims['simId']), np.arange(1_000)))
+        placeholders = claims['claimAmount'] == 0
+        self.assertTrue(placeholders.any())
+        self.assertTrue(np.all(claims['claimId'][placeholders] == 0))
+
+    def test_claim_ids_restart_per_simulation(self):
+        """Test that claim ids count the claims of each simulation from zero."""
+        claims = self.generate()[0]
+        first_rows = np.r_[True, claims['simId'][1:] != claims['simId'][:-1]]
+        self.assertTrue(np.all(claims['claimId'][first_rows] == 0))
+        self.assertTrue(np.all(np.diff(claims['claimId'])[~first_rows[1:]] == 1))
+
+    def test_development_pattern(self):
+        """Test that developed amounts follow the cumulative development pattern."""
+        claims = self.generate()
+        ultimate = claims[-1]['claimAmount']
+        self.assertTrue(np.allclose(claims[0]['claimAmount'], ultimate * 0.3))
+        self.assertTrue(np.allclose(claims[1]['claimAmount'], ultimate * 0.9))
+        self.assertTrue(np.all(ultimate[ultimate > 0] >= 2e6))
+
+    def test_seed_reproducibility(self):
+        """Test that a fixed seed reproduces the same claims."""
+        first, second, other = self.generate(seed=1), self.generate(seed=1), self.generate(seed=2)
+        self.assertTrue(np.array_equal(first[-1]['claimAmount'], second[-1]['claimAmount']))
+        self.assertFalse(np.array_equal(first[-1]['simId'], other[-1]['simId']) and
+                         np.array_equal(first[-1]['claimAmount'], other[-1]['claimAmount']))
+
+
+class ClaimTableTests(unittest.TestCase):
+    """Test cases for the ClaimTable class."""
+
+    development_pattern = [0.3, 0.6, 0.1]
+
+    def test_scalar_generator_amounts(self):
+        """Test that the developed amounts are those of the original per-claim loop."""
+        random.seed(0)
+        claims = generate_claims(
+            size=200, frequency=GenerateClaimsBatchTests.frequency,
+            severity=GenerateClaimsBatchTests.severity,
+            development_pattern=self.development_pattern)
+        random.seed(0)
+        for sim in range(200):
+            nb_claims = distribution_map['Poisson'](rate=1)
+            rows = np.flatnonzero(claims.sim_ids == sim)
+            self.assertEqual(len(rows), max(nb_claims, 1))
+            for row in rows[:nb_claims]:
+                ultimate = distribution_map['Pareto'](shape=1.2, scale=2e6)
+                development_factor = 0.0
+                for development_year, development_coefficient in enumerate(
+                        self.development_pattern):
+                    development_factor += development_coefficient
+                    self.assertEqual(claims[development_year]['claimAmount'][row],
+                                     ultimate * development_factor)
+
+    def test_columns(self):
+        """Test the columns of a development year and the stacked amounts."""
+        claims = ClaimTable.from_pattern([0, 1, 1], [0, 0, 1], [0.0, 10.0, 20.0],
+                                         self.development_pattern)
+        self.assertEqual(claims.sim_ids.dtype, np.int32)
+        self.assertEqual(dict(claims[-1])['claimDevelopmentYear'].tolist(), [2, 2, 2])
+        self.assertTrue(np.allclose(claims[1]['claimAmount'], [0, 9, 18]))
+        self.assertTrue(np.array_equal(claims.claim_amounts(),
+                                       [claims_year['claimAmount'] for claims_year in claims]))
+        with self.assertRaises(IndexError):
+            claims[3]  # pylint: disable=pointless-statement
+
+    def test_memory(self):
+        """Test that a claim takes 16 bytes whatever the number of development years."""
+        claims = generate_claims_batch(size=1_000, frequency=GenerateClaimsBatchTests.frequency,
+                                       severity=GenerateClaimsBatchTests.severity,
+                                       development_pattern=[0.1] * 10, seed=0)
+        self.assertEqual(claims.nbytes, 16 * claims.nb_claims + 8 * 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
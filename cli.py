@@ -0,0 +1,205 @@
+"""
+This module is the command line entry point of the pricing.
+
+Every configuration file given is loaded and validated by config.load_config before any is
+priced, then priced by main.run in the same process, so the imports are paid once for all of
+them. The pricing modules, and pandas with them, are only imported once a configuration is
+priced: checking configurations or printing the help starts without them.
+
+With several configurations, the statistics and profiles of every configuration are written to
+their own files, "{stem}" being replaced by the name of the configuration file without extension.
+
+Usage:
+    python cli.py                                  Price config.yaml into statistics.csv.
+    python cli.py a.yaml b.yaml -o "{stem}.csv"    Price several configurations.
+    python cli.py a.yaml b.yaml --check            Only validate the configurations.
+
+"""
+import argparse
+import os
+import sys
+from config import DEFAULT_PATH, load_config  # pylint: disable=import-error
+
+# The pandas display options of the printed statistics.
+DISPLAY_OPTIONS = ('display.max_rows', None, 'display.max_columns', None, 'display.width', None,
+                   'display.max_colwidth', None, 'display.float_format', '{:,.3f}'.format)
+
+
+def parse_arguments(argv=None):
+    """
+    Parse the command line.
+
+    Args:
+        argv (list[str], optional): The arguments. Defaults to None, the arguments of the
+            process.
+
+    Returns:
+        argparse.Namespace: The configuration paths and output options.
+    """
+    parser = argparse.ArgumentParser(description='Price the treaties of configuration files.')
+    parser.add_argument('configs', nargs='*', default=[DEFAULT_PATH],
+                        help=f'configuration files (default: {DEFAULT_PATH})')
+    parser.add_argument('-o', '--output', default='statistics.csv',
+                        help='CSV file of the statistics, "{stem}" being replaced by the name of '
+                             'the configuration file without extension; empty for no file '
+                             '(default: statistics.csv)')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='do not print the statistics')
+    parser.add_argument('--check', action='store_true',
+                        help='only validate the configurations, without pricing them')
+    arguments = parser.parse_args(argv)
+    clashes = clashing_paths(arguments.configs, arguments.output) if arguments.output else []
+    if clashes:
+        parser.error(f'--output must contain "{{stem}}" and the configuration files distinct '
+                     f'names to price several configurations, {clashes} clash.')
+    return arguments
+
+
+def output_path(template, config_path):
+    """
+    Build the path of the statistics of a configuration.
+
+    Args:
+        template (str): The --output option.
+        config_path (str): The path of the configuration file.
+
+    Returns:
+        str: The template, "{stem}" being replaced by the name of the configuration file
+            without extension.
+    """
+    return template.replace('{stem}', os.path.splitext(os.path.basename(config_path))[0])
+
+
+def profile_path(config, output, config_paths, config_path):
+    """
+    Build the path of the profile of a configuration.
+
+    Args:
+        config (dict): The configuration, as returned by config.load_config.
+        output (str): The --output option.
+        config_paths (list[str]): The paths of all the configuration files priced.
+        config_path (str): The path of the configuration file.
+
+    Returns:
+        str: The 'output' of the profiling section, "{stem}" being replaced as in output_path.
+            When several configurations are priced and it does not contain "{stem}", the
+            profile is written next to the statistics as "<statistics>.profile.json".
+    """
+    template = config.get('profiling', {}).get('output', 'profile.json')
+    if '{stem}' not in template and len(_distinct(config_paths)) > 1:
+        template = (os.path.splitext(output)[0] if output else '{stem}') + '.profile.json'
+    return output_path(template, config_path)
+
+
+def _distinct(paths):
+    """Return the distinct files of paths, in order."""
+    return list(dict.fromkeys(os.path.abspath(path) for path in paths))
+
+
+def clashing_paths(config_paths, template):
+    """
+    Find the files written for more than one configuration.
+
+    Args:
+        config_paths (list[str]): The paths of the configuration files.
+        template (str): The template of the files, as in output_path.
+
+    Returns:
+        list[str]: The files resolved from the template for several distinct configuration
+            files, sorted.
+    """
+    paths = [os.path.abspath(output_path(template, path)) for path in _distinct(config_paths)]
+    return sorted({path for path in paths if paths.count(path) > 1})
+
+
+def price(config, output=None, quiet=False, profile=None):
+    """
+    Price a configuration, print and export its statistics.
+
+    Args:
+        config (dict): The configuration, as returned by config.load_config.
+        output (str, optional): The CSV file of the statistics. Defaults to None, no file.
+        quiet (bool, optional): Whether to skip printing the statistics. Defaults to False.
+        profile (str, optional): The file of the profile, when profiling is enabled. Defaults
+            to None, the 'output' of the profiling section.
+
+    Returns:
+        pd.DataFrame: The statistics.
+    """
+    import pandas as pd  # pylint: disable=import-outside-toplevel
+    from main import run  # pylint: disable=import-error,import-outside-toplevel
+    from profiler import profiler  # pylint: disable=import-error,import-outside-toplevel
+
+    profiling = config.get('profiling', {})
+    if profiling.get('enabled'):
+        profiler.start(memory=profiling.get('memory', True),
+                       hot_functions=profiling.get('hot_functions', 0) > 0)
+
+    statistics, convergence = run(config)
+
+    with pd.option_context(*DISPLAY_OPTIONS):
+        if convergence is not None:
+            print(f"{'Converged' if convergence['converged'] else 'Stopped at the budget'} after "
+                  f"{convergence['nb_simulations']:,} simulations ({convergence['nb_shards']} "
+                  f"shards): largest relative standard error "
+                  f"{convergence['max_relative_error']:.4%}, tolerance "
+                  f"{convergence['tolerance']:.4%}")
+            if not quiet:
+                print(convergence['relative_errors'])
+        if not quiet:
+            print(statistics)
+    if output:
+        with profiler.stage('export', rows=len(statistics)):
+            statistics.to_csv(output, index=False)
+
+    if profiling.get('enabled'):
+        profiler.write(profile or profiling.get('output', 'profile.json'),
+                       nb_functions=profiling.get('hot_functions', 0))
+    return statistics
+
+
+def main(argv=None):
+    """
+    Run the command line.
+
+    Args:
+        argv (list[str], optional): The arguments. Defaults to None, the arguments of the
+            process.
+
+    Returns:
+        int: The exit code, 0 on success and 1 if a configuration is invalid or two
+            configurations write the same profile.
+    """
+    arguments = parse_arguments(argv)
+    configs = []
+    for path in arguments.configs:
+        try:
+            configs += [load_config(path)]
+        except (OSError, ValueError) as exc:
+            print(exc, file=sys.stderr)
+            return 1
+    profiles = {os.path.abspath(path): profile_path(config, arguments.output, arguments.configs,
+                                                    path)
+                for path, config in zip(arguments.configs, configs)
+                if config.get('profiling', {}).get('enabled')}
+    resolved = [os.path.abspath(profile) for profile in profiles.values()]
+    clashes = sorted({profile for profile in resolved if resolved.count(profile) > 1})
+    if clashes:
+        print(f'Several configurations write the profiles {clashes}, the "output" of their '
+              f'profiling section must contain "{{stem}}".', file=sys.stderr)
+        return 1
+    if arguments.check:
+        for path in arguments.configs:
+            print(f'{path}: valid')
+        return 0
+
+    for path, config in zip(arguments.configs, configs):
+        if len(configs) > 1 and not arguments.quiet:
+            print(path)
+        price(config, output_path(arguments.output, path) if arguments.output else None,
+              arguments.quiet, profiles.get(os.path.abspath(path)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+This module provides a class for testing the command line entry point.
+"""
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import pandas as pd
+import yaml
+from cli import main, output_path  # pylint: disable=import-error
+from config_test import HERE, raw_config  # pylint: disable=import-error
+
+
+class MainTests(unittest.TestCase):
+    """Test cases for the main function of the command line."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, profiling=False, **simulations):
+        """Write a small configuration and return its path."""
+        config = raw_config()
+        config['simulations'].update({'nb': 500, 'mode': 'batch', **simulations})
+        config['profiling'].update({'enabled': profiling, 'memory': False, 'hot_functions': 0})
+        path = os.path.join(self.directory.name, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='UTF-8') as file:
+            yaml.safe_dump(config, file)
+        return path
+
+    def run_main(self, *argv):
+        """Run the command line and return its exit code and output."""
+        output, errors = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(errors):
+            try:
+                code = main(list(argv))
+            except SystemExit as exc:
+                code = exc.code
+        return code, output.getvalue() + errors.getvalue()
+
+    def test_prices_several_configurations(self):
+        """Test that every configuration is priced into its own file."""
+        paths = [self.write('a.yaml', seed=1), self.write('b.yaml', seed=2)]
+        template = os.path.join(self.directory.name, '{stem}.csv')
+        code, _ = self.run_main(*paths, '-o', template, '-q')
+        self.assertEqual(code, 0)
+        first, second = (pd.read_csv(output_path(template, path)) for path in paths)
+        self.assertEqual(list(first.columns), list(second.columns))
+        self.assertFalse(first.equals(second))
+
+    def test_several_configurations_need_a_stem(self):
+        """Test that several configurations cannot be written into the same file."""
+        code, output = self.run_main(self.write('a.yaml'), self.write('b.yaml'), '-o', 'x.csv')
+        self.assertEqual(code, 2)
+        self.assertIn('{stem}', output)
+        code, output = self.run_main(self.write('a/config.yaml'), self.write('b/config.yaml'),
+                                     '-o', '{stem}.csv')
+        self.assertEqual(code, 2)
+        self.assertIn('config.csv', output)
+
+    def test_profiles_of_several_configurations(self):
+        """Test that every configuration writes its own profile next to its statistics."""
+        paths = [self.write('a.yaml', profiling=True), self.write('b.yaml', profiling=True)]
+        template = os.path.join(self.directory.name, '{stem}.csv')
+        code, _ = self.run_main(*paths, '-o', template, '-q')
+        self.assertEqual(code, 0)
+        for stem in ('a', 'b'):
+            self.assertTrue(os.path.exists(os.path.join(self.directory.name,
+                                                        f'{stem}.profile.json')))
+        code, output = self.run_main(self.write('a/config.yaml', profiling=True),
+                                     self.write('b/config.yaml', profiling=True), '-o', '')
+        self.assertEqual(code, 1)
+        self.assertIn('config.profile.json', output)
+
+    def test_invalid_configuration(self):
+        """Test that an invalid configuration is reported before any pricing."""
+        invalid = os.path.join(self.directory.name, 'invalid.yaml')
+        with open(invalid, 'w', encoding='UTF-8') as file:
+            file.write('simulations: {}\n')
+        template = os.path.join(self.directory.name, '{stem}.csv')
+        code, output = self.run_main(self.write('a.yaml'), invalid, '-o', template)
+        self.assertEqual(code, 1)
+        self.assertIn('invalid.yaml', output)
+        self.assertFalse(os.path.exists(output_path(template, 'a.yaml')))
+
+    def test_check_does_not_import_pandas(self):
+        """Test that validating configurations does not import the pricing modules."""
+        script = ('import sys, cli; code = cli.main(["--check", sys.argv[1]]); '
+                  'sys.exit(code or "pandas" in sys.modules)')
+        result = subprocess.run([sys.executable, '-c', script, self.write('a.yaml')],
+                                cwd=HERE, capture_output=True, text=True, check=False)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('a.yaml: valid', result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
 """
-This module reads a configuration file, performs mappings for distributions and treaties,
-and prints the resulting configuration.
+This module reads configuration files, validates them and performs mappings for distributions
+and treaties.
+
+load_config(path) reads and resolves a configuration file. The module level `config`, the
+resolved config.yaml of the working directory, is only loaded when first accessed, e.g. by
+`from config import config`, so importing this module reads no file.
 
 It relies on the following external modules:
 - yaml: for reading the configuration file in YAML format.
@@ -8,28 +12,94 @@ It relies on the following external modules:
 - reinsurance: for the treaties_map used for mapping treaty types.
 
 The main functionality includes:
-- Reading the configuration file.
+- Reading a configuration file.
+- Validating its sections, distributions, treaties and treaty programs.
 - Performing mappings for frequency and severity distributions.
 - Performing mappings for treaty types.
+- Turning the treaty programs into treaties of type TreatyProgram.
 - Printing the resulting configuration.
 
 """
 
 import yaml
 from claims import distribution_map # pylint: disable=import-error
-from reinsurance import treaties_map # pylint: disable=import-error
-with open('config.yaml', 'r', encoding='UTF-8') as file:
-    try:
-        config = yaml.safe_load(file)
-    except yaml.YAMLError as exc:
-        print(exc)
-
-config['simulations']['frequency']['distribution'] = distribution_map[config['simulations']
-                                                                      ['frequency']['distribution']]
-config['simulations']['severity']['distribution'] = distribution_map[config['simulations']
-                                                                     ['severity']['distribution']]
-for index, treaty in enumerate(config['treaties']):
-    config['treaties'][index]['type'] = treaties_map[config['treaties'][index]['type']]
+from reinsurance import TreatyProgram, treaties_map # pylint: disable=import-error
+
+DEFAULT_PATH = 'config.yaml'
+
+# The settings every configuration must define, by section.
+REQUIRED_SETTINGS = {
+    'simulations': ('nb', 'seed', 'frequency', 'severity', 'development_pattern'),
+    'financials': ('cost_of_capital',),
+    'treaties': (),
+}
+
+
+def load_config(path=DEFAULT_PATH) -> dict:
+    """
+    Read, validate and resolve a configuration file.
+
+    Args:
+        path (str, optional): The path of the configuration file. Defaults to 'config.yaml'.
+
+    Returns:
+        dict: The configuration, with the distributions and treaty types mapped to their
+            objects and the treaty programs turned into treaties of type TreatyProgram.
+
+    Raises:
+        ValueError: If the file is not valid YAML, a required setting is missing, or a
+            distribution, treaty or treaty program is invalid.
+    """
+    with open(path, 'r', encoding='UTF-8') as file:
+        try:
+            config = yaml.safe_load(file)
+        except yaml.YAMLError as exc:
+            raise ValueError(f'{path}: invalid YAML: {exc}') from exc
+    if not isinstance(config, dict):
+        raise ValueError(f'{path}: the configuration must be a mapping.')
+    for section, settings in REQUIRED_SETTINGS.items():
+        if not isinstance(config.get(section), (list if section == 'treaties' else dict)):
+            raise ValueError(f'{path}: the {section!r} section is missing.')
+        missing = [setting for setting in settings if setting not in config[section]]
+        if missing:
+            raise ValueError(f'{path}: the {section!r} section misses {missing}.')
+
+    simulations = config['simulations']
+    for variable in ('frequency', 'severity'):
+        distribution = simulations[variable].get('distribution')
+        if distribution not in distribution_map:
+            raise ValueError(f'{path}: unknown {variable} distribution {distribution!r}.')
+        simulations[variable]['distribution'] = distribution_map[distribution]
+
+    for treaty in config['treaties']:
+        if treaty.get('type') not in treaties_map:
+            raise ValueError(f'{path}: unknown type {treaty.get("type")!r} of treaty '
+                             f'{treaty.get("name")!r}.')
+        treaty['type'] = treaties_map[treaty['type']]
+    config['programs'] = [{'name': program.get('name'), 'type': TreatyProgram,
+                           'parameters': {'layers': program.get('layers') or []}}
+                          for program in config.get('programs') or []]
+
+    names = []
+    for treaty in config['treaties'] + config['programs']:
+        try:
+            treaty['type'](**treaty.get('parameters', {}))
+        except (TypeError, ValueError, KeyError) as exc:
+            raise ValueError(f'{path}: invalid treaty {treaty.get("name")!r}: {exc!r}') from exc
+        names += [treaty.get('name')]
+    duplicates = sorted({str(name) for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f'{path}: the treaty names {duplicates} are used more than once.')
+    return config
+
+
+def __getattr__(name):
+    """Load the module level config on first access (PEP 562)."""
+    if name == 'config':
+        globals()['config'] = load_config()
+        return globals()['config']
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
 
 if __name__ == '__main__':
-    print(config)
+    print(load_config())
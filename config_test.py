@@ -0,0 +1,97 @@
+"""
+This module provides a class for testing the loading of the configuration files.
+"""
+import copy
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import yaml
+from config import DEFAULT_PATH, load_config  # pylint: disable=import-error
+from reinsurance import TreatyProgram  # pylint: disable=import-error
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# The treaty program of the example commented out in config.yaml.
+PROGRAM = {'name': 'qs 20% + xs tower', 'layers': [
+    {'name': 'qs 20%', 'type': 'qs', 'parameters': {'share': 0.2}},
+    {'name': '5m xs 5m', 'type': 'xs', 'net_of': ['qs 20%'],
+     'parameters': {'deductible': 5e6, 'limit': 5e6, 'aad': 0, 'aal': 0}},
+    {'name': '10m xs 10m', 'type': 'xs', 'net_of': ['qs 20%'],
+     'parameters': {'limit': 10e6, 'aad': 1e6, 'aal': 20e6}},
+]}
+
+
+def raw_config():
+    """Return the unresolved content of the default configuration file, with PROGRAM."""
+    with open(os.path.join(HERE, DEFAULT_PATH), 'r', encoding='UTF-8') as file:
+        config = yaml.safe_load(file)
+    return {**config, 'programs': [copy.deepcopy(PROGRAM)]}
+
+
+class LoadConfigTests(unittest.TestCase):
+    """Test cases for the load_config function."""
+
+    def write(self, content):
+        """Write a configuration into a temporary file and return its path."""
+        directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'config.yaml')
+        with open(path, 'w', encoding='UTF-8') as file:
+            file.write(content if isinstance(content, str) else yaml.safe_dump(content))
+        return path
+
+    def test_resolves_the_default_file(self):
+        """Test that the distributions, treaties and programs are mapped to their objects."""
+        config = load_config(os.path.join(HERE, DEFAULT_PATH))
+        self.assertTrue(callable(config['simulations']['frequency']['distribution']))
+        self.assertTrue(all(isinstance(treaty['type'], type) for treaty in config['treaties']))
+        self.assertEqual(config['programs'], [])
+        programs = load_config(self.write(raw_config()))['programs']
+        self.assertEqual(programs, [{'name': PROGRAM['name'], 'type': TreatyProgram,
+                                     'parameters': {'layers': PROGRAM['layers']}}])
+
+    def test_invalid_configurations_raise(self):
+        """Test that invalid configurations raise a ValueError naming the file."""
+        def without_financials(config):
+            del config['financials']
+
+        def unknown_distribution(config):
+            config['simulations']['severity']['distribution'] = 'cauchy'
+
+        def unknown_treaty_type(config):
+            config['treaties'][0]['type'] = 'stop loss'
+
+        def invalid_parameters(config):
+            config['treaties'][0]['parameters'] = {'unknown': 1}
+
+        def invalid_program(config):
+            config['programs'][0]['layers'][1]['net_of'] = 'missing'
+
+        def duplicate_names(config):
+            config['treaties'][1]['name'] = config['treaties'][0]['name']
+
+        for invalidate in (without_financials, unknown_distribution, unknown_treaty_type,
+                           invalid_parameters, invalid_program, duplicate_names):
+            with self.subTest(invalidate.__name__):
+                config = raw_config()
+                invalidate(config)
+                path = self.write(config)
+                with self.assertRaisesRegex(ValueError, path):
+                    load_config(path)
+        with self.assertRaises(ValueError):
+            load_config(self.write('simulations: [unclosed'))
+
+    def test_importing_does_not_read_the_configuration(self):
+        """Test that the pricing modules import without a configuration file."""
+        with tempfile.TemporaryDirectory() as directory:
+            result = subprocess.run(
+                [sys.executable, '-c', 'import config, main, cli'], cwd=directory,
+                env={**os.environ, 'PYTHONPATH': HERE}, capture_output=True, text=True,
+                check=False)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,149 +7,615 @@ and generates statistics based on the treaty recoveries.
 
 The module relies on the following external modules:
 - random: for setting the seed for simulations.
+- concurrent.futures: for running the simulation shards on several cores.
+- numpy: for deriving the random streams of the simulation shards.
 - pandas: for data manipulation and analysis.
-- config: for accessing the configuration parameters.
-- claims: for the generate_claims function used for claim data simulation.
+- claims: for the generate_claims and generate_claims_batch functions used for claim data
+  simulation.
+- claims_cache: for reusing the claims simulated by previous runs.
+- reinsurance: for the treaty programs, whose layers are priced as separate treaties.
+- shared_claims: for sharing the claims with the processes pricing the treaties.
+- recovery_export: for the binary export of the recoveries of every claim and simulation.
+- streaming: for the running statistics of the streaming mode.
+- pricing_statistics: for the statistics computed from the treaty recoveries.
+- profiler: for the optional instrumentation of the pipeline stages.
 
 The main functionality includes:
-- Setting pandas display options for better visualization of data.
 - Defining the apply_treaty function to apply treaties to claims.
-- Simulating claim data using the generate_claims function.
-- Applying treaties to the generated claims and storing the results.
-- Calculating various statistics based on the treaty recoveries.
-- Exporting the statistics to a CSV file.
+- Simulating claim data using the generate_claims function, optionally in shards run by a
+  process pool.
+- Applying treaties to the generated claims and storing the results, or pricing the
+  treaties in a process pool against claims held in shared memory.
+- Calculating various statistics based on the treaty recoveries, either on all the priced
+  claims, shard by shard with bounded memory (streaming mode), or shard by shard until the
+  statistics reach a target precision (adaptive mode).
+- Exporting the recoveries of every claim and simulation to a binary columnar directory
+  when an export is configured.
+- Running a whole configuration loaded by config.load_config in the mode it selects, the
+  command line entry point being cli.py.
 
 """
 
 import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+import numpy as np
 import pandas as pd
-from config import config  # pylint: disable=import-error
-from claims import generate_claims  # pylint: disable=import-error
-
-
-# Permanently changes the pandas settings
-pd.set_option("display.max_rows", None)
-pd.set_option("display.max_columns", None)
-pd.set_option("display.width", None)
-pd.set_option("display.max_colwidth", None)
-pd.set_option("display.float_format", lambda x: "{:,.0f}".format(x))  # pylint: disable=consider-using-f-string unnecessary-lambda
+from claims import generate_claims, generate_claims_batch  # pylint: disable=import-error
+from claims_cache import cached_claims  # pylint: disable=import-error
+from reinsurance import TreatyProgram  # pylint: disable=import-error
+from shared_claims import SharedClaimTable, attach_worker, worker_claims  # pylint: disable=import-error
+import recovery_export  # pylint: disable=import-error
+from streaming import RunningStatistics  # pylint: disable=import-error
+from profiler import profiler  # pylint: disable=import-error
+import pricing_statistics  # pylint: disable=import-error
 
 
 def apply_treaty(claims, treaty):  # pylint: disable=redefined-outer-name
     """
     Apply a treaty to the provided claims data.
 
+    The function calculates treaty recoveries for all the claims at once with the
+    vectorized apply_batch method of the treaty, the aggregate deductible and limit
+    being reset for every simulation.
+
+    Args:
+        claims (Mapping): The claims data containing 'simId' and 'claimAmount' information,
+            e.g. a development year of a ClaimTable.
+        treaty (object): The treaty object representing the specific treaty type and its parameters.
+
+    Returns:
+        dict: A copy of the claims data with the addition of 'treatyRecoveries' information.
+
+    """
+    treaty_year = treaty["type"](**treaty["parameters"])
+    return {**claims, "treatyRecoveries": treaty_year.apply_batch(
+        claims["claimAmount"], claims["simId"])}
+
+
+def apply_treaty_development(claims, treaty):  # pylint: disable=redefined-outer-name
+    """
+    Apply a treaty to the claims of every development year in a single sweep.
+
+    The developed amounts of all the development years are computed from the claim table and
+    the treaty goes through every simulation once, tracking one aggregate deductible and limit
+    per development year. The recoveries are those of apply_treaty applied to every
+    development year.
+
+    Args:
+        claims (ClaimTable): The generated claims.
+        treaty (object): The treaty object representing the specific treaty type and its parameters.
+
+    Returns:
+        np.ndarray: The recoveries, with one row per development year.
+
+    """
+    treaty_year = treaty["type"](**treaty["parameters"])
+    return treaty_year.apply_batch(claims.claim_amounts(), claims.sim_ids)
+
+
+def treaty_recoveries(claims, treaty):  # pylint: disable=redefined-outer-name
+    """
+    Apply a treaty or a treaty program to the claims of every development year.
+
+    The layers of a program are evaluated together by its apply_batch method and reported as
+    separate treaties named "<program>/<layer>".
+
+    Args:
+        claims (ClaimTable): The generated claims.
+        treaty (object): The treaty object representing the specific treaty type and its parameters.
+
+    Returns:
+        dict[str, np.ndarray]: The recoveries of every treaty or layer, with one row per
+            development year and one column per claim.
+    """
+    treaty_year = treaty["type"](**treaty["parameters"])
+    recoveries = treaty_year.apply_batch(claims.claim_amounts(), claims.sim_ids)
+    if isinstance(treaty_year, TreatyProgram):
+        return {f'{treaty["name"]}/{name}': layer
+                for name, layer in zip(treaty_year.layer_names, recoveries)}
+    return {treaty["name"]: recoveries}
+
+
+def apply_treaty_scalar(claims, treaty):  # pylint: disable=redefined-outer-name
+    """
+    Apply a treaty to the provided claims data, one claim at a time.
+
     The function calculates treaty recoveries for each claim based on the
-    provided treaty parameters.
+    provided treaty parameters. It is the reference implementation of apply_treaty.
 
     Args:
-        claims (dict): The claims data containing 'claimId' and 'claimAmount' information.
+        claims (Mapping): The claims data containing 'claimId' and 'claimAmount' information,
+            e.g. a development year of a ClaimTable.
         treaty (object): The treaty object representing the specific treaty type and its parameters.
 
     Returns:
-        dict: The modified claims data with the addition of 'treatyRecoveries' information.
+        dict: A copy of the claims data with the addition of 'treatyRecoveries' information.
 
     """
-    claims["treatyRecoveries"] = []
+    recoveries = []
     for claim_id, claim_amount in zip(claims["claimId"], claims["claimAmount"]):
         if claim_id == 0:
             treaty_year = treaty["type"](**treaty["parameters"])
         treaty_year = treaty_year.apply_treaty(claim_amount)
-        claims["treatyRecoveries"] += [treaty_year.recoveries]
-    return claims
+        recoveries += [treaty_year.recoveries]
+    return {**claims, "treatyRecoveries": recoveries}
 
 
-if __name__ == "__main__":
-    random.seed(config["simulations"]["seed"])
+def simulate_claims(simulations, size=None, seed=None):
+    """
+    Simulate the claims described by the simulations section of the config.
 
-    claims = generate_claims(
-        size=config["simulations"]["nb"],
-        frequency=config["simulations"]["frequency"],
-        severity=config["simulations"]["severity"],
-        development_pattern=config["simulations"]["development_pattern"],
-    )
+    The 'mode' key selects between the numpy batch generator ('batch', which config.yaml
+    ships) and the original per-claim generator ('scalar', used when the key is missing), and
+    the 'variance_reduction' key the sampling method of the batch generator. When a 'cache'
+    directory is configured, the claims are loaded memory-mapped from the cache if they were
+    simulated before.
 
-    treaties = config["treaties"]
-    results = pd.DataFrame()
-    for development_year in range(len(config["simulations"]["development_pattern"])):
-        for treaty in treaties:
-            result = pd.DataFrame.from_dict(
-                apply_treaty(claims[development_year], treaty))
-            result["treatyName"] = treaty["name"]
-            results = pd.concat([results, result], ignore_index=True)
-
-    results = results.sort_values(
-        by=["treatyName", "simId", "claimId", "claimDevelopmentYear"]
-    ).reset_index(drop=True)
-
-    # Statistics:
-    recoveries_per_year = (
-        results.groupby(["treatyName", "simId", "claimDevelopmentYear"])[
-            "treatyRecoveries"]
-        .sum()
-        .reset_index()
-    )
+    Args:
+        simulations (dict): The simulations section of the config.
+        size (int, optional): The number of simulations, overrides simulations["nb"].
+        seed (int | np.random.SeedSequence, optional): The seed, overrides simulations["seed"].
 
-    average_loss = (
-        recoveries_per_year.groupby(["treatyName", "claimDevelopmentYear"])[
-            "treatyRecoveries"
-        ]
-        .mean()
-        .unstack()
-    )
+    Returns:
+        ClaimTable: The generated claims.
 
-    VaR = (
-        recoveries_per_year.groupby(["treatyName", "claimDevelopmentYear"])[
-            "treatyRecoveries"
-        ]
-        .quantile(0.99)
-        .unstack()
-    )
+    """
+    if simulations.get("cache", {}).get("directory"):
+        uncached = {key: value for key, value in simulations.items() if key != "cache"}
+        return cached_claims(simulations, lambda: simulate_claims(uncached, size, seed),
+                             size, seed)
+
+    size = simulations["nb"] if size is None else size
+    seed = simulations["seed"] if seed is None else seed
 
-    TVaR = (
-        recoveries_per_year[
-            recoveries_per_year["treatyRecoveries"]
-            >= recoveries_per_year.groupby(["treatyName", "claimDevelopmentYear"])[
-                "treatyRecoveries"
-            ].transform(lambda x: x.quantile(0.99))
-        ]
-        .groupby(["treatyName", "claimDevelopmentYear"])["treatyRecoveries"]
-        .mean()
-        .unstack()
+    if simulations.get("mode", "scalar") == "batch":
+        return generate_claims_batch(
+            size=size,
+            frequency=simulations["frequency"],
+            severity=simulations["severity"],
+            development_pattern=simulations["development_pattern"],
+            seed=seed,
+            variance_reduction=simulations.get("variance_reduction"),
+        )
+
+    if simulations.get("variance_reduction", {}).get("method"):
+        raise ValueError("Variance reduction requires the batch mode.")
+    if isinstance(seed, np.random.SeedSequence):
+        seed = int(seed.generate_state(1)[0])
+    random.seed(seed)
+    return generate_claims(
+        size=size,
+        frequency=simulations["frequency"],
+        severity=simulations["severity"],
+        development_pattern=simulations["development_pattern"],
     )
 
-    premium = average_loss + (TVaR - average_loss) * \
-        config['financials']['cost_of_capital']
 
-    pd.set_option("display.float_format", lambda x: "{:,.3f}".format(x))  # pylint: disable=consider-using-f-string unnecessary-lambda
+def prepare_export(simulations):
+    """
+    Create the export directory of simulations["export"], when an export is configured.
+
+    Args:
+        simulations (dict): The simulations section of the config.
+    """
+    export = simulations.get("export") or {}
+    if export.get("directory"):
+        recovery_export.prepare_export(export["directory"], export.get("compressed", False))
 
-    results["payment_pattern"] = results["treatyRecoveries"] / results.groupby(
-        ["treatyName", "simId", "claimId"]
-    )["treatyRecoveries"].transform("sum")
 
-    results["incurred"] = (
-        results.groupby(["treatyName", "simId", "claimId"])["treatyRecoveries"]
-        .transform("sum")
-        .astype(bool)
-    )
+def export_recoveries(export, name, claims, recoveries, first_sim_id=0):
+    """
+    Write the recoveries of a treaty to the export of simulations["export"], if any.
+
+    Args:
+        export (dict | None): The export section of the simulations.
+        name (str): The name of the treaty.
+        claims (ClaimTable): The claims the treaty was applied to.
+        recoveries (np.ndarray): The recoveries, with one row per development year.
+        first_sim_id (int, optional): The simulation id of the first simulation of the claims.
+            Defaults to 0.
+    """
+    if not (export or {}).get("directory"):
+        return
+    with profiler.stage("export_recoveries", treaty=name) as record:
+        record["bytes"] = recovery_export.write_chunk(
+            export["directory"], name, claims, recoveries, first_sim_id,
+            export.get("compressed", False))
+
+
+def price_claims(claims, treaties, export=None, first_sim_id=0):  # pylint: disable=redefined-outer-name
+    """
+    Apply every treaty to the claims of every development year.
+
+    Args:
+        claims (ClaimTable): The generated claims.
+        treaties (list[dict]): The treaties section of the config, with the treaty programs.
+        export (dict, optional): The export section of the simulations, the recoveries being
+            written to its directory. Defaults to None, no export.
+        first_sim_id (int, optional): The simulation id of the first simulation of the claims
+            in the export. Defaults to 0.
+
+    Returns:
+        pd.DataFrame: The claims with their 'treatyRecoveries' and 'treatyName', and the
+            'weight' of their simulation when the simulations are weighted.
+
+    """
+    weights = {} if claims.weights is None else {"weight": claims.weights[claims.sim_ids]}
+    results = []
+    for treaty in treaties:
+        with profiler.stage("apply_treaty", treaty=treaty["name"]) as record:
+            record["rows"] = 0
+            for name, recoveries in treaty_recoveries(claims, treaty).items():
+                for claims_year, recoveries_year in zip(claims, recoveries):
+                    result = pd.DataFrame.from_dict(
+                        {**claims_year, **weights, "treatyRecoveries": recoveries_year})
+                    result["treatyName"] = name
+                    results += [result]
+                record["rows"] += recoveries.size
+                export_recoveries(export, name, claims, recoveries, first_sim_id)
+
+    with profiler.stage("concat") as record:
+        results = pd.concat(results, ignore_index=True)
+        record["rows"] = len(results)
+    return results
+
+
+def simulate_shard(simulations, treaties, first_sim_id, size, seed):  # pylint: disable=redefined-outer-name
+    """
+    Simulate and price one shard of the simulations.
+
+    Args:
+        simulations (dict): The simulations section of the config.
+        treaties (list[dict]): The treaties section of the config.
+        first_sim_id (int): The simulation id of the first simulation of the shard.
+        size (int): The number of simulations of the shard.
+        seed (np.random.SeedSequence): The random stream of the shard.
+
+    Returns:
+        pd.DataFrame: The priced claims of the shard, with global simulation ids.
+
+    """
+    results = price_claims(simulate_claims(simulations, size=size, seed=seed), treaties,
+                           simulations.get("export"), first_sim_id)
+    results["simId"] += first_sim_id
+    return results
+
+
+def shard_arguments(simulations, treaties):  # pylint: disable=redefined-outer-name
+    """
+    Split the simulations into shards of simulations["shard_size"] simulations.
+
+    Args:
+        simulations (dict): The simulations section of the config.
+        treaties (list[dict]): The treaties section of the config.
+
+    Returns:
+        tuple[list]: The arguments of simulate_shard for every shard, one list per argument.
+
+    """
+    first_sim_ids = list(range(0, simulations["nb"], simulations["shard_size"]))
+    sizes = [min(simulations["shard_size"], simulations["nb"] - first_sim_id)
+             for first_sim_id in first_sim_ids]
+    seeds = np.random.SeedSequence(simulations["seed"]).spawn(len(sizes))
+    return [simulations] * len(sizes), [treaties] * len(sizes), first_sim_ids, sizes, seeds
+
+
+def run_simulations(simulations, treaties):  # pylint: disable=redefined-outer-name
+    """
+    Simulate the claims and apply the treaties.
+
+    When simulations["shard_size"] is set, the simulations are split into shards of that size,
+    each shard getting an independent random stream spawned from the seed, and the shards are
+    run by a pool of simulations["workers"] processes. The shards do not depend on the number
+    of workers, so neither do the results.
+
+    Args:
+        simulations (dict): The simulations section of the config.
+        treaties (list[dict]): The treaties section of the config.
+
+    Returns:
+        pd.DataFrame: The priced claims, by treaty and development year.
+
+    """
+    prepare_export(simulations)
+    if simulations.get("shard_size"):
+        shards = shard_arguments(simulations, treaties)
+        workers = simulations.get("workers", 1)
+        with profiler.stage("shards", shards=len(shards[0]), workers=workers) as record:
+            if workers > 1:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    results = pd.concat(list(executor.map(simulate_shard, *shards)),
+                                        ignore_index=True)
+            else:
+                results = pd.concat(list(map(simulate_shard, *shards)), ignore_index=True)
+            record["rows"] = len(results)
+    else:
+        with profiler.stage("generate_claims") as record:
+            claims = simulate_claims(simulations)
+            record["rows"] = claims.nb_claims * len(claims)
+            record["bytes"] = claims.nbytes
+        results = price_claims(claims, treaties, simulations.get("export"))
+
+    return results
+
+
+def price_shared_treaty(treaty, export=None):  # pylint: disable=redefined-outer-name
+    """
+    Price a treaty against the claims shared with the worker process.
+
+    Args:
+        treaty (object): The treaty object representing the specific treaty type and its parameters.
+        export (dict, optional): The export section of the simulations, the recoveries being
+            written to its directory. Defaults to None, no export.
+
+    Returns:
+        dict[str, tuple]: The aggregates of the treaty, or of every layer of a program, as
+            returned by pricing_statistics.claim_table_aggregates.
+    """
+    claims = worker_claims()
+    aggregates = {}
+    for name, recoveries in treaty_recoveries(claims, treaty).items():
+        export_recoveries(export, name, claims, recoveries)
+        aggregates[name] = pricing_statistics.claim_table_aggregates(claims, recoveries)
+    return aggregates
+
+
+def run_parallel_treaties(simulations, treaties, cost_of_capital, levels=(),  # pylint: disable=redefined-outer-name
+                          standard_errors=None):
+    """
+    Simulate the claims once and price the treaties in parallel.
+
+    The claims are copied once into shared memory and a pool of simulations["treaty_workers"]
+    processes prices the treaties against them without copying them. Every worker sends back
+    the annual recoveries per development year and simulation of its treaties rather than
+    their recoveries per claim. The statistics are those of compute_statistics applied to the
+    results of run_simulations.
+
+    Args:
+        simulations (dict): The simulations section of the config.
+        treaties (list[dict]): The treaties section of the config.
+        cost_of_capital (float): The cost of capital used in the premium formula.
+        levels (list[float], optional): Other confidence levels of the VaR and TVaR.
+            Defaults to ().
+        standard_errors (dict, optional): The arguments of risk_measures.standard_errors.
+            Defaults to None, no standard errors.
+
+    Returns:
+        pd.DataFrame: The statistics in the format of compute_statistics.
+
+    Raises:
+        ValueError: If the simulations are split into shards.
+    """
+    if simulations.get("shard_size"):
+        raise ValueError("The treaty workers price a single claim set, shard_size must be 0.")
+    prepare_export(simulations)
+    with profiler.stage("generate_claims") as record:
+        claims = simulate_claims(simulations)
+        record["rows"] = claims.nb_claims * len(claims)
+        record["bytes"] = claims.nbytes
+
+    workers = min(simulations.get("treaty_workers", 1), len(treaties))
+    aggregates = {}
+    with profiler.stage("apply_treaties", treaties=len(treaties), workers=workers) as record:
+        with SharedClaimTable(claims) as shared, ProcessPoolExecutor(
+                max_workers=workers, initializer=attach_worker,
+                initargs=(shared.descriptor,)) as executor:
+            record["bytes"] = shared.nbytes
+            for treaty_aggregates in executor.map(
+                    partial(price_shared_treaty, export=simulations.get("export")), treaties):
+                aggregates.update(treaty_aggregates)
+
+    with profiler.stage("statistics", treaties=len(aggregates)):
+        return pricing_statistics.aggregated_statistics(
+            aggregates, cost_of_capital, levels=levels, standard_errors=standard_errors,
+            sim_weights=pricing_statistics.claim_table_weights(claims))
+
+
+def run_streaming(simulations, treaties, cost_of_capital, levels=(), standard_errors=None):  # pylint: disable=redefined-outer-name
+    """
+    Simulate, price and aggregate the claims shard by shard.
+
+    Only the priced claims of the shards being processed are held in memory, the statistics
+    being accumulated in running sums and bounded tail buffers. The statistics are those of
+    run_simulations followed by compute_statistics with the same shards, except the standard
+    errors, which are always estimated by batch means with one batch per shard.
+
+    Args:
+        simulations (dict): The simulations section of the config.
+        treaties (list[dict]): The treaties section of the config.
+        cost_of_capital (float): The cost of capital used in the premium formula.
+        levels (list[float], optional): Other confidence levels of the VaR and TVaR.
+            Defaults to ().
+        standard_errors (dict, optional): Whether to report standard errors, as in
+            compute_statistics. Defaults to None.
+
+    Returns:
+        pd.DataFrame: The statistics in the format of compute_statistics.
+
+    """
+    if not simulations.get("shard_size"):
+        raise ValueError("Streaming requires simulations.shard_size to be set.")
+    if simulations.get("variance_reduction", {}).get("method") == "importance":
+        raise ValueError("Importance sampling requires the weights of every simulation, "
+                         "it is not available in the streaming mode.")
+
+    shards = list(zip(*shard_arguments(simulations, treaties)))
+    if standard_errors and len(shards) < 2:
+        raise ValueError("Streaming standard errors require at least two shards.")
+    prepare_export(simulations)
+    running_statistics = RunningStatistics(simulations["nb"], levels=levels,
+                                           standard_errors=bool(standard_errors))
+    workers = simulations.get("workers", 1)
+    with profiler.stage("streaming", shards=len(shards), workers=workers) as record:
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # At most one shard per worker is priced and held at a time.
+                for first_shard in range(0, len(shards), workers):
+                    window = zip(*shards[first_shard:first_shard + workers])
+                    for results in executor.map(simulate_shard, *window):
+                        running_statistics.update(results)
+                        record["rows"] = record.get("rows", 0) + len(results)
+        else:
+            for shard in shards:
+                results = simulate_shard(*shard)
+                running_statistics.update(results)
+                record["rows"] = record.get("rows", 0) + len(results)
+
+    with profiler.stage("statistics"):
+        return pricing_statistics.statistics_table(
+            *running_statistics.frames(cost_of_capital),
+            **running_statistics.extra_frames(cost_of_capital))
+
+
+def run_adaptive(simulations, treaties, cost_of_capital, levels=()):  # pylint: disable=redefined-outer-name,too-many-locals
+    """
+    Simulate, price and aggregate shards until the statistics converge.
+
+    The shards are those of run_streaming, their random streams being spawned from the seed
+    one at a time, so a run stopping after n simulations gives the statistics of run_streaming
+    with n simulations. After every window of one shard per worker, and once
+    simulations["adaptive"]["min_shards"] shards are done, the run stops if the relative
+    standard error of every average loss, TVaR and premium is within
+    simulations["adaptive"]["tolerance"], or when simulations["adaptive"]["max_nb"] simulations
+    are done.
+
+    Args:
+        simulations (dict): The simulations section of the config, simulations["nb"] being
+            ignored.
+        treaties (list[dict]): The treaties section of the config.
+        cost_of_capital (float): The cost of capital used in the premium formula.
+        levels (list[float], optional): Other confidence levels of the VaR and TVaR.
+            Defaults to ().
+
+    Returns:
+        tuple: The statistics in the format of compute_statistics, with their standard errors,
+            and the convergence report: a dictionary with the number of simulations and shards
+            used, whether the run converged, the tolerance, the largest relative error and the
+            relative errors of every treaty and development year.
+
+    """
+    if not simulations.get("shard_size"):
+        raise ValueError("Adaptive runs require simulations.shard_size to be set.")
+    if simulations.get("variance_reduction", {}).get("method") == "importance":
+        raise ValueError("Importance sampling requires the weights of every simulation, "
+                         "it is not available in the adaptive mode.")
+
+    adaptive = simulations["adaptive"]
+    max_nb = adaptive["max_nb"]
+    min_shards = max(adaptive.get("min_shards", 8), 2)
+    running_statistics = RunningStatistics(max_nb, levels=levels, standard_errors=True)
+    seed_sequence = np.random.SeedSequence(simulations["seed"])
+    workers = simulations.get("workers", 1)
+    nb_simulations = nb_shards = 0
+    relative_errors = None
+    prepare_export(simulations)
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else nullcontext()
+    with profiler.stage("adaptive", workers=workers) as record:
+        with executor:
+            shard_map = executor.map if workers > 1 else map
+            while nb_simulations < max_nb:
+                first_sim_ids = list(range(nb_simulations, min(nb_simulations + workers *
+                                                               simulations["shard_size"], max_nb),
+                                           simulations["shard_size"]))
+                sizes = [min(simulations["shard_size"], max_nb - first_sim_id)
+                         for first_sim_id in first_sim_ids]
+                window = ([simulations] * len(sizes), [treaties] * len(sizes), first_sim_ids, sizes,
+                          [seed_sequence.spawn(1)[0] for _ in sizes])
+                for results in shard_map(simulate_shard, *window):
+                    running_statistics.update(results)
+                nb_simulations += sum(sizes)
+                nb_shards += len(sizes)
+
+                if nb_shards >= min_shards:
+                    relative_errors = running_statistics.relative_errors(cost_of_capital)
+                    if relative_errors.to_numpy().max() <= adaptive["tolerance"]:
+                        break
+        record["rows"] = nb_simulations
+
+    if relative_errors is None:
+        relative_errors = running_statistics.relative_errors(cost_of_capital)
+    report = {
+        "nb_simulations": nb_simulations,
+        "nb_shards": nb_shards,
+        "converged": bool(relative_errors.to_numpy().max() <= adaptive["tolerance"]),
+        "tolerance": adaptive["tolerance"],
+        "max_relative_error": float(relative_errors.to_numpy().max()),
+        "relative_errors": relative_errors,
+    }
+    with profiler.stage("statistics"):
+        statistics = pricing_statistics.statistics_table(
+            *running_statistics.frames(cost_of_capital),
+            **running_statistics.extra_frames(cost_of_capital))
+    return statistics, report
+
+
+def compute_statistics(results, cost_of_capital, levels=(), standard_errors=None):  # pylint: disable=redefined-outer-name
+    """
+    Compute the pricing statistics of every treaty and development year.
+
+    Args:
+        results (pd.DataFrame): The priced claims returned by run_simulations.
+        cost_of_capital (float): The cost of capital used in the premium formula.
+        levels (list[float], optional): Other confidence levels of the VaR and TVaR, the
+            premium using 0.99. Defaults to ().
+        standard_errors (dict, optional): The method and nb_batches of the standard errors of
+            the average loss, TVaR and premium. Defaults to None, no standard errors.
+
+    Returns:
+        pd.DataFrame: The statistics in long format, with the columns 'treatyName', 'statistic',
+            'claimDevelopmentYear' and 'value'.
+
+    """
+    with profiler.stage("statistics", rows=len(results)):
+        return pricing_statistics.compute_statistics(
+            treaty_names=results["treatyName"].to_numpy(),
+            sim_ids=results["simId"].to_numpy(),
+            claim_ids=results["claimId"].to_numpy(),
+            development_years=results["claimDevelopmentYear"].to_numpy(),
+            recoveries=results["treatyRecoveries"].to_numpy(),
+            cost_of_capital=cost_of_capital,
+            levels=levels,
+            standard_errors=standard_errors,
+            weights=results["weight"].to_numpy() if "weight" in results else None,
+        )
+
+
+def run(config):  # pylint: disable=redefined-outer-name
+    """
+    Price the treaties and treaty programs of a configuration in the mode it selects.
+
+    Args:
+        config (dict): The configuration, as returned by config.load_config.
+
+    Returns:
+        tuple: The statistics in the format of compute_statistics, and the convergence report
+            of run_adaptive for adaptive runs, None otherwise.
+    """
+    simulations = config["simulations"]
+    financials = config["financials"]
+    treaties = config["treaties"] + config.get("programs", [])
+    standard_errors = financials.get("standard_errors", {})
+    options = {"levels": financials.get("confidence_levels", []),
+               "standard_errors": standard_errors if standard_errors.get("method") else None}
+
+    if simulations.get("adaptive", {}).get("enabled"):
+        return run_adaptive(simulations, treaties, financials["cost_of_capital"],
+                            options["levels"])
+    if simulations.get("streaming"):
+        return run_streaming(simulations, treaties, financials["cost_of_capital"],
+                             **options), None
+    if simulations.get("treaty_workers", 1) > 1:
+        return run_parallel_treaties(simulations, treaties, financials["cost_of_capital"],
+                                     **options), None
+    results = run_simulations(simulations, treaties)
+    return compute_statistics(results, financials["cost_of_capital"], **options), None
+
+
+if __name__ == "__main__":
+    from cli import main  # pylint: disable=import-error
 
-    average_payment_pattern = (results[results["incurred"]]
-                               .groupby(["treatyName", "claimDevelopmentYear"])["payment_pattern"]
-                               .mean()
-                               .unstack()
-                               )
-
-    # Exports:
-    average_loss['statistic'] = 'average_loss'
-    VaR['statistic'] = 'VaR'
-    TVaR['statistic'] = 'TVaR'
-    premium['statistic'] = 'premium'
-    average_payment_pattern['statistic'] = 'average_payment_pattern'
-
-    statistics = pd.concat([average_loss, VaR, TVaR, premium, average_payment_pattern]).reset_index(
-    ).melt(id_vars=['treatyName', 'statistic'], var_name='claimDevelopmentYear', value_name='value')
-    statistics = statistics[['treatyName', 'statistic'] + [
-        col for col in statistics.columns if col not in ['treatyName', 'statistic']]]
-
-    print(statistics)
-    statistics.to_csv('statistics.csv', index=False)
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+This module provides a class for testing the simulation pipeline of main.
+"""
+import unittest
+import numpy as np
+from config import config # pylint: disable=import-error
+from main import (run_simulations, compute_statistics, simulate_claims,  # pylint: disable=import-error
+                  apply_treaty, apply_treaty_scalar, apply_treaty_development, run_adaptive,
+                  run_streaming, treaty_recoveries, run_parallel_treaties)
+from reinsurance import TreatyProgram, treaties_map  # pylint: disable=import-error
+from config_test import PROGRAM as RAW_PROGRAM  # pylint: disable=import-error
+
+PROGRAM = {'name': RAW_PROGRAM['name'], 'type': TreatyProgram,
+           'parameters': {'layers': RAW_PROGRAM['layers']}}
+
+
+class RunSimulationsTests(unittest.TestCase):
+    """Test cases for the run_simulations function."""
+
+    def simulations(self, **overrides):
+        """Return a small copy of the simulations section of the config."""
+        return {**config['simulations'], 'nb': 2_000, 'mode': 'batch', **overrides}
+
+    def test_sharded_results_do_not_depend_on_workers(self):
+        """Test that the sharded results are identical for any number of workers."""
+        single = run_simulations(self.simulations(shard_size=300, workers=1), config['treaties'])
+        parallel = run_simulations(self.simulations(shard_size=300, workers=3), config['treaties'])
+        self.assertTrue(single.equals(parallel))
+        self.assertEqual(single['simId'].nunique(), 2_000)
+
+    def test_sharded_statistics(self):
+        """Test that the statistics of a sharded run cover every treaty and year."""
+        results = run_simulations(self.simulations(shard_size=500, workers=2), config['treaties'])
+        statistics = compute_statistics(results, config['financials']['cost_of_capital'])
+        self.assertEqual(len(statistics), 5 * len(config['treaties']) * 3)
+
+    def test_shards_use_independent_streams(self):
+        """Test that the shards do not replay the same random numbers."""
+        results = run_simulations(self.simulations(shard_size=1_000), config['treaties'])
+        amounts = results[results['treatyName'] == 'qs 80%'].groupby('simId')[
+            'treatyRecoveries'].sum()
+        self.assertFalse(amounts.iloc[:1_000].reset_index(drop=True).equals(
+            amounts.iloc[1_000:].reset_index(drop=True)))
+
+
+class RunAdaptiveTests(unittest.TestCase):
+    """Test cases for the run_adaptive function."""
+
+    def simulations(self, tolerance, workers=1):
+        """Return a simulations section with an adaptive run of 500 simulations per shard."""
+        return {**config['simulations'], 'mode': 'batch', 'shard_size': 500, 'workers': workers,
+                'adaptive': {'enabled': True, 'tolerance': tolerance, 'min_shards': 4,
+                             'max_nb': 20_000}}
+
+    def test_stops_at_tolerance(self):
+        """Test that a converged run gives the streaming statistics of the simulations used."""
+        statistics, report = run_adaptive(self.simulations(0.2), config['treaties'], 0.08)
+        self.assertTrue(report['converged'])
+        self.assertLess(report['nb_simulations'], 20_000)
+        self.assertLessEqual(report['max_relative_error'], 0.2)
+        self.assertEqual(report['nb_simulations'], 500 * report['nb_shards'])
+
+        expected = run_streaming({**self.simulations(0.2), 'nb': report['nb_simulations']},
+                                 config['treaties'], 0.08,
+                                 standard_errors={'method': 'batch_means'})
+        self.assertTrue(np.allclose(statistics['value'], expected['value'], rtol=1e-12,
+                                    equal_nan=True))
+
+    def test_stops_at_budget(self):
+        """Test that an unreachable tolerance stops at the budget, for any number of workers."""
+        single = run_adaptive(self.simulations(1e-6), config['treaties'], 0.08)
+        parallel = run_adaptive(self.simulations(1e-6, workers=3), config['treaties'], 0.08)
+        for _, report in (single, parallel):
+            self.assertFalse(report['converged'])
+            self.assertEqual(report['nb_simulations'], 20_000)
+        self.assertTrue(single[0].equals(parallel[0]))
+
+
+class RunParallelTreatiesTests(unittest.TestCase):
+    """Test cases for the run_parallel_treaties function."""
+
+    def test_matches_compute_statistics(self):
+        """Test that the treaty workers give the statistics of the priced claims."""
+        treaties = config['treaties'] + [PROGRAM]
+        options = {'levels': [0.9], 'standard_errors': {'method': 'batch_means', 'nb_batches': 8}}
+        for method in ('', 'importance'):
+            simulations = {**config['simulations'], 'nb': 2_000, 'mode': 'batch',
+                           'treaty_workers': 2,
+                           'variance_reduction': {**config['simulations']['variance_reduction'],
+                                                  'method': method}}
+            with self.subTest(method=method):
+                statistics = run_parallel_treaties(simulations, treaties, 0.08, **options)
+                expected = compute_statistics(run_simulations(simulations, treaties), 0.08,
+                                              **options)
+                self.assertTrue(statistics.equals(expected))
+
+    def test_shards_rejected(self):
+        """Test that sharded simulations are rejected."""
+        with self.assertRaises(ValueError):
+            run_parallel_treaties({**config['simulations'], 'shard_size': 500},
+                                  config['treaties'], 0.08)
+
+
+class ApplyTreatyDevelopmentTests(unittest.TestCase):
+    """Test cases for the apply_treaty_development function."""
+
+    def test_matches_apply_treaty_per_year(self):
+        """Test that one sweep over the development years matches one pass per year."""
+        claims = simulate_claims({**config['simulations'], 'nb': 2_000, 'mode': 'batch'})
+        for treaty in config['treaties']:
+            recoveries = apply_treaty_development(claims, treaty)
+            for development_year, claims_year in enumerate(claims):
+                self.assertTrue(np.array_equal(
+                    recoveries[development_year],
+                    apply_treaty(claims_year, treaty)['treatyRecoveries']))
+
+    def test_claim_table_years_are_not_modified(self):
+        """Test that both apply_treaty functions accept a read-only year of a claim table."""
+        claims = simulate_claims({**config['simulations'], 'nb': 200, 'mode': 'batch'})
+        for treaty in config['treaties']:
+            batch = apply_treaty(claims[0], treaty)
+            scalar = apply_treaty_scalar(claims[0], treaty)
+            self.assertNotIn('treatyRecoveries', claims[0])
+            self.assertTrue(np.allclose(batch['treatyRecoveries'], scalar['treatyRecoveries']))
+
+
+class TreatyRecoveriesTests(unittest.TestCase):
+    """Test cases for the treaty_recoveries function."""
+
+    def test_program_layers(self):
+        """Test that the layers of a program are reported as separate treaties."""
+        claims = simulate_claims({**config['simulations'], 'nb': 2_000, 'mode': 'batch'})
+        recoveries = treaty_recoveries(claims, PROGRAM)
+        layers = PROGRAM['parameters']['layers']
+        self.assertEqual(list(recoveries),
+                         [f'{PROGRAM["name"]}/{layer["name"]}' for layer in layers])
+        for layer in layers:
+            if not layer.get('net_of'):
+                self.assertTrue(np.array_equal(
+                    recoveries[f'{PROGRAM["name"]}/{layer["name"]}'],
+                    apply_treaty_development(
+                        claims, {**layer, 'type': treaties_map[layer['type']]})))
+        treaty = config['treaties'][0]
+        self.assertEqual(list(treaty_recoveries(claims, treaty)), [treaty['name']])
+
+
+if __name__ == '__main__':
+    unittest.main()
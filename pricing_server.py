@@ -0,0 +1,250 @@
+"""
+This module provides a local pricing server keeping a simulated claim set in memory.
+
+The claims are loaded or simulated once when the server starts, then every request prices a
+list of treaties, given in the shape of the treaties section of config.yaml, against them. The
+statistics of every treaty are kept in a least recently used cache keyed by the normalized
+treaty parameters, so a treaty priced before, even under another name, is answered without
+being applied to the claims again.
+
+The protocol is one JSON object per line over TCP:
+    request:  {"treaties": [{"name": "10m xs 5m", "type": "xs", "parameters": {...}}, ...]}
+    response: {"statistics": [{"treatyName": ..., "statistic": ..., ...}, ...],
+               "cached": [false, ...]}
+or {"error": "..."} when the request is invalid.
+
+Usage:
+    python pricing_server.py --port 8765
+    python pricing_server.py --config pricing.yaml
+
+"""
+import argparse
+import asyncio
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import asdict
+import pandas as pd
+from reinsurance import treaties_map  # pylint: disable=import-error
+from pricing_statistics import claim_table_statistics  # pylint: disable=import-error
+
+# Order of the statistics in the tables of pricing_statistics.statistics_table.
+STATISTICS = ('average_loss', 'VaR', 'TVaR', 'premium', 'average_payment_pattern')
+
+
+def normalize_treaty(treaty):
+    """
+    Build the cache key of a treaty.
+
+    Args:
+        treaty (dict): A treaty with a 'type', given as a class or as its name in config.yaml,
+            and 'parameters'.
+
+    Returns:
+        tuple: The treaty class and its sorted parameters as floats, omitted aggregate
+            deductibles and limits being 0.
+
+    Raises:
+        ValueError: If the treaty type or its parameters are invalid.
+    """
+    treaty_type = treaty.get('type')
+    if isinstance(treaty_type, str):
+        if treaty_type not in treaties_map:
+            raise ValueError(f'Unknown treaty type {treaty_type!r}.')
+        treaty_type = treaties_map[treaty_type]
+    if treaty_type not in treaties_map.values():
+        raise ValueError(f'Unknown treaty type {treaty_type!r}.')
+    try:
+        parameters = asdict(treaty_type(**treaty.get('parameters', {})))
+        return treaty_type, tuple(sorted((name, float(value or 0))
+                                         for name, value in parameters.items()))
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f'Invalid parameters for treaty {treaty.get("name")!r}: {exc}') from exc
+
+
+class PricingService:
+    """Class pricing treaties against a claim set, with a cache of the treaty statistics."""
+
+    def __init__(self, claims, cost_of_capital, cache_size=128):
+        """Initialize the service.
+
+        Args:
+            claims (ClaimTable): The claims the treaties are priced against.
+            cost_of_capital (float): The cost of capital used in the premium formula.
+            cache_size (int, optional): The number of treaties whose statistics are cached.
+                Defaults to 128.
+        """
+        self.claims = claims
+        self.cost_of_capital = cost_of_capital
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _treaty_statistics(self, key):
+        """Compute the statistics of a normalized treaty, under the name 'treaty'."""
+        treaty_type, parameters = key
+        recoveries = treaty_type(**dict(parameters)).apply_batch(self.claims.claim_amounts(),
+                                                                  self.claims.sim_ids)
+        return claim_table_statistics(self.claims, {'treaty': recoveries}, self.cost_of_capital)
+
+    def price(self, treaties):
+        """
+        Price treaties, reusing the cached statistics.
+
+        Args:
+            treaties (list[dict]): The treaties, with a 'name', a 'type' and 'parameters'.
+
+        Returns:
+            tuple: The statistics in the format of main.compute_statistics, and whether the
+                statistics of every treaty were cached.
+
+        Raises:
+            ValueError: If the treaties are not a list of objects, a treaty is invalid or two
+                treaties have the same name.
+        """
+        if not isinstance(treaties, list) or not all(isinstance(treaty, dict)
+                                                     for treaty in treaties):
+            raise ValueError('The treaties must be a list of objects.')
+        names = [treaty.get('name') for treaty in treaties]
+        if not treaties or len(set(names)) < len(names):
+            raise ValueError('The treaties must be a non empty list with distinct names.')
+        keys = [normalize_treaty(treaty) for treaty in treaties]
+
+        tables, cached = [], []
+        for name, key in zip(names, keys):
+            with self._lock:
+                table = self.cache.get(key)
+                if table is not None:
+                    self.cache.move_to_end(key)
+            cached += [table is not None]
+            if table is None:
+                table = self._treaty_statistics(key)
+                with self._lock:
+                    self.cache[key] = table
+                    while len(self.cache) > self.cache_size:
+                        self.cache.popitem(last=False)
+            tables += [table.assign(treatyName=name)]
+
+        # Rows in the order of main.compute_statistics.
+        statistics = pd.concat(tables)
+        statistics['order'] = statistics['statistic'].map(STATISTICS.index)
+        statistics = statistics.sort_values(['claimDevelopmentYear', 'order', 'treatyName'],
+                                            kind='stable').drop(columns='order')
+        return statistics.reset_index(drop=True), cached
+
+    async def handle(self, reader, writer):
+        """Answer the requests of a connection, one JSON object per line."""
+        loop = asyncio.get_running_loop()
+        try:
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                    statistics, cached = await loop.run_in_executor(
+                        None, self.price, message['treaties'])
+                    response = {'statistics': statistics.to_dict(orient='records'),
+                                'cached': cached}
+                except (ValueError, KeyError, TypeError) as exc:
+                    response = {'error': str(exc)}
+                writer.write(json.dumps(response).encode('UTF-8') + b'\n')
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        """
+        Start the server.
+
+        Args:
+            host (str, optional): The address listened to. Defaults to '127.0.0.1'.
+            port (int, optional): The port listened to, 0 for any free port. Defaults to 8765.
+
+        Returns:
+            asyncio.Server: The started server.
+        """
+        return await asyncio.start_server(self.handle, host, port, limit=2 ** 24)
+
+
+async def request(message, host='127.0.0.1', port=8765):
+    """
+    Send a request to a pricing server.
+
+    Args:
+        message (dict): The request, e.g. {'treaties': [...]}.
+        host (str, optional): The address of the server. Defaults to '127.0.0.1'.
+        port (int, optional): The port of the server. Defaults to 8765.
+
+    Returns:
+        dict: The response of the server.
+    """
+    reader, writer = await asyncio.open_connection(host, port, limit=2 ** 24)
+    try:
+        writer.write(json.dumps(message).encode('UTF-8') + b'\n')
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def quote(treaties, host='127.0.0.1', port=8765) -> pd.DataFrame:
+    """
+    Price treaties with a pricing server.
+
+    Args:
+        treaties (list[dict]): The treaties, in the shape of the treaties section of config.yaml.
+        host (str, optional): The address of the server. Defaults to '127.0.0.1'.
+        port (int, optional): The port of the server. Defaults to 8765.
+
+    Returns:
+        pd.DataFrame: The statistics in the format of main.compute_statistics.
+
+    Raises:
+        ValueError: If the server rejected the request.
+    """
+    response = await request({'treaties': treaties}, host, port)
+    if 'error' in response:
+        raise ValueError(response['error'])
+    return pd.DataFrame.from_records(response['statistics'])
+
+
+def main(argv=None):
+    """
+    Serve the treaty prices of the claims of a configuration file until interrupted.
+
+    Args:
+        argv (list[str], optional): The arguments. Defaults to None, the arguments of the
+            process.
+    """
+    from config import DEFAULT_PATH, load_config  # pylint: disable=import-error,import-outside-toplevel
+    from main import simulate_claims  # pylint: disable=import-error,import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description='Serve treaty prices for a simulated book.')
+    parser.add_argument('--config', default=DEFAULT_PATH,
+                        help=f'configuration file of the claims (default: {DEFAULT_PATH})')
+    parser.add_argument('--host', help='defaults to the server section or 127.0.0.1')
+    parser.add_argument('--port', type=int, help='defaults to the server section or 8765')
+    parser.add_argument('--cache-size', type=int,
+                        help='defaults to the server section or 128')
+    arguments = parser.parse_args(argv)
+    config = load_config(arguments.config)
+    settings = config.get('server', {})
+    host = arguments.host or settings.get('host', '127.0.0.1')
+    port = arguments.port if arguments.port is not None else settings.get('port', 8765)
+    cache_size = (arguments.cache_size if arguments.cache_size is not None
+                  else settings.get('cache_size', 128))
+
+    service = PricingService(simulate_claims(config['simulations']),
+                             config['financials']['cost_of_capital'], cache_size)
+
+    async def serve():
+        """Serve until interrupted."""
+        server = await service.serve(host, port)
+        print(f'Pricing server listening on {host}:{port}')
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(serve())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+This module provides classes for testing the local pricing server.
+"""
+import asyncio
+import unittest
+import pandas as pd
+from config import config # pylint: disable=import-error
+from main import simulate_claims, price_claims, compute_statistics # pylint: disable=import-error
+from pricing_server import PricingService, normalize_treaty, request, quote # pylint: disable=import-error
+
+TREATIES = [
+    {'name': 'qs 80%', 'type': 'qs', 'parameters': {'share': 0.8}},
+    {'name': '10m xs 5m, AAD 2m', 'type': 'xs',
+     'parameters': {'deductible': 5e6, 'limit': 10e6, 'aad': 2e6, 'aal': 0}},
+]
+
+
+class NormalizeTreatyTests(unittest.TestCase):
+    """Test cases for the normalize_treaty function."""
+
+    def test_equivalent_parameters(self):
+        """Test that omitted, null and zero aggregates give the same key."""
+        parameters = {'deductible': 5_000_000, 'limit': 10_000_000}
+        key = normalize_treaty({'type': 'xs', 'parameters': parameters})
+        self.assertEqual(key, normalize_treaty(
+            {'type': config['treaties'][1]['type'],
+             'parameters': {**parameters, 'aad': None, 'aal': 0.0}}))
+
+    def test_invalid_treaties(self):
+        """Test that unknown types and parameters are rejected."""
+        with self.assertRaises(ValueError):
+            normalize_treaty({'type': 'stop loss', 'parameters': {}})
+        with self.assertRaises(ValueError):
+            normalize_treaty({'type': 'qs', 'parameters': {'limit': 1}})
+
+
+class PricingServerTests(unittest.TestCase):
+    """Test cases for the PricingService class and its local client."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.claims = simulate_claims({**config['simulations'], 'nb': 2_000, 'mode': 'batch',
+                                      'cache': {}})
+        cls.cost_of_capital = config['financials']['cost_of_capital']
+
+    def exchange(self, service, messages):
+        """Send requests to a server started on a free local port."""
+        async def run():
+            server = await service.serve('127.0.0.1', 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return [await request(message, port=port) for message in messages] + [
+                    await quote(TREATIES, port=port)]
+        return asyncio.run(run())
+
+    def test_statistics_and_cache(self):
+        """Test that the server answers the statistics of main.py and caches them."""
+        service = PricingService(self.claims, self.cost_of_capital)
+        first, second, renamed, statistics = self.exchange(service, [
+            {'treaties': TREATIES}, {'treaties': TREATIES},
+            {'treaties': [{**TREATIES[1], 'name': 'renamed'}]}])
+
+        self.assertEqual(first['cached'], [False, False])
+        self.assertEqual(second['cached'], [True, True])
+        self.assertEqual(renamed['cached'], [True])
+        treaties = [{**treaty, 'type': normalize_treaty(treaty)[0]} for treaty in TREATIES]
+        expected = compute_statistics(price_claims(self.claims, treaties), self.cost_of_capital)
+        pd.testing.assert_frame_equal(statistics, expected, check_dtype=False)
+
+    def test_errors(self):
+        """Test that invalid requests get an error without closing the server."""
+        service = PricingService(self.claims, self.cost_of_capital)
+        unknown, duplicated, number, string, *_ = self.exchange(service, [
+            {'treaties': [{'name': 'sl', 'type': 'sl', 'parameters': {}}]},
+            {'treaties': [TREATIES[0], TREATIES[0]]}, {'treaties': [1]}, {'treaties': 'xs'}])
+        self.assertIn('sl', unknown['error'])
+        self.assertIn('distinct', duplicated['error'])
+        self.assertIn('list of objects', number['error'])
+        self.assertIn('list of objects', string['error'])
+
+    def test_least_recently_used_eviction(self):
+        """Test that the cache keeps the most recently used treaties."""
+        service = PricingService(self.claims, self.cost_of_capital, cache_size=1)
+        service.price(TREATIES[:1])
+        service.price(TREATIES[1:])
+        self.assertEqual(service.price(TREATIES[:1])[1], [False])
+        self.assertEqual(list(service.cache), [normalize_treaty(TREATIES[0])])
+
+
+if __name__ == '__main__':
+    unittest.main()
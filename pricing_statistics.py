@@ -0,0 +1,312 @@
+"""
+This module computes the pricing statistics of the treaty recoveries.
+
+The available functions are:
+- annual_recoveries(treaty_codes, sim_codes, development_years, recoveries, ...): Sum the
+  recoveries per treaty, development year and simulation.
+- payment_patterns(treaty_codes, claim_codes, recoveries, ...): Compute the share of every
+  recovery in the total recoveries of its claim.
+- compute_statistics(treaty_names, sim_ids, claim_ids, development_years, recoveries,
+  cost_of_capital, level=0.99, ...): Compute every statistic in one pass.
+- claim_table_aggregates(claims, recoveries): Aggregate the recoveries of a treaty per
+  development year and simulation.
+- aggregated_statistics(treaty_aggregates, cost_of_capital, ...): Compute every statistic from
+  the aggregates of every treaty, e.g. priced in other processes.
+- claim_table_statistics(claims, treaty_recoveries, cost_of_capital, ...): Compute every
+  statistic from a claim table and the recoveries of every treaty.
+- claim_table_weights(claims): Get the weight of every simulation of a claim table.
+- statistics_table(average_loss, VaR, TVaR, premium, average_payment_pattern, **extra): Gather
+  the statistics in the long format exported to statistics.csv.
+
+The treaties, simulations and claims are encoded as integers so that every aggregation is a
+numpy bincount over the integer keys, and the VaR and TVaR at every confidence level are found
+by the partial sorting of risk_measures rather than full quantile passes.
+
+"""
+import numpy as np
+import pandas as pd
+import risk_measures  # pylint: disable=import-error
+
+
+def annual_recoveries(treaty_codes, sim_codes, development_years, recoveries,  # pylint: disable=too-many-arguments
+                      nb_treaties, nb_simulations, nb_years) -> np.ndarray:
+    """
+    Sum the recoveries per treaty, development year and simulation.
+
+    Args:
+        treaty_codes (np.ndarray): The treaty code of every recovery.
+        sim_codes (np.ndarray): The simulation code of every recovery.
+        development_years (np.ndarray): The development year of every recovery.
+        recoveries (np.ndarray): The recoveries.
+        nb_treaties (int): The number of treaties.
+        nb_simulations (int): The number of simulations.
+        nb_years (int): The number of development years.
+
+    Returns:
+        np.ndarray: The annual recoveries, with one row per treaty and development year (treaty
+            major) and one column per simulation.
+    """
+    keys = (treaty_codes * nb_years + development_years) * nb_simulations + sim_codes
+    return np.bincount(keys, weights=recoveries,
+                       minlength=nb_treaties * nb_years * nb_simulations).reshape(
+                           nb_treaties * nb_years, nb_simulations)
+
+
+def payment_patterns(treaty_codes, claim_codes, recoveries, nb_treaties, nb_claims):
+    """
+    Compute the share of every recovery in the total recoveries of its claim.
+
+    Args:
+        treaty_codes (np.ndarray): The treaty code of every recovery.
+        claim_codes (np.ndarray): The claim code of every recovery, unique across simulations.
+        recoveries (np.ndarray): The recoveries.
+        nb_treaties (int): The number of treaties.
+        nb_claims (int): The number of claims.
+
+    Returns:
+        tuple[np.ndarray]: The payment pattern of every recovery and whether its claim is
+            incurred, i.e. has non zero total recoveries.
+    """
+    keys = treaty_codes * nb_claims + claim_codes
+    totals = np.bincount(keys, weights=recoveries, minlength=nb_treaties * nb_claims)[keys]
+    incurred = totals != 0
+    patterns = np.full(len(recoveries), np.nan)
+    np.divide(recoveries, totals, out=patterns, where=incurred)
+    return patterns, incurred
+
+
+def compute_statistics(treaty_names, sim_ids, claim_ids, development_years, recoveries,  # pylint: disable=too-many-arguments,too-many-locals
+                       cost_of_capital, level=0.99, levels=(), standard_errors=None,
+                       weights=None):
+    """
+    Compute every pricing statistic of every treaty and development year in one pass.
+
+    Args:
+        treaty_names (np.ndarray): The treaty name of every recovery.
+        sim_ids (np.ndarray): The simulation id of every recovery.
+        claim_ids (np.ndarray): The claim id of every recovery, within its simulation.
+        development_years (np.ndarray): The development year of every recovery.
+        recoveries (np.ndarray): The recoveries.
+        cost_of_capital (float): The cost of capital used in the premium formula.
+        level (float, optional): The confidence level of the VaR and TVaR used in the premium
+            formula. Defaults to 0.99.
+        levels (list[float], optional): Other confidence levels, reported as the 'VaR_<level>'
+            and 'TVaR_<level>' statistics. Defaults to ().
+        standard_errors (dict, optional): The arguments of risk_measures.standard_errors, e.g.
+            {'method': 'batch_means', 'nb_batches': 32}, reported as the 'average_loss_se',
+            'TVaR_se' and 'premium_se' statistics. Defaults to None, no standard errors.
+        weights (np.ndarray, optional): The weight of the simulation of every recovery, e.g.
+            drawn by importance sampling. The averages are then weighted averages and the VaR
+            and TVaR those of risk_measures.weighted_value_and_tail_value_at_risk. Defaults to
+            None, equally likely simulations.
+
+    Returns:
+        pd.DataFrame: The statistics in long format, with the columns 'treatyName', 'statistic',
+            'claimDevelopmentYear' and 'value'.
+    """
+    # Hash based factorization, the treaty codes follow the sorted names like pandas' groupby.
+    treaty_codes, names = pd.factorize(np.asarray(treaty_names), sort=True)
+    sim_codes, sims = pd.factorize(np.asarray(sim_ids))
+    claim_codes, claims = pd.factorize(
+        sim_codes * (int(np.max(claim_ids)) + 1) + np.asarray(claim_ids))
+    development_years = np.asarray(development_years)
+    nb_years = int(development_years.max()) + 1
+    recoveries = np.asarray(recoveries, dtype=float)
+
+    annual = annual_recoveries(treaty_codes, sim_codes, development_years, recoveries,
+                               len(names), len(sims), nb_years)
+    sim_weights = None
+    if weights is not None:
+        sim_weights = np.empty(len(sims))
+        sim_weights[sim_codes] = weights
+
+    patterns, incurred = payment_patterns(treaty_codes, claim_codes, recoveries,
+                                          len(names), len(claims))
+    keys = (treaty_codes * nb_years + development_years)[incurred]
+    pattern_weights = np.ones(np.count_nonzero(incurred)) if weights is None else np.asarray(
+        weights, dtype=float)[incurred]
+    pattern_sums = np.bincount(keys, weights=patterns[incurred] * pattern_weights,
+                               minlength=len(names) * nb_years)
+    pattern_weights = np.bincount(keys, weights=pattern_weights, minlength=len(names) * nb_years)
+
+    return _statistics(names, annual, pattern_sums, pattern_weights, cost_of_capital, level,
+                       levels, standard_errors, sim_weights)
+
+
+def claim_table_aggregates(claims, recoveries) -> tuple:
+    """
+    Aggregate the recoveries of a treaty per development year and simulation.
+
+    The aggregates hold everything the statistics need, so a treaty priced in another process
+    only sends back arrays of the size of the number of simulations.
+
+    Args:
+        claims (ClaimTable): The claims the treaty was applied to.
+        recoveries (np.ndarray): The recoveries, with one row per development year.
+
+    Returns:
+        tuple[np.ndarray]: The annual recoveries, with one row per development year and one
+            column per simulation, and for every development year the weighted sum of the
+            payment patterns of the incurred claims and the sum of their weights.
+    """
+    first_claims = _first_claims(claims.sim_ids)
+    sim_codes = np.cumsum(first_claims) - 1
+    nb_simulations = np.count_nonzero(first_claims)
+    nb_years, nb_claims = np.shape(recoveries)
+    recoveries = np.ravel(recoveries)
+    development_years = np.repeat(np.arange(nb_years), nb_claims)
+    no_treaty = np.zeros(len(recoveries), dtype=np.int64)
+
+    annual = annual_recoveries(no_treaty, np.tile(sim_codes, nb_years), development_years,
+                               recoveries, 1, nb_simulations, nb_years)
+    patterns, incurred = payment_patterns(no_treaty, np.tile(np.arange(nb_claims), nb_years),
+                                          recoveries, 1, nb_claims)
+    pattern_weights = np.ones(np.count_nonzero(incurred)) if claims.weights is None else (
+        np.tile(claims.weights[claims.sim_ids], nb_years)[incurred])
+    keys = development_years[incurred]
+    return (annual,
+            np.bincount(keys, weights=patterns[incurred] * pattern_weights, minlength=nb_years),
+            np.bincount(keys, weights=pattern_weights, minlength=nb_years))
+
+
+def aggregated_statistics(treaty_aggregates, cost_of_capital, level=0.99, levels=(),  # pylint: disable=too-many-arguments
+                          standard_errors=None, sim_weights=None):
+    """
+    Compute every pricing statistic from the aggregates of every treaty.
+
+    Args:
+        treaty_aggregates (dict[str, tuple]): The aggregates of every treaty, as returned by
+            claim_table_aggregates.
+        cost_of_capital (float): The cost of capital used in the premium formula.
+        level (float, optional): The confidence level of the VaR and TVaR used in the premium
+            formula. Defaults to 0.99.
+        levels (list[float], optional): Other confidence levels. Defaults to ().
+        standard_errors (dict, optional): The arguments of risk_measures.standard_errors.
+            Defaults to None, no standard errors.
+        sim_weights (np.ndarray, optional): The weight of every simulation. Defaults to None,
+            equally likely simulations.
+
+    Returns:
+        pd.DataFrame: The statistics in the format of compute_statistics.
+    """
+    names = sorted(treaty_aggregates)
+    return _statistics(np.array(names, dtype=object),
+                       np.concatenate([treaty_aggregates[name][0] for name in names]),
+                       np.concatenate([treaty_aggregates[name][1] for name in names]),
+                       np.concatenate([treaty_aggregates[name][2] for name in names]),
+                       cost_of_capital, level, levels, standard_errors, sim_weights)
+
+
+def _statistics(names, annual, pattern_sums, pattern_weights, cost_of_capital, level, levels,  # pylint: disable=too-many-arguments,too-many-locals
+                standard_errors, sim_weights):
+    """Compute the statistics from the annual recoveries and payment pattern sums, with one
+    row per treaty and development year (treaty major)."""
+    nb_years = len(annual) // len(names)
+    levels = [level] + [other_level for other_level in levels if other_level != level]
+    if sim_weights is None:
+        average_loss = annual.mean(axis=1)
+        values_at_risk, tail_values_at_risk = risk_measures.value_and_tail_value_at_risk(
+            annual, levels)
+    else:
+        average_loss = annual @ sim_weights / sim_weights.sum()
+        values_at_risk, tail_values_at_risk = risk_measures.weighted_value_and_tail_value_at_risk(
+            annual, sim_weights, levels)
+    value_at_risk, tail_value_at_risk = values_at_risk[0], tail_values_at_risk[0]
+    premium = average_loss + (tail_value_at_risk - average_loss) * cost_of_capital
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average_payment_pattern = pattern_sums / pattern_weights
+
+    def frame(values):
+        return pd.DataFrame(values.reshape(len(names), nb_years),
+                            index=pd.Index(names, name='treatyName'),
+                            columns=pd.Index(range(nb_years), name='claimDevelopmentYear'))
+
+    extra = {}
+    for other_level, other_value_at_risk, other_tail_value_at_risk in zip(
+            levels[1:], values_at_risk[1:], tail_values_at_risk[1:]):
+        extra[f'VaR_{other_level:g}'] = frame(other_value_at_risk)
+        extra[f'TVaR_{other_level:g}'] = frame(other_tail_value_at_risk)
+    if standard_errors:
+        errors = risk_measures.standard_errors(annual, cost_of_capital, level, **standard_errors,
+                                               weights=sim_weights)
+        for name, error in errors.items():
+            extra[f'{name}_se'] = frame(error)
+
+    return statistics_table(frame(average_loss), frame(value_at_risk), frame(tail_value_at_risk),
+                            frame(premium), frame(average_payment_pattern), **extra)
+
+
+def claim_table_statistics(claims, treaty_recoveries, cost_of_capital, **options):
+    """
+    Compute every pricing statistic from a claim table, without a table of priced claims.
+
+    Args:
+        claims (ClaimTable): The claims the treaties were applied to.
+        treaty_recoveries (dict[str, np.ndarray]): The recoveries of every treaty, with one
+            row per development year, as returned by main.apply_treaty_development.
+        cost_of_capital (float): The cost of capital used in the premium formula.
+        **options: The level, levels and standard_errors arguments of compute_statistics.
+
+    Returns:
+        pd.DataFrame: The statistics in the format of compute_statistics.
+    """
+    return aggregated_statistics(
+        {name: claim_table_aggregates(claims, recoveries)
+         for name, recoveries in treaty_recoveries.items()},
+        cost_of_capital, sim_weights=claim_table_weights(claims), **options)
+
+
+def claim_table_weights(claims):
+    """
+    Get the weight of every simulation of a claim table with claims.
+
+    Args:
+        claims (ClaimTable): The claims.
+
+    Returns:
+        np.ndarray | None: The weights of the simulations in the order of their first claim,
+            or None if the simulations are equally likely.
+    """
+    if claims.weights is None:
+        return None
+    return np.asarray(claims.weights)[claims.sim_ids[_first_claims(claims.sim_ids)]]
+
+
+def _first_claims(sim_ids):
+    """Flag the first claim of every simulation, claims of a simulation being contiguous."""
+    first_claims = np.ones(len(sim_ids), dtype=bool)
+    first_claims[1:] = sim_ids[1:] != sim_ids[:-1]
+    return first_claims
+
+
+def statistics_table(average_loss, VaR, TVaR, premium, average_payment_pattern, **extra):  # pylint: disable=invalid-name
+    """
+    Gather the statistics in the long format exported to statistics.csv.
+
+    Args:
+        average_loss (pd.DataFrame): The average loss per treaty and development year.
+        VaR (pd.DataFrame): The VaR per treaty and development year.
+        TVaR (pd.DataFrame): The TVaR per treaty and development year.
+        premium (pd.DataFrame): The premium per treaty and development year.
+        average_payment_pattern (pd.DataFrame): The average payment pattern per treaty and
+            development year.
+        **extra (pd.DataFrame): Other statistics per treaty and development year, by name.
+
+    Returns:
+        pd.DataFrame: The statistics in long format, with the columns 'treatyName', 'statistic',
+            'claimDevelopmentYear' and 'value'.
+    """
+    average_loss['statistic'] = 'average_loss'
+    VaR['statistic'] = 'VaR'
+    TVaR['statistic'] = 'TVaR'
+    premium['statistic'] = 'premium'
+    average_payment_pattern['statistic'] = 'average_payment_pattern'
+    for name, frame in extra.items():
+        frame['statistic'] = name
+
+    statistics = pd.concat([average_loss, VaR, TVaR, premium, average_payment_pattern,
+                            *extra.values()]).reset_index(
+    ).melt(id_vars=['treatyName', 'statistic'], var_name='claimDevelopmentYear', value_name='value')
+    return statistics[['treatyName', 'statistic'] + [
+        col for col in statistics.columns if col not in ['treatyName', 'statistic']]]
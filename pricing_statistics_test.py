@@ -0,0 +1,92 @@
+"""
+This module provides a class for testing the pricing statistics.
+"""
+import unittest
+import numpy as np
+import pandas as pd
+from config import config # pylint: disable=import-error
+from main import (run_simulations, compute_statistics, simulate_claims,  # pylint: disable=import-error
+                  apply_treaty_development, price_claims)
+from pricing_statistics import claim_table_statistics # pylint: disable=import-error
+
+
+def pandas_statistics(results, cost_of_capital):
+    """Compute the statistics with the groupby passes of the original main.py."""
+    recoveries_per_year = results.groupby(
+        ["treatyName", "simId", "claimDevelopmentYear"])["treatyRecoveries"].sum().reset_index()
+    grouped = recoveries_per_year.groupby(["treatyName", "claimDevelopmentYear"])[
+        "treatyRecoveries"]
+    average_loss = grouped.mean().unstack()
+    value_at_risk = grouped.quantile(0.99).unstack()
+    tail_value_at_risk = recoveries_per_year[
+        recoveries_per_year["treatyRecoveries"] >= grouped.transform(lambda x: x.quantile(0.99))
+    ].groupby(["treatyName", "claimDevelopmentYear"])["treatyRecoveries"].mean().unstack()
+    premium = average_loss + (tail_value_at_risk - average_loss) * cost_of_capital
+
+    totals = results.groupby(["treatyName", "simId", "claimId"])["treatyRecoveries"].transform(
+        "sum")
+    incurred = results[totals.astype(bool)]
+    average_payment_pattern = (incurred["treatyRecoveries"] / totals[totals.astype(bool)]).groupby(
+        [incurred["treatyName"], incurred["claimDevelopmentYear"]]).mean().unstack()
+    return {'average_loss': average_loss, 'VaR': value_at_risk, 'TVaR': tail_value_at_risk,
+            'premium': premium, 'average_payment_pattern': average_payment_pattern}
+
+
+class ComputeStatisticsTests(unittest.TestCase):
+    """Test cases for the compute_statistics function."""
+
+    def test_matches_pandas_groupby(self):
+        """Test that the single pass statistics match the pandas groupby passes."""
+        simulations = {**config['simulations'], 'nb': 5_000, 'mode': 'batch'}
+        results = run_simulations(simulations, config['treaties'])
+        cost_of_capital = config['financials']['cost_of_capital']
+        expected = pandas_statistics(results, cost_of_capital)
+        statistics = compute_statistics(results, cost_of_capital)
+
+        self.assertEqual(len(statistics), 5 * len(config['treaties']) * 3)
+        for row in statistics.itertuples():
+            self.assertTrue(np.isclose(
+                row.value, expected[row.statistic].loc[row.treatyName, row.claimDevelopmentYear],
+                rtol=1e-12), row)
+
+    def test_zero_claim_simulations_count(self):
+        """Test that simulations without recoveries lower the average loss."""
+        results = pd.DataFrame({'treatyName': ['xs'] * 4, 'simId': [0, 1, 1, 2],
+                                'claimId': [0, 0, 1, 0], 'claimDevelopmentYear': [0] * 4,
+                                'treatyRecoveries': [0.0, 3.0, 1.0, 2.0]})
+        statistics = compute_statistics(results, 0.1).set_index('statistic')['value']
+        self.assertAlmostEqual(statistics['average_loss'], 2.0)
+        self.assertAlmostEqual(statistics['TVaR'], 4.0)
+        self.assertAlmostEqual(statistics['average_payment_pattern'], 1.0)
+
+    def test_levels_and_standard_errors(self):
+        """Test the statistics at other confidence levels and the standard errors."""
+        simulations = {**config['simulations'], 'nb': 5_000, 'mode': 'batch'}
+        results = run_simulations(simulations, config['treaties'])
+        expected = pandas_statistics(results, 0.08)
+        statistics = compute_statistics(results, 0.08, levels=[0.9, 0.99, 0.995],
+                                        standard_errors={'method': 'bootstrap', 'nb_batches': 20})
+        self.assertEqual(sorted(statistics['statistic'].unique()), sorted(
+            list(expected) + ['VaR_0.9', 'TVaR_0.9', 'VaR_0.995', 'TVaR_0.995',
+                              'average_loss_se', 'TVaR_se', 'premium_se']))
+        recoveries_per_year = results.groupby(
+            ["treatyName", "simId", "claimDevelopmentYear"])["treatyRecoveries"].sum()
+        value_at_risk = recoveries_per_year.groupby(
+            ["treatyName", "claimDevelopmentYear"]).quantile(0.995)
+        for row in statistics[statistics['statistic'] == 'VaR_0.995'].itertuples():
+            self.assertTrue(np.isclose(
+                row.value, value_at_risk[row.treatyName, row.claimDevelopmentYear], rtol=1e-12))
+
+    def test_claim_table_statistics(self):
+        """Test that the statistics read from the claim table match those of the priced claims."""
+        claims = simulate_claims({**config['simulations'], 'nb': 2_000, 'mode': 'batch'})
+        cost_of_capital = config['financials']['cost_of_capital']
+        statistics = claim_table_statistics(
+            claims, {treaty['name']: apply_treaty_development(claims, treaty)
+                     for treaty in config['treaties']}, cost_of_capital)
+        expected = compute_statistics(price_claims(claims, config['treaties']), cost_of_capital)
+        pd.testing.assert_frame_equal(statistics, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
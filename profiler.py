@@ -0,0 +1,192 @@
+"""
+This module provides an opt-in instrumentation of the pipeline stages.
+
+The module level profiler is disabled by default, a stage then costs a single function call.
+Once started, every stage records its wall time, CPU time, peak traced memory and the details
+given by the caller (treaty name, number of rows, ...), and the hot functions of the whole run
+can be sampled. The report is a JSON document.
+
+Usage:
+    with profiler.stage('apply_treaty', treaty=name) as record:
+        ...
+        record['rows'] = len(recoveries)
+
+"""
+import cProfile
+import json
+import pstats
+import signal
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class Profiler:  # pylint: disable=too-many-instance-attributes
+    """Class recording the duration and memory of the pipeline stages."""
+
+    def __init__(self):
+        """Initialize a disabled profiler."""
+        self.enabled = False
+        self.memory = False
+        self.records = []
+        self._open_stages = []
+        self._started = None
+        self._samples = None
+        self._sampling_interval = None
+        self._previous_handler = None
+        self._cprofile = None
+
+    def start(self, memory=True, hot_functions=False, sampling_interval=0.005):
+        """Start recording the stages.
+
+        Args:
+            memory (bool, optional): Whether to trace the memory allocations, which slows the
+                run down. Defaults to True.
+            hot_functions (bool, optional): Whether to sample the running functions.
+                Defaults to False.
+            sampling_interval (float, optional): The CPU time between two samples, in seconds.
+                Defaults to 0.005.
+        """
+        self.enabled = True
+        self.memory = memory
+        self.records = []
+        self._started = (time.perf_counter(), time.process_time())
+        if memory:
+            tracemalloc.start()
+        if hot_functions:
+            if hasattr(signal, 'setitimer'):
+                self._samples = {'self': Counter(), 'total': Counter(), 'count': 0}
+                self._sampling_interval = sampling_interval
+                self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+                signal.setitimer(signal.ITIMER_PROF, sampling_interval, sampling_interval)
+            else:
+                # Without interval timers the functions are profiled deterministically.
+                self._cprofile = cProfile.Profile()
+                self._cprofile.enable()
+
+    def _sample(self, signum, frame):  # pylint: disable=unused-argument
+        """Record the functions on the stack of the main thread."""
+        self._samples['count'] += 1
+        seen = set()
+        leaf = True
+        while frame is not None:
+            code = frame.f_code
+            function = f'{code.co_filename}:{code.co_firstlineno}({code.co_name})'
+            if leaf:
+                self._samples['self'][function] += 1
+                leaf = False
+            if function not in seen:
+                self._samples['total'][function] += 1
+                seen.add(function)
+            frame = frame.f_back
+
+    @contextmanager
+    def stage(self, name, **details):
+        """Record a stage of the pipeline.
+
+        Args:
+            name (str): The name of the stage.
+            **details: Details stored with the record, e.g. the treaty name.
+
+        Yields:
+            dict: The record of the stage, to which the caller may add details such as 'rows'.
+        """
+        if not self.enabled:
+            yield details
+            return
+
+        record = {'stage': name, **details}
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            self._propagate_peak(peak)
+            tracemalloc.reset_peak()
+            record['peak_memory'] = current
+            record['_start_memory'] = current
+        self._open_stages.append(record)
+        start_wall, start_cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_time'] = time.perf_counter() - start_wall
+            record['cpu_time'] = time.process_time() - start_cpu
+            self._open_stages.pop()
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record['peak_memory'] = max(record['peak_memory'], peak)
+                self._propagate_peak(peak)
+                tracemalloc.reset_peak()
+                record['allocated_memory'] = current - record.pop('_start_memory')
+            self.records.append(record)
+
+    def _propagate_peak(self, peak):
+        """Report a peak of traced memory to the stages still running."""
+        for record in self._open_stages:
+            record['peak_memory'] = max(record['peak_memory'], peak)
+
+    def _hot_functions(self, nb_functions):
+        """List the functions taking the most time."""
+        if self._samples is not None:
+            signal.setitimer(signal.ITIMER_PROF, 0, 0)
+            signal.signal(signal.SIGPROF, self._previous_handler)
+            count = max(self._samples['count'], 1)
+            return [{'function': function,
+                     'self_share': self._samples['self'][function] / count,
+                     'total_share': total / count}
+                    for function, total in self._samples['total'].most_common(nb_functions)]
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            statistics = pstats.Stats(self._cprofile).stats  # pylint: disable=no-member
+            ranked = sorted(statistics.items(), key=lambda item: item[1][3], reverse=True)
+            return [{'function': f'{filename}:{line}({function})', 'calls': calls,
+                     'self_time': self_time, 'total_time': total_time}
+                    for (filename, line, function), (_, calls, self_time, total_time, _)
+                    in ranked[:nb_functions]]
+        return []
+
+    def report(self, nb_functions=20) -> dict:
+        """Stop the profiler and gather its records.
+
+        Args:
+            nb_functions (int, optional): The number of hot functions reported. Defaults to 20.
+
+        Returns:
+            dict: The total wall and CPU times, the peak memory of the process, the records of
+                every stage in completion order and the hot functions.
+        """
+        report = {
+            'wall_time': time.perf_counter() - self._started[0],
+            'cpu_time': time.process_time() - self._started[1],
+            'stages': self.records,
+            'hot_functions': self._hot_functions(nb_functions),
+        }
+        if self.memory:
+            report['peak_traced_memory'] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if resource is not None:
+            # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+            scale = 1 if sys.platform == 'darwin' else 1024
+            report['peak_resident_memory'] = resource.getrusage(
+                resource.RUSAGE_SELF).ru_maxrss * scale
+        self.enabled = False
+        self._samples = self._cprofile = None
+        return report
+
+    def write(self, path, nb_functions=20):
+        """Stop the profiler and write its report as JSON.
+
+        Args:
+            path (str): The path of the JSON file.
+            nb_functions (int, optional): The number of hot functions reported. Defaults to 20.
+        """
+        with open(path, 'w', encoding='UTF-8') as file:
+            json.dump(self.report(nb_functions), file, indent=2)
+
+
+profiler = Profiler()
@@ -0,0 +1,56 @@
+"""
+This module provides a class for testing the stage profiler.
+"""
+import signal
+import unittest
+import numpy as np
+from profiler import Profiler # pylint: disable=import-error
+
+
+class ProfilerTests(unittest.TestCase):
+    """Test cases for the Profiler class."""
+
+    def test_disabled(self):
+        """Test that a disabled profiler records nothing."""
+        profiler = Profiler()
+        with profiler.stage('stage', treaty='xs') as record:
+            record['rows'] = 1
+        self.assertEqual(profiler.records, [])
+
+    def test_nested_stages(self):
+        """Test that the peak memory of an inner stage is reported to the outer stage."""
+        profiler = Profiler()
+        profiler.start(memory=True, hot_functions=True, sampling_interval=0.001)
+        with profiler.stage('outer') as outer:
+            with profiler.stage('inner', treaty='xs') as inner:
+                array = np.ones(1_000_000)
+                inner['rows'] = len(array)
+                del array
+            outer['rows'] = 2
+        report = profiler.report()
+
+        self.assertEqual([record['stage'] for record in report['stages']], ['inner', 'outer'])
+        inner, outer = report['stages']
+        self.assertEqual(inner['treaty'], 'xs')
+        self.assertEqual(inner['rows'], 1_000_000)
+        self.assertGreaterEqual(inner['peak_memory'], 8_000_000)
+        self.assertGreaterEqual(outer['peak_memory'], inner['peak_memory'])
+        self.assertGreaterEqual(outer['wall_time'], inner['wall_time'])
+        self.assertIn('hot_functions', report)
+        self.assertFalse(profiler.enabled)
+
+    @unittest.skipUnless(hasattr(signal, 'setitimer'), 'requires interval timers')
+    def test_restores_the_signal_handler(self):
+        """Test that the sampling profiler restores the previous SIGPROF handler."""
+        def handler(signum, frame):  # pylint: disable=unused-argument
+            """Ignore the signal."""
+        previous = signal.signal(signal.SIGPROF, handler)
+        self.addCleanup(signal.signal, signal.SIGPROF, previous)
+        profiler = Profiler()
+        profiler.start(memory=False, hot_functions=True)
+        profiler.report()
+        self.assertIs(signal.getsignal(signal.SIGPROF), handler)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,15 +4,31 @@ distributions.
 
 The available functions are:
 - r_pareto(shape, scale): Generate a random number from the Pareto distribution.
+- r_truncated_pareto(shape, scale, shift=0, truncation=None): Generate a random number from the
+  shifted and truncated Pareto distribution.
 - r_exponential(rate): Generate a random number from the exponential distribution.
 - r_poisson(rate, interval_length=1): Generate a random number from the Poisson distribution.
+- r_negative_binomial(n, p): Generate a random number from the negative binomial distribution.
+- r_lognormal(mu, sigma): Generate a random number from the lognormal distribution.
+- r_gamma(shape, scale): Generate a random number from the gamma distribution.
 
-The module utilizes the 'random' and 'math' modules from the Python standard library.
+Every function has a batch counterpart with the '_batch' suffix, e.g.
+r_pareto_batch(size, generator, shape, scale), which generates an array of random numbers.
+The Pareto, truncated Pareto, Poisson and negative binomial distributions also have a
+'_quantile' function, their inverse CDF applied to an array of uniforms, and the Pareto
+distributions a '_cdf' function, which let the variance reduction methods of the sampling
+module choose the uniforms.
+
+The scalar functions utilize the 'random' and 'math' modules from the Python standard library.
+The batch functions draw from a numpy Generator so that a whole simulation can be sampled in
+a single call.
 
 """
 import math
 import random
 
+import numpy as np
+
 def r_pareto(shape, scale) -> float:
     """
     Generate a random number from the Pareto distribution.
@@ -29,6 +45,24 @@ def r_pareto(shape, scale) -> float:
     # so we can write it as scale * (1 - random.uniform(0, 1)) ** (-1 / shape).
     return scale * (1 - random.uniform(0, 1)) ** (-1 / shape)
 
+def r_truncated_pareto(shape, scale, shift=0, truncation=None) -> float:
+    """
+    Generate a random number from the shifted and truncated Pareto distribution.
+
+    Args:
+        shape (float): The shape parameter of the Pareto distribution.
+        scale (float): The scale parameter of the Pareto distribution.
+        shift (float, optional): The amount added to the Pareto random number. Defaults to 0.
+        truncation (float, optional): The upper bound of the Pareto random number, before the
+            shift. Defaults to None, no bound.
+
+    Returns:
+        float: A random number from the shifted and truncated Pareto distribution.
+    """
+    # Inverse CDF of the Pareto distribution conditioned on being below the truncation.
+    mass = 1 if truncation is None else 1 - (scale / truncation) ** shape
+    return shift + scale * (1 - random.uniform(0, 1) * mass) ** (-1 / shape)
+
 def r_exponential(rate) -> float:
     """
     Generate a random number from the exponential distribution.
@@ -52,8 +86,15 @@ def r_poisson(rate, interval_length=1) -> int:
     Returns:
         int: A random number from the Poisson distribution.
     """
+    mean = rate * interval_length
+    if mean == 0:
+        return 0
+    if mean >= 10:
+        return _r_poisson_ptrs(mean)
+
     # The time between two Poisson-distributed events has an exponential distribution with
     # mean_exponential = 1 / mean_poisson. We stop when the event occurs outside the interval.
+    # The number of steps grows with the mean, hence the rejection sampler for large means.
     total_occurrences = 0
     time_of_occurrence = 0.0
     while time_of_occurrence <= interval_length:
@@ -62,3 +103,293 @@ def r_poisson(rate, interval_length=1) -> int:
             total_occurrences += 1
 
     return total_occurrences
+
+def _r_poisson_ptrs(mean) -> int:
+    """
+    Generate a random number from the Poisson distribution by transformed rejection.
+
+    This is the PTRS algorithm of W. Hoermann (1993), whose expected number of uniforms does not
+    depend on the mean. It requires mean >= 10.
+
+    Args:
+        mean (float): The mean of the Poisson distribution.
+
+    Returns:
+        int: A random number from the Poisson distribution.
+    """
+    log_mean = math.log(mean)
+    b = 0.931 + 2.53 * math.sqrt(mean)
+    a = -0.059 + 0.02483 * b
+    log_inverse_alpha = math.log(1.1239 + 1.1328 / (b - 3.4))
+    v_r = 0.9277 - 3.6224 / (b - 2)
+    while True:
+        u = random.uniform(0, 1) - 0.5
+        v = random.uniform(0, 1)
+        u_s = 0.5 - abs(u)
+        k = math.floor((2 * a / u_s + b) * u + mean + 0.43)
+        if u_s >= 0.07 and v <= v_r:
+            return k
+        if k < 0 or (u_s < 0.013 and v > u_s):
+            continue
+        if (math.log(v) + log_inverse_alpha - math.log(a / (u_s * u_s) + b)
+                <= -mean + k * log_mean - math.lgamma(k + 1)):
+            return k
+
+def r_negative_binomial(n, p) -> int:
+    """
+    Generate a random number from the negative binomial distribution.
+
+    Args:
+        n (float): The number of successes parameter.
+        p (float): The success probability parameter.
+
+    Returns:
+        int: A random number of failures before the n-th success.
+    """
+    # Poisson distribution with a gamma distributed rate.
+    return r_poisson(random.gammavariate(n, (1 - p) / p))
+
+def r_lognormal(mu, sigma) -> float:
+    """
+    Generate a random number from the lognormal distribution.
+
+    Args:
+        mu (float): The mean of the logarithm of the random number.
+        sigma (float): The standard deviation of the logarithm of the random number.
+
+    Returns:
+        float: A random number from the lognormal distribution.
+    """
+    return random.lognormvariate(mu, sigma)
+
+def r_gamma(shape, scale) -> float:
+    """
+    Generate a random number from the gamma distribution.
+
+    Args:
+        shape (float): The shape parameter of the gamma distribution.
+        scale (float): The scale parameter of the gamma distribution.
+
+    Returns:
+        float: A random number from the gamma distribution.
+    """
+    return random.gammavariate(shape, scale)
+
+def r_pareto_batch(size, generator, shape, scale) -> np.ndarray:
+    """
+    Generate an array of random numbers from the Pareto distribution.
+
+    Args:
+        size (int): The number of random numbers to generate.
+        generator (np.random.Generator): The random number generator to draw from.
+        shape (float): The shape parameter of the Pareto distribution.
+        scale (float): The scale parameter of the Pareto distribution.
+
+    Returns:
+        np.ndarray: An array of random numbers from the Pareto distribution.
+    """
+    return pareto_quantile(generator.random(size), shape, scale)
+
+def r_truncated_pareto_batch(size, generator, shape, scale, shift=0,  # pylint: disable=too-many-arguments
+                             truncation=None) -> np.ndarray:
+    """
+    Generate an array of random numbers from the shifted and truncated Pareto distribution.
+
+    Args:
+        size (int): The number of random numbers to generate.
+        generator (np.random.Generator): The random number generator to draw from.
+        shape (float): The shape parameter of the Pareto distribution.
+        scale (float): The scale parameter of the Pareto distribution.
+        shift (float, optional): The amount added to the Pareto random numbers. Defaults to 0.
+        truncation (float, optional): The upper bound of the Pareto random numbers, before the
+            shift. Defaults to None, no bound.
+
+    Returns:
+        np.ndarray: An array of random numbers from the shifted and truncated Pareto distribution.
+    """
+    return truncated_pareto_quantile(generator.random(size), shape, scale, shift, truncation)
+
+def r_poisson_batch(size, generator, rate, interval_length=1) -> np.ndarray:
+    """
+    Generate an array of random numbers from the Poisson distribution.
+
+    Args:
+        size (int): The number of random numbers to generate.
+        generator (np.random.Generator): The random number generator to draw from.
+        rate (float): The rate parameter of the Poisson distribution.
+        interval_length (float, optional): The length of the interval. Defaults to 1.
+
+    Returns:
+        np.ndarray: An array of random numbers from the Poisson distribution.
+    """
+    # Counting exponential inter-arrival times does not vectorize, numpy's sampler is exact
+    # for the Poisson law with mean rate * interval_length and uses PTRS for large means.
+    return generator.poisson(rate * interval_length, size)
+
+def r_negative_binomial_batch(size, generator, n, p) -> np.ndarray:
+    """
+    Generate an array of random numbers from the negative binomial distribution.
+
+    Args:
+        size (int): The number of random numbers to generate.
+        generator (np.random.Generator): The random number generator to draw from.
+        n (float): The number of successes parameter.
+        p (float): The success probability parameter.
+
+    Returns:
+        np.ndarray: An array of random numbers of failures before the n-th success.
+    """
+    return generator.negative_binomial(n, p, size)
+
+def r_lognormal_batch(size, generator, mu, sigma) -> np.ndarray:
+    """
+    Generate an array of random numbers from the lognormal distribution.
+
+    Args:
+        size (int): The number of random numbers to generate.
+        generator (np.random.Generator): The random number generator to draw from.
+        mu (float): The mean of the logarithm of the random numbers.
+        sigma (float): The standard deviation of the logarithm of the random numbers.
+
+    Returns:
+        np.ndarray: An array of random numbers from the lognormal distribution.
+    """
+    return generator.lognormal(mu, sigma, size)
+
+def r_gamma_batch(size, generator, shape, scale) -> np.ndarray:
+    """
+    Generate an array of random numbers from the gamma distribution.
+
+    Args:
+        size (int): The number of random numbers to generate.
+        generator (np.random.Generator): The random number generator to draw from.
+        shape (float): The shape parameter of the gamma distribution.
+        scale (float): The scale parameter of the gamma distribution.
+
+    Returns:
+        np.ndarray: An array of random numbers from the gamma distribution.
+    """
+    return generator.gamma(shape, scale, size)
+
+def pareto_quantile(uniforms, shape, scale) -> np.ndarray:
+    """
+    Compute the inverse CDF of the Pareto distribution.
+
+    Args:
+        uniforms (np.ndarray): The probabilities, in [0, 1).
+        shape (float): The shape parameter of the Pareto distribution.
+        scale (float): The scale parameter of the Pareto distribution.
+
+    Returns:
+        np.ndarray: The quantiles of the Pareto distribution.
+    """
+    # Same inverse CDF as r_pareto, applied to a whole array of uniforms at once.
+    return scale * (1 - uniforms) ** (-1 / shape)
+
+def pareto_cdf(value, shape, scale) -> float:
+    """
+    Compute the CDF of the Pareto distribution.
+
+    Args:
+        value (float): The value.
+        shape (float): The shape parameter of the Pareto distribution.
+        scale (float): The scale parameter of the Pareto distribution.
+
+    Returns:
+        float: The probability of a random number below the value.
+    """
+    return 0.0 if value <= scale else 1 - (scale / value) ** shape
+
+def truncated_pareto_quantile(uniforms, shape, scale, shift=0, truncation=None) -> np.ndarray:
+    """
+    Compute the inverse CDF of the shifted and truncated Pareto distribution.
+
+    Args:
+        uniforms (np.ndarray): The probabilities, in [0, 1).
+        shape (float): The shape parameter of the Pareto distribution.
+        scale (float): The scale parameter of the Pareto distribution.
+        shift (float, optional): The amount added to the Pareto random numbers. Defaults to 0.
+        truncation (float, optional): The upper bound of the Pareto random numbers, before the
+            shift. Defaults to None, no bound.
+
+    Returns:
+        np.ndarray: The quantiles of the shifted and truncated Pareto distribution.
+    """
+    mass = 1 if truncation is None else 1 - (scale / truncation) ** shape
+    return shift + scale * (1 - uniforms * mass) ** (-1 / shape)
+
+def truncated_pareto_cdf(value, shape, scale, shift=0, truncation=None) -> float:
+    """
+    Compute the CDF of the shifted and truncated Pareto distribution.
+
+    Args:
+        value (float): The value.
+        shape (float): The shape parameter of the Pareto distribution.
+        scale (float): The scale parameter of the Pareto distribution.
+        shift (float, optional): The amount added to the Pareto random numbers. Defaults to 0.
+        truncation (float, optional): The upper bound of the Pareto random numbers, before the
+            shift. Defaults to None, no bound.
+
+    Returns:
+        float: The probability of a random number below the value.
+    """
+    mass = 1 if truncation is None else 1 - (scale / truncation) ** shape
+    return min(pareto_cdf(value - shift, shape, scale) / mass, 1.0)
+
+def _discrete_quantile(uniforms, log_pmf, mean, std) -> np.ndarray:
+    """
+    Compute the inverse CDF of a distribution on the non negative integers.
+
+    Args:
+        uniforms (np.ndarray): The probabilities, in [0, 1).
+        log_pmf (callable): The logarithm of the probability mass, for an array of integers.
+        mean (float): The mean of the distribution.
+        std (float): The standard deviation of the distribution.
+
+    Returns:
+        np.ndarray: The smallest integers whose CDF exceeds the probabilities.
+    """
+    # The CDF is tabulated far enough in the tail for the double precision uniforms.
+    support = np.arange(math.ceil(mean + 40 * std + 40))
+    cdf = np.cumsum(np.exp(log_pmf(support)))
+    return np.searchsorted(cdf, uniforms, side='right')
+
+def poisson_quantile(uniforms, rate, interval_length=1) -> np.ndarray:
+    """
+    Compute the inverse CDF of the Poisson distribution.
+
+    Args:
+        uniforms (np.ndarray): The probabilities, in [0, 1).
+        rate (float): The rate parameter of the Poisson distribution.
+        interval_length (float, optional): The length of the interval. Defaults to 1.
+
+    Returns:
+        np.ndarray: The quantiles of the Poisson distribution.
+    """
+    mean = rate * interval_length
+    if mean == 0:
+        return np.zeros(np.shape(uniforms), dtype=np.intp)
+    log_factorial = np.frompyfunc(math.lgamma, 1, 1)
+    return _discrete_quantile(
+        uniforms,
+        lambda k: -mean + k * math.log(mean) - log_factorial(k + 1).astype(float),
+        mean, math.sqrt(mean))
+
+def negative_binomial_quantile(uniforms, n, p) -> np.ndarray:
+    """
+    Compute the inverse CDF of the negative binomial distribution.
+
+    Args:
+        uniforms (np.ndarray): The probabilities, in [0, 1).
+        n (float): The number of successes parameter.
+        p (float): The success probability parameter.
+
+    Returns:
+        np.ndarray: The quantiles of the negative binomial distribution.
+    """
+    log_gamma = np.frompyfunc(math.lgamma, 1, 1)
+    return _discrete_quantile(
+        uniforms,
+        lambda k: (log_gamma(k + n) - log_gamma(k + 1)).astype(float) - math.lgamma(n)
+        + n * math.log(p) + k * math.log(1 - p),
+        n * (1 - p) / p, math.sqrt(n * (1 - p)) / p)
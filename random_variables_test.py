@@ -0,0 +1,79 @@
+"""
+This module provides a class for testing the samplers of the distribution registry.
+"""
+import math
+import random
+import unittest
+import numpy as np
+from claims import distribution_map # pylint: disable=import-error
+
+# Name, parameters, mean and variance of every registered distribution.
+DISTRIBUTIONS = [
+    ('Poisson', {'rate': 1}, 1, 1),
+    ('Poisson', {'rate': 50}, 50, 50),
+    ('Poisson', {'rate': 500}, 500, 500),
+    ('NegativeBinomial', {'n': 5, 'p': 0.25}, 15, 60),
+    ('Pareto', {'shape': 5, 'scale': 2}, 2.5, 5 / 12),
+    ('TruncatedPareto', {'shape': 1.2, 'scale': 2, 'shift': 1, 'truncation': 20},
+     1 + 2 * 1.2 / 0.2 * (1 - 0.1 ** 0.2) / (1 - 0.1 ** 1.2),
+     4 * 1.2 / 0.8 * (1 - 0.1 ** -0.8) / (1 - 0.1 ** 1.2) * -1
+     - (2 * 1.2 / 0.2 * (1 - 0.1 ** 0.2) / (1 - 0.1 ** 1.2)) ** 2),
+    ('Lognormal', {'mu': 0, 'sigma': 0.5}, math.exp(0.125), (math.exp(0.25) - 1) * math.exp(0.25)),
+    ('Gamma', {'shape': 2, 'scale': 3}, 6, 18),
+]
+
+
+class DistributionTests(unittest.TestCase):
+    """Test cases for the scalar and batch samplers."""
+
+    def assert_moments(self, draws, mean, variance):
+        """Assert that the sample mean and variance match within a few standard errors."""
+        self.assertLess(abs(np.mean(draws) - mean), 5 * math.sqrt(variance / len(draws)))
+        self.assertLess(abs(np.var(draws) / variance - 1), 0.1)
+
+    def test_scalar_samplers(self):
+        """Test the moments of the scalar samplers."""
+        random.seed(0)
+        for name, parameters, mean, variance in DISTRIBUTIONS:
+            with self.subTest(name=name, parameters=parameters):
+                draws = [distribution_map[name](**parameters) for _ in range(20_000)]
+                self.assert_moments(draws, mean, variance)
+
+    def test_batch_samplers(self):
+        """Test the moments of the batch samplers."""
+        generator = np.random.default_rng(0)
+        for name, parameters, mean, variance in DISTRIBUTIONS:
+            with self.subTest(name=name, parameters=parameters):
+                draws = distribution_map[name].batch(100_000, generator, **parameters)
+                self.assertEqual(len(draws), 100_000)
+                self.assert_moments(draws, mean, variance)
+
+    def test_poisson_cost_does_not_grow_with_rate(self):
+        """Test that the scalar Poisson sampler draws a bounded number of uniforms."""
+        calls = []
+        uniform = random.uniform
+        random.uniform = lambda a, b: calls.append(1) or uniform(a, b)
+        try:
+            for _ in range(1_000):
+                distribution_map['Poisson'](rate=5_000)
+        finally:
+            random.uniform = uniform
+        self.assertLess(len(calls) / 1_000, 3)
+
+    def test_poisson_rate_zero(self):
+        """Test that every Poisson sampler and the quantile give 0 claims for a rate of 0."""
+        poisson = distribution_map['Poisson']
+        self.assertEqual(poisson(rate=0), 0)
+        self.assertEqual(poisson.batch(5, np.random.default_rng(0), rate=0).tolist(), [0] * 5)
+        self.assertEqual(poisson.quantile(np.array([0.0, 0.5, 0.99]), rate=0).tolist(),
+                         [0, 0, 0])
+
+    def test_truncation(self):
+        """Test that the truncated Pareto stays within its bounds."""
+        draws = distribution_map['TruncatedPareto'].batch(
+            10_000, np.random.default_rng(0), shape=1.2, scale=2, shift=1, truncation=20)
+        self.assertTrue(np.all((draws >= 3) & (draws <= 21)))
+
+
+if __name__ == '__main__':
+    unittest.main()
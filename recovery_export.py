@@ -0,0 +1,202 @@
+"""
+This module exports the recoveries of every claim and the annual recoveries of every simulation
+in a binary columnar format.
+
+The export is a directory partitioned by table, treaty and development year, every partition
+holding one file per chunk and column, so a job reading one treaty or one development year
+only opens its files:
+    <directory>/manifest.json
+    <directory>/claims/<treaty>/year=<year>/<chunk>.<column>.npy
+    <directory>/annual/<treaty>/year=<year>/<chunk>.<column>.npy
+
+The treaty directories are the URL quoted treaty names and the chunks are named after the
+simulation id of their first simulation, so they sort in simulation order. The 'claims' table
+only holds the claims with non zero recoveries, the recoveries of excess of loss treaties being
+mostly zero. The columns are typed .npy files read back memory-mapped; with compression, every
+chunk is instead a single deflated .npz archive of its columns, smaller on disk but decompressed
+when read.
+
+The available functions are:
+- prepare_export(directory, compressed=False): Create an empty export directory.
+- write_chunk(directory, treaty_name, claims, recoveries, first_sim_id=0, compressed=False):
+  Write the recoveries of a treaty on a chunk of claims.
+- treaties(directory): List the exported treaties.
+- iter_chunks(directory, table, treaty_name, development_year): Read the chunks of a partition.
+- read_partition(directory, table, treaty_name, development_year): Read a whole partition.
+
+"""
+import json
+import os
+import shutil
+from urllib.parse import quote, unquote
+import numpy as np
+
+FORMAT_VERSION = 1
+
+# The columns of the tables and their types. The 'weight' column of the 'annual' table is only
+# written for weighted simulations.
+TABLES = {
+    'claims': {'sim_id': 'int32', 'claim_id': 'int32', 'recovery': 'float64',
+               'payment_pattern': 'float64'},
+    'annual': {'sim_id': 'int32', 'recovery': 'float64', 'weight': 'float64'},
+}
+
+MANIFEST = 'manifest.json'
+
+
+def prepare_export(directory, compressed=False):
+    """
+    Create an empty export directory, replacing a previous export.
+
+    Args:
+        directory (str): The directory of the export.
+        compressed (bool, optional): Whether the chunks are compressed. Defaults to False.
+
+    Raises:
+        ValueError: If the directory is not empty and does not hold an export.
+    """
+    if os.path.isdir(directory) and os.listdir(directory):
+        if not os.path.exists(os.path.join(directory, MANIFEST)):
+            raise ValueError(f'{directory!r} is not empty and does not hold an export.')
+        shutil.rmtree(directory)
+    os.makedirs(directory)
+    with open(os.path.join(directory, MANIFEST), 'w', encoding='UTF-8') as file:
+        json.dump({'format_version': FORMAT_VERSION, 'compressed': compressed,
+                   'tables': TABLES}, file, indent=2)
+
+
+def _partition(directory, table, treaty_name, development_year):
+    """Return the directory of a partition."""
+    return os.path.join(directory, table, quote(treaty_name, safe=''),
+                        f'year={development_year}')
+
+
+def _write(path, columns, compressed):
+    """Write the columns of a chunk, through temporary files renamed once complete."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = os.path.join(os.path.dirname(path), '.tmp-' + os.path.basename(path))
+    if compressed:
+        with open(temporary + '.npz', 'wb') as file:
+            np.savez_compressed(file, **columns)
+        os.replace(temporary + '.npz', path + '.npz')
+        return
+    for column, values in columns.items():
+        with open(f'{temporary}.{column}.npy', 'wb') as file:
+            np.save(file, values)
+        os.replace(f'{temporary}.{column}.npy', f'{path}.{column}.npy')
+
+
+def write_chunk(directory, treaty_name, claims, recoveries, first_sim_id=0, compressed=False):  # pylint: disable=too-many-arguments,too-many-locals
+    """
+    Write the recoveries of a treaty on a chunk of claims.
+
+    Args:
+        directory (str): The directory of the export, created by prepare_export.
+        treaty_name (str): The name of the treaty.
+        claims (ClaimTable): The claims of the chunk.
+        recoveries (np.ndarray): The recoveries, with one row per development year.
+        first_sim_id (int, optional): The offset of the simulation ids of the chunk.
+            Defaults to 0.
+        compressed (bool, optional): Whether the chunk is compressed. Defaults to False.
+
+    Returns:
+        int: The number of bytes of the columns written, before compression.
+    """
+    recoveries = np.asarray(recoveries, dtype=np.float64)
+    sim_ids = (claims.sim_ids + first_sim_id).astype(np.int32)
+    claim_ids = np.asarray(claims.claim_ids, dtype=np.int32)
+    totals = np.zeros(claims.nb_claims)
+    for recoveries_year in recoveries:
+        totals += recoveries_year
+    first_claims = np.ones(claims.nb_claims, dtype=bool)
+    first_claims[1:] = claims.sim_ids[1:] != claims.sim_ids[:-1]
+    sim_codes = np.cumsum(first_claims) - 1
+    annual_columns = {'sim_id': sim_ids[first_claims]}
+    if claims.weights is not None:
+        annual_columns['weight'] = np.asarray(claims.weights,
+                                              dtype=np.float64)[claims.sim_ids[first_claims]]
+
+    chunk = f'{first_sim_id:012d}'
+    nbytes = 0
+    for development_year, recoveries_year in enumerate(recoveries):
+        recovered = recoveries_year != 0
+        claim_columns = {
+            'sim_id': sim_ids[recovered],
+            'claim_id': claim_ids[recovered],
+            'recovery': recoveries_year[recovered],
+            'payment_pattern': recoveries_year[recovered] / totals[recovered],
+        }
+        annual = {**annual_columns, 'recovery': np.bincount(
+            sim_codes, weights=recoveries_year, minlength=len(annual_columns['sim_id']))}
+        for table, columns in (('claims', claim_columns), ('annual', annual)):
+            _write(os.path.join(_partition(directory, table, treaty_name, development_year),
+                                chunk), columns, compressed)
+            nbytes += sum(values.nbytes for values in columns.values())
+    return nbytes
+
+
+def treaties(directory):
+    """
+    List the exported treaties.
+
+    Args:
+        directory (str): The directory of the export.
+
+    Returns:
+        list[str]: The names of the treaties, sorted.
+    """
+    tables = os.path.join(directory, 'claims')
+    return sorted(unquote(name) for name in os.listdir(tables)) if os.path.isdir(tables) else []
+
+
+def iter_chunks(directory, table, treaty_name, development_year):
+    """
+    Read the chunks of a partition, in simulation order.
+
+    Args:
+        directory (str): The directory of the export.
+        table (str): 'claims' or 'annual'.
+        treaty_name (str): The name of the treaty.
+        development_year (int): The development year.
+
+    Yields:
+        dict[str, np.ndarray]: The columns of a chunk, memory-mapped unless compressed.
+    """
+    partition = _partition(directory, table, treaty_name, development_year)
+    if not os.path.isdir(partition):
+        return
+    files = sorted(name for name in os.listdir(partition) if not name.startswith('.'))
+    for chunk in sorted({name.split('.')[0] for name in files}):
+        if chunk + '.npz' in files:
+            with np.load(os.path.join(partition, chunk + '.npz')) as archive:
+                yield dict(archive.items())
+            continue
+        yield {column: np.load(os.path.join(partition, f'{chunk}.{column}.npy'), mmap_mode='r')
+               for column in TABLES[table] if f'{chunk}.{column}.npy' in files}
+
+
+def read_partition(directory, table, treaty_name, development_year):
+    """
+    Read a whole partition.
+
+    Args:
+        directory (str): The directory of the export.
+        table (str): 'claims' or 'annual'.
+        treaty_name (str): The name of the treaty.
+        development_year (int): The development year.
+
+    Returns:
+        dict[str, np.ndarray]: The columns of the partition. A partition of a single
+            uncompressed chunk is returned memory-mapped, without copying it.
+
+    Raises:
+        ValueError: If the table is unknown.
+    """
+    if table not in TABLES:
+        raise ValueError(f'Unknown table {table!r}.')
+    chunks = list(iter_chunks(directory, table, treaty_name, development_year))
+    if len(chunks) == 1:
+        return chunks[0]
+    return {column: np.concatenate([chunk[column] for chunk in chunks]) if chunks else
+            np.empty(0, dtype=dtype) for column, dtype in TABLES[table].items()
+            if not chunks or column in chunks[0]}
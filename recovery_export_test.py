@@ -0,0 +1,98 @@
+"""
+This module provides classes for testing the binary export of the recoveries.
+"""
+import os
+import tempfile
+import unittest
+import numpy as np
+from claims import ClaimTable  # pylint: disable=import-error
+from config import config  # pylint: disable=import-error
+from main import run_simulations  # pylint: disable=import-error
+import recovery_export  # pylint: disable=import-error
+
+
+class RecoveryExportTests(unittest.TestCase):
+    """Test cases for the recovery_export functions."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.export = os.path.join(self.directory.name, 'export')
+        self.claims = ClaimTable.from_pattern(
+            np.array([0, 0, 1, 3]), np.array([0, 1, 0, 0]), np.array([1.0, 2.0, 3.0, 4.0]),
+            [0.5, 0.5])
+        self.recoveries = np.array([[0.0, 1.0, 0.0, 2.0], [0.0, 3.0, 1.0, 2.0]])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        """Test that the non zero recoveries and the annual totals are read back memory-mapped."""
+        recovery_export.prepare_export(self.export)
+        recovery_export.write_chunk(self.export, 'qs 50%/layer', self.claims, self.recoveries)
+        self.assertEqual(recovery_export.treaties(self.export), ['qs 50%/layer'])
+
+        claims = recovery_export.read_partition(self.export, 'claims', 'qs 50%/layer', 1)
+        self.assertIsInstance(claims['recovery'], np.memmap)
+        self.assertEqual(claims['sim_id'].dtype, np.int32)
+        self.assertEqual(claims['sim_id'].tolist(), [0, 1, 3])
+        self.assertEqual(claims['claim_id'].tolist(), [1, 0, 0])
+        self.assertEqual(claims['recovery'].tolist(), [3.0, 1.0, 2.0])
+        self.assertEqual(claims['payment_pattern'].tolist(), [0.75, 1.0, 0.5])
+
+        annual = recovery_export.read_partition(self.export, 'annual', 'qs 50%/layer', 0)
+        self.assertEqual(annual['sim_id'].tolist(), [0, 1, 3])
+        self.assertEqual(annual['recovery'].tolist(), [1.0, 0.0, 2.0])
+        self.assertNotIn('weight', annual)
+
+    def test_chunks_and_weights(self):
+        """Test that chunks are read in simulation order, with the weights of the simulations."""
+        self.claims.weights = np.array([0.5, 1.0, 1.5, 2.0])
+        for compressed in (False, True):
+            with self.subTest(compressed=compressed):
+                recovery_export.prepare_export(self.export, compressed)
+                for first_sim_id in (10, 0):
+                    recovery_export.write_chunk(self.export, 'xs', self.claims, self.recoveries,
+                                                first_sim_id, compressed)
+                chunks = list(recovery_export.iter_chunks(self.export, 'annual', 'xs', 1))
+                self.assertEqual(len(chunks), 2)
+                annual = recovery_export.read_partition(self.export, 'annual', 'xs', 1)
+                self.assertEqual(annual['sim_id'].tolist(), [0, 1, 3, 10, 11, 13])
+                self.assertEqual(annual['weight'].tolist(), [0.5, 1.0, 2.0] * 2)
+                self.assertEqual(annual['recovery'].tolist(), [3.0, 1.0, 2.0] * 2)
+
+    def test_missing_partition(self):
+        """Test reading a partition which was not written."""
+        recovery_export.prepare_export(self.export)
+        claims = recovery_export.read_partition(self.export, 'claims', 'xs', 0)
+        self.assertEqual(len(claims['recovery']), 0)
+        with self.assertRaises(ValueError):
+            recovery_export.read_partition(self.export, 'premiums', 'xs', 0)
+
+    def test_prepare_export(self):
+        """Test that a previous export is replaced but other directories are left alone."""
+        recovery_export.prepare_export(self.export)
+        recovery_export.write_chunk(self.export, 'xs', self.claims, self.recoveries)
+        recovery_export.prepare_export(self.export)
+        self.assertEqual(recovery_export.treaties(self.export), [])
+        with self.assertRaises(ValueError):
+            recovery_export.prepare_export(self.directory.name)
+
+    def test_sharded_run(self):
+        """Test that the shards of a run export the recoveries of the priced claims."""
+        simulations = {**config['simulations'], 'nb': 2_000, 'mode': 'batch',
+                       'shard_size': 500, 'export': {'directory': self.export}}
+        results = run_simulations(simulations, config['treaties'])
+        for treaty in config['treaties']:
+            for development_year in range(len(simulations['development_pattern'])):
+                expected = results[(results['treatyName'] == treaty['name'])
+                                   & (results['claimDevelopmentYear'] == development_year)
+                                   & (results['treatyRecoveries'] != 0)]
+                claims = recovery_export.read_partition(self.export, 'claims', treaty['name'],
+                                                        development_year)
+                self.assertTrue(np.array_equal(claims['sim_id'], expected['simId']))
+                self.assertTrue(np.array_equal(claims['recovery'],
+                                               expected['treatyRecoveries']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,102 @@
 """
-This module provides a class for representing an excess of loss treaty.
+This module provides classes for representing excess of loss and quota share treaties, and
+programs of layers priced together.
 """
+import math
 from dataclasses import dataclass
+import numpy as np
+
+
+def _claims_by_rank(sim_ids):
+    """Group the positions of the claims by their rank within their simulation.
+
+    Args:
+        sim_ids (np.ndarray): The simulation id of every claim, claims of a simulation being
+            contiguous.
+
+    Returns:
+        tuple: The simulation index of every claim, the number of simulations and the list of
+            claim positions for every rank (first claims, second claims, ...).
+    """
+    new_simulation = np.ones(len(sim_ids), dtype=bool)
+    new_simulation[1:] = sim_ids[1:] != sim_ids[:-1]
+    simulation = np.cumsum(new_simulation) - 1
+    first_claims = np.flatnonzero(new_simulation)
+    ranks = np.arange(len(sim_ids)) - first_claims[simulation]
+    order = np.argsort(ranks, kind='stable')
+    bounds = np.cumsum(np.bincount(ranks))[:-1]
+    return simulation, len(first_claims), np.split(order, bounds)
+
+
+def _excess_of_loss_layers(claim_amounts, sim_ids, deductibles, limits, aads, aals):  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    """Apply several excess of loss layers to the same claims in a single sweep.
+
+    The layers without AAD and AAL are evaluated at once by broadcasting. The others share a
+    single sweep of the claims by rank: the claims of a rank are read once for every layer and
+    only update the aggregate state of the layers they exceed the deductible of, an AAD of 0
+    and an AAL of infinity leaving the recoveries of a layer unchanged.
+
+    Args:
+        claim_amounts (np.ndarray): The claim amounts, claims being on the last axis and claims
+            of a simulation being contiguous.
+        sim_ids (np.ndarray): The simulation id of every claim.
+        deductibles (list[float]): The deductible of every layer.
+        limits (list[float]): The limit of every layer.
+        aads (list[float]): The annual aggregate deductible of every layer, 0 for none.
+        aals (list[float]): The annual aggregate limit of every layer, 0 for none.
+
+    Returns:
+        np.ndarray: The recoveries, with one row per layer followed by the shape of
+            claim_amounts.
+    """
+    claim_amounts = np.asarray(claim_amounts, dtype=float)
+    shape = (-1,) + (1,) * claim_amounts.ndim
+    deductibles, limits, aads, aals = (np.asarray(values, dtype=float).reshape(shape)
+                                       for values in (deductibles, limits, aads, aals))
+    aggregate = ((aads > 0) | (aals > 0)).ravel()
+    recoveries = np.empty((len(aggregate),) + claim_amounts.shape)
+    recoveries[~aggregate] = np.minimum(
+        np.maximum(claim_amounts - deductibles[~aggregate], 0), limits[~aggregate])
+    if not aggregate.any():
+        return recoveries
+
+    # The state is kept per row and (simulation, layer) pair, and every rank only updates the
+    # pairs of the claims in excess of the deductible of the layer.
+    deductibles, limits, aads = (values[aggregate].ravel()
+                                 for values in (deductibles, limits, aads))
+    aals = np.where(aals[aggregate] > 0, aals[aggregate], np.inf).ravel()
+    nb_layers = len(deductibles)
+    rows = claim_amounts.reshape(math.prod(claim_amounts.shape[:-1]), claim_amounts.shape[-1])
+    simulation, nb_simulations, ranks = _claims_by_rank(np.asarray(sim_ids))
+    available_aad = np.tile(aads, (len(rows), nb_simulations))
+    total_recoveries = np.zeros(available_aad.shape)
+    aggregate_recoveries = np.zeros((len(rows), rows.shape[1] * nb_layers))
+    # Claims below the deductible of every layer and row leave the aggregate state untouched.
+    in_excess_of_a_layer = rows.max(axis=0, initial=-np.inf) > deductibles.min()
+    for claims in ranks:
+        claims = claims[in_excess_of_a_layer[claims]]
+        amounts = rows[:, claims]
+        pair_claims, pair_layers = np.nonzero(
+            amounts.max(axis=0, initial=-np.inf)[:, None] > deductibles)
+        pairs = simulation[claims[pair_claims]] * nb_layers + pair_layers
+        in_excess = np.maximum(amounts[:, pair_claims] - deductibles[pair_layers], 0)
+
+        aad = available_aad[:, pairs]
+        available_aad[:, pairs] = np.maximum(aad - in_excess, 0)
+        claim_amount_in_excess = np.maximum(in_excess - aad, 0)
+
+        claim_recoveries = np.minimum(claim_amount_in_excess, limits[pair_layers])
+
+        available_recovery = aals[pair_layers] - total_recoveries[:, pairs]
+        claim_recoveries = np.where(in_excess > 0,
+                                    np.minimum(claim_recoveries, available_recovery), 0)
+        total_recoveries[:, pairs] += claim_recoveries
+
+        aggregate_recoveries[:, claims[pair_claims] * nb_layers + pair_layers] = claim_recoveries
+    recoveries[aggregate] = np.moveaxis(
+        aggregate_recoveries.reshape((len(rows), rows.shape[1], nb_layers)), -1, 0).reshape(
+            (nb_layers,) + claim_amounts.shape)
+    return recoveries
 
 
 @dataclass
@@ -51,6 +146,57 @@ class ExcessOfLoss:
         self.recoveries = recoveries
         return self
 
+    def apply_batch(self, claim_amounts, sim_ids):  # pylint: disable=too-many-locals
+        """Apply the excess of loss treaty to the claims of many simulations at once.
+
+        The AAD and AAL are tracked per simulation: the claims are swept by rank within their
+        simulation (all first claims, then all second claims, ...) so that every step is
+        vectorized over the simulations while the floating point operations happen in the same
+        order as with apply_treaty.
+
+        The claim amounts may have leading axes, e.g. one row per development year: the rows are
+        priced independently, as many separate calls would, but in a single sweep.
+
+        Args:
+            claim_amounts (np.ndarray): The claim amounts, claims being on the last axis and
+                claims of a simulation being contiguous.
+            sim_ids (np.ndarray): The simulation id of every claim.
+
+        Returns:
+            np.ndarray: The recoveries of every claim, with the shape of claim_amounts.
+        """
+        in_excess = np.maximum(np.asarray(claim_amounts, dtype=float) - self.deductible, 0)
+        if not self.aad and not self.aal:
+            return np.minimum(in_excess, self.limit)
+
+        simulation, nb_simulations, ranks = _claims_by_rank(np.asarray(sim_ids))
+        state_shape = in_excess.shape[:-1] + (nb_simulations,)
+        available_aad = np.full(state_shape, float(self.aad or 0))
+        total_recoveries = np.zeros(state_shape)
+        recoveries = np.zeros(in_excess.shape)
+        row_axes = tuple(range(in_excess.ndim - 1))
+        for claims in ranks:
+            # Claims below the deductible in every row leave the aggregate state untouched.
+            claims = claims[np.any(in_excess[..., claims] > 0, axis=row_axes)]
+            sims = simulation[claims]
+            claim_amount_in_excess = in_excess[..., claims]
+
+            if self.aad:
+                aad = available_aad[..., sims]
+                available_aad[..., sims] = np.maximum(aad - claim_amount_in_excess, 0)
+                claim_amount_in_excess = np.maximum(claim_amount_in_excess - aad, 0)
+
+            claim_recoveries = np.minimum(claim_amount_in_excess, self.limit)
+
+            if self.aal:
+                available_recovery = self.aal - total_recoveries[..., sims]
+                claim_recoveries = np.where(in_excess[..., claims] > 0,
+                                            np.minimum(claim_recoveries, available_recovery), 0)
+                total_recoveries[..., sims] += claim_recoveries
+
+            recoveries[..., claims] = claim_recoveries
+        return recoveries
+
 @dataclass
 class QuotaShare:
     """Class representing a quota share treaty."""
@@ -74,5 +220,146 @@ class QuotaShare:
         self.recoveries = claim_amount * self.share
         return self
 
+    def apply_batch(self, claim_amounts, sim_ids):  # pylint: disable=unused-argument
+        """Apply the quota share treaty to the claims of many simulations at once.
+
+        Args:
+            claim_amounts (np.ndarray): The claim amounts, claims being on the last axis.
+            sim_ids (np.ndarray): The simulation id of every claim, unused by a quota share.
+
+        Returns:
+            np.ndarray: The recoveries of every claim, with the shape of claim_amounts.
+        """
+        return np.asarray(claim_amounts, dtype=float) * self.share
+
+
+@dataclass
+class TreatyProgram:
+    """Class representing a program of layers applied to the same claims.
+
+    Every layer is a dict with a 'name', a 'type' (a treaty class or its name in treaties_map),
+    'parameters' and optionally 'net_of', the names of the earlier layers inuring to its
+    benefit: the layer applies to the claims net of their recoveries, e.g. an excess of loss
+    tower protecting the retention of a quota share. An excess of loss layer without a
+    deductible is stacked on the previous excess of loss layer, its deductible being the
+    deductible plus the limit of that layer.
+    """
+
+    layers: list
+
+    def __post_init__(self):
+        """Resolve the layer types, stacked deductibles and inuring layers."""
+        self._layers = []
+        positions = {}
+        previous_excess_of_loss = None
+        for layer in self.layers:
+            name, treaty_type = layer['name'], layer['type']
+            treaty_type = treaties_map.get(treaty_type, treaty_type)
+            if treaty_type not in treaties_map.values():
+                raise ValueError(f'Unknown treaty type {treaty_type!r} for layer {name!r}.')
+            if name in positions:
+                raise ValueError(f'The layer name {name!r} is used twice.')
+            parameters = dict(layer.get('parameters', {}))
+            if treaty_type is ExcessOfLoss:
+                if 'deductible' not in parameters:
+                    if previous_excess_of_loss is None:
+                        raise ValueError(f'The layer {name!r} has no deductible and no layer '
+                                         'below it.')
+                    parameters['deductible'] = (previous_excess_of_loss.deductible
+                                                + previous_excess_of_loss.limit)
+                previous_excess_of_loss = ExcessOfLoss(**parameters)
+            unknown = [inuring for inuring in layer.get('net_of', ()) if inuring not in positions]
+            if unknown:
+                raise ValueError(f'The layer {name!r} is net of {unknown}, which are not '
+                                 'earlier layers of the program.')
+            net_of = tuple(positions[inuring] for inuring in layer.get('net_of', ()))
+            positions[name] = len(self._layers)
+            self._layers += [(name, treaty_type, parameters, net_of)]
+        self.recoveries = np.zeros(len(self._layers))
+        self._treaties = None
+
+    @property
+    def layer_names(self):
+        """list[str]: The names of the layers, in the order of their recoveries."""
+        return [name for name, _, _, _ in self._layers]
+
+    def apply_treaty(self, claim_amount):
+        """Apply every layer of the program to a claim.
+
+        The layers keep their aggregate deductible and limit across the claims of the
+        simulation, as separate treaties would.
+
+        Args:
+            claim_amount (float): The claim amount.
+
+        Returns:
+            TreatyProgram: The updated TreatyProgram object, with the recoveries of every layer.
+        """
+        if self._treaties is None:
+            self._treaties = [treaty_type(**parameters)
+                              for _, treaty_type, parameters, _ in self._layers]
+        recoveries = np.zeros(len(self._layers))
+        for index, (_, _, _, net_of) in enumerate(self._layers):
+            net_amount = claim_amount
+            for inuring in net_of:
+                net_amount -= recoveries[inuring]
+            recoveries[index] = self._treaties[index].apply_treaty(net_amount).recoveries
+        self.recoveries = recoveries
+        return self
+
+    def _layer_groups(self):
+        """Yield the inuring layers of a group of layers and the indices of the group.
+
+        The layers are yielded in waves, a layer joining the first wave after its inuring
+        layers, and the layers of a wave are grouped by inuring layers.
+        """
+        remaining = list(range(len(self._layers)))
+        while remaining:
+            done = set(range(len(self._layers))) - set(remaining)
+            wave = [index for index in remaining if done.issuperset(self._layers[index][3])]
+            remaining = [index for index in remaining if index not in wave]
+            for net_of in dict.fromkeys(self._layers[index][3] for index in wave):
+                yield net_of, [index for index in wave if self._layers[index][3] == net_of]
+
+    def apply_batch(self, claim_amounts, sim_ids):
+        """Apply every layer of the program to the claims of many simulations at once.
+
+        The layers are evaluated in waves, a layer joining the first wave after its inuring
+        layers. Within a wave, the excess of loss layers applying to the same net claims share
+        a single sweep of the claims, with an aggregate deductible and limit per layer and
+        simulation.
+
+        Args:
+            claim_amounts (np.ndarray): The claim amounts, claims being on the last axis and
+                claims of a simulation being contiguous.
+            sim_ids (np.ndarray): The simulation id of every claim.
+
+        Returns:
+            np.ndarray: The recoveries, with one row per layer followed by the shape of
+                claim_amounts.
+        """
+        claim_amounts = np.asarray(claim_amounts, dtype=float)
+        recoveries = np.empty((len(self._layers),) + claim_amounts.shape)
+        for net_of, group in self._layer_groups():
+            net_amounts = claim_amounts
+            for inuring in net_of:
+                net_amounts = net_amounts - recoveries[inuring]
+            excess_of_loss = []
+            for index in group:
+                _, treaty_type, parameters, _ = self._layers[index]
+                if treaty_type is ExcessOfLoss:
+                    excess_of_loss += [index]
+                else:
+                    recoveries[index] = treaty_type(**parameters).apply_batch(net_amounts, sim_ids)
+            if excess_of_loss:
+                treaties = [ExcessOfLoss(**self._layers[index][2]) for index in excess_of_loss]
+                recoveries[excess_of_loss] = _excess_of_loss_layers(
+                    net_amounts, sim_ids, [treaty.deductible for treaty in treaties],
+                    [treaty.limit for treaty in treaties],
+                    [treaty.aad or 0 for treaty in treaties],
+                    [treaty.aal or 0 for treaty in treaties])
+        return recoveries
+
+
 treaties_map = {'xs': ExcessOfLoss, 'qs': QuotaShare}
 
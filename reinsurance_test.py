@@ -1,8 +1,9 @@
 """
-This module provides a class for testing the ExcessOfLoss class.
+This module provides classes for testing the ExcessOfLoss, QuotaShare and TreatyProgram classes.
 """
 import unittest
-from reinsurance import ExcessOfLoss # pylint: disable=import-error
+import numpy as np
+from reinsurance import ExcessOfLoss, QuotaShare, TreatyProgram # pylint: disable=import-error
 
 
 class ExcessOfLossTests(unittest.TestCase):
@@ -130,5 +131,145 @@ class ExcessOfLossTests(unittest.TestCase):
         self.assertEqual(excess_loss.total_recoveries, 2e6)
 
 
+class ApplyBatchTests(unittest.TestCase):
+    """Test cases checking apply_batch against the scalar apply_treaty."""
+
+    @staticmethod
+    def apply_scalar(treaty_type, parameters, claim_amounts, sim_ids):
+        """Apply a fresh treaty per simulation, one claim at a time."""
+        recoveries = []
+        treaty = treaty_type(**parameters)
+        previous_sim_id = sim_ids[0] if len(sim_ids) else None
+        for claim_amount, sim_id in zip(claim_amounts, sim_ids):
+            if sim_id != previous_sim_id:
+                treaty = treaty_type(**parameters)
+                previous_sim_id = sim_id
+            recoveries += [treaty.apply_treaty(claim_amount).recoveries]
+        return np.array(recoveries, dtype=float)
+
+    def assert_matches_scalar(self, treaty_type, parameters, claim_amounts, sim_ids):
+        """Assert that apply_batch reproduces the scalar recoveries exactly."""
+        expected = self.apply_scalar(treaty_type, parameters, claim_amounts, sim_ids)
+        recoveries = treaty_type(**parameters).apply_batch(claim_amounts, sim_ids)
+        self.assertTrue(np.array_equal(recoveries, expected))
+
+    def test_apply_batch_sequences(self):
+        """Test the claim sequences of the scalar test cases within two simulations."""
+        claim_amounts = np.array([5e6, 8e6, 8e6, 20e6, 8e6, 1, 15e6, 8e6])
+        sim_ids = np.array([0, 0, 0, 1, 1, 1, 1, 1])
+        for aad in (None, 0, 2e6):
+            for aal in (None, 0, 15e6):
+                with self.subTest(aad=aad, aal=aal):
+                    self.assert_matches_scalar(
+                        ExcessOfLoss,
+                        {'deductible': 1e6, 'limit': 10e6, 'aad': aad, 'aal': aal},
+                        claim_amounts, sim_ids)
+
+    def test_apply_batch_random_claims(self):
+        """Test random Pareto claims over many simulations of varying sizes."""
+        generator = np.random.default_rng(0)
+        sim_ids = np.repeat(np.arange(2_000), np.maximum(generator.poisson(2, 2_000), 1))
+        claim_amounts = 2e6 * (1 - generator.random(len(sim_ids))) ** (-1 / 1.2)
+        claim_amounts[generator.random(len(sim_ids)) < 0.1] = 0
+        for aad in (0, 2e6):
+            for aal in (0, 12e6):
+                with self.subTest(aad=aad, aal=aal):
+                    self.assert_matches_scalar(
+                        ExcessOfLoss,
+                        {'deductible': 5e6, 'limit': 10e6, 'aad': aad, 'aal': aal},
+                        claim_amounts, sim_ids)
+        self.assert_matches_scalar(QuotaShare, {'share': 0.8}, claim_amounts, sim_ids)
+
+    def test_apply_batch_development_years(self):
+        """Test that development years priced in one sweep match separate calls."""
+        generator = np.random.default_rng(1)
+        sim_ids = np.repeat(np.arange(500), np.maximum(generator.poisson(2, 500), 1))
+        ultimate = 2e6 * (1 - generator.random(len(sim_ids))) ** (-1 / 1.2)
+        claim_amounts = ultimate * np.cumsum([0.3, 0.6, 0.1])[:, None]
+        excess_loss = ExcessOfLoss(deductible=5e6, limit=10e6, aad=2e6, aal=12e6)
+        recoveries = excess_loss.apply_batch(claim_amounts, sim_ids)
+        self.assertEqual(recoveries.shape, claim_amounts.shape)
+        for development_year, claim_amounts_year in enumerate(claim_amounts):
+            self.assertTrue(np.array_equal(recoveries[development_year],
+                                           excess_loss.apply_batch(claim_amounts_year, sim_ids)))
+
+    def test_apply_batch_empty(self):
+        """Test applying the treaty to no claims."""
+        excess_loss = ExcessOfLoss(deductible=1e6, limit=10e6, aad=2e6, aal=15e6)
+        self.assertEqual(len(excess_loss.apply_batch(np.array([]), np.array([]))), 0)
+
+
+class TreatyProgramTests(unittest.TestCase):
+    """Test cases for the TreatyProgram class."""
+
+    LAYERS = [
+        {'name': 'qs', 'type': 'qs', 'parameters': {'share': 0.2}},
+        {'name': 'xs 1', 'type': 'xs', 'net_of': ['qs'],
+         'parameters': {'deductible': 2e6, 'limit': 3e6}},
+        {'name': 'xs 2', 'type': 'xs', 'net_of': ['qs'],
+         'parameters': {'limit': 10e6, 'aad': 1e6, 'aal': 15e6}},
+        {'name': 'xs 3', 'type': ExcessOfLoss, 'net_of': ['qs'],
+         'parameters': {'limit': 20e6, 'aal': 20e6}},
+        {'name': 'cat', 'type': 'xs', 'net_of': ['qs', 'xs 1', 'xs 2'],
+         'parameters': {'deductible': 1e6, 'limit': 5e6, 'aad': 2e6}},
+        {'name': 'gross xs', 'type': 'xs', 'parameters': {'deductible': 5e6, 'limit': 10e6}},
+    ]
+
+    def setUp(self):
+        generator = np.random.default_rng(2)
+        self.sim_ids = np.repeat(np.arange(1_000), np.maximum(generator.poisson(3, 1_000), 1))
+        self.claim_amounts = 2e6 * (1 - generator.random(len(self.sim_ids))) ** (-1 / 1.2)
+
+    def test_stacked_deductibles(self):
+        """Test that layers without a deductible are stacked on the previous layer."""
+        program = TreatyProgram(self.LAYERS)
+        self.assertEqual(program.layer_names, ['qs', 'xs 1', 'xs 2', 'xs 3', 'cat', 'gross xs'])
+        self.assertEqual([parameters.get('deductible') for _, _, parameters, _
+                          in program._layers[1:4]], [2e6, 5e6, 15e6])  # pylint: disable=protected-access
+
+    def test_matches_apply_treaty(self):
+        """Test that the fused evaluation matches the layers applied one claim at a time."""
+        recoveries = TreatyProgram(self.LAYERS).apply_batch(self.claim_amounts, self.sim_ids)
+        expected = ApplyBatchTests.apply_scalar(TreatyProgram, {'layers': self.LAYERS},
+                                                self.claim_amounts, self.sim_ids)
+        self.assertTrue(np.array_equal(recoveries, expected.T))
+
+    def test_matches_separate_treaties(self):
+        """Test that every layer matches a separate treaty applied to the net claims."""
+        recoveries = TreatyProgram(self.LAYERS).apply_batch(self.claim_amounts, self.sim_ids)
+        net_amounts = self.claim_amounts - recoveries[0]
+        for index, parameters in ((1, {'deductible': 2e6, 'limit': 3e6}),
+                                  (2, {'deductible': 5e6, 'limit': 10e6, 'aad': 1e6,
+                                       'aal': 15e6}),
+                                  (3, {'deductible': 15e6, 'limit': 20e6, 'aal': 20e6})):
+            self.assertTrue(np.array_equal(
+                recoveries[index],
+                ExcessOfLoss(**parameters).apply_batch(net_amounts, self.sim_ids)))
+        self.assertTrue(np.array_equal(
+            recoveries[4], ExcessOfLoss(deductible=1e6, limit=5e6, aad=2e6).apply_batch(
+                net_amounts - recoveries[1] - recoveries[2], self.sim_ids)))
+
+    def test_development_years(self):
+        """Test that development years priced in one sweep match separate calls."""
+        program = TreatyProgram(self.LAYERS)
+        claim_amounts = self.claim_amounts * np.cumsum([0.3, 0.6, 0.1])[:, None]
+        recoveries = program.apply_batch(claim_amounts, self.sim_ids)
+        self.assertEqual(recoveries.shape, (len(self.LAYERS),) + claim_amounts.shape)
+        for development_year, claim_amounts_year in enumerate(claim_amounts):
+            self.assertTrue(np.array_equal(recoveries[:, development_year],
+                                           program.apply_batch(claim_amounts_year, self.sim_ids)))
+
+    def test_invalid_layers(self):
+        """Test the validation of the layers."""
+        for layers in ([{'name': 'xs', 'type': 'xs', 'parameters': {'limit': 1e6}}],
+                       [{'name': 'xs', 'type': 'xs', 'net_of': ['qs'],
+                         'parameters': {'deductible': 1e6, 'limit': 1e6}}],
+                       [{'name': 'qs', 'type': 'qs', 'parameters': {'share': 0.2}}] * 2,
+                       [{'name': 'sl', 'type': 'stop loss', 'parameters': {}}]):
+            with self.subTest(layers=layers):
+                with self.assertRaises(ValueError):
+                    TreatyProgram(layers)
+
+
 if __name__ == '__main__':
     unittest.main()
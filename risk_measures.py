@@ -0,0 +1,218 @@
+"""
+This module computes risk measures of simulated annual recoveries and their Monte Carlo error.
+
+The available functions are:
+- value_and_tail_value_at_risk(values, levels): Compute the VaR and TVaR at several confidence
+  levels from a single partial sort.
+- weighted_value_and_tail_value_at_risk(values, weights, levels): Compute the VaR and TVaR of
+  weighted simulations, e.g. drawn by importance sampling.
+- standard_errors(values, cost_of_capital, level=0.99, method='batch_means', ...): Estimate the
+  standard errors of the average loss, TVaR and premium.
+- batch_means_error(batch_statistics): Compute the standard error of a statistic from its
+  values on independent batches.
+
+The simulations are on the last axis of the values, every leading axis (treaty, development
+year, ...) being processed at once. The VaR is interpolated as pandas' quantile and the TVaR is
+the average of the values greater than or equal to the VaR.
+
+"""
+import math
+import numpy as np
+
+# Maximal number of values resampled at once by the bootstrap.
+BLOCK_SIZE = 10_000_000
+
+
+def _quantile_positions(nb_values, level):
+    """Return the sorted indices surrounding a quantile and the interpolation fraction."""
+    position = (nb_values - 1) * level
+    lower = math.floor(position)
+    return lower, min(lower + 1, nb_values - 1), position - lower
+
+
+def value_and_tail_value_at_risk(values, levels):  # pylint: disable=too-many-locals
+    """
+    Compute the VaR and TVaR at several confidence levels.
+
+    The values are partially sorted once around the indices of every level. Only the values
+    above the lowest VaR are then scanned for the TVaR, the values below it being read only
+    when they tie with the VaR.
+
+    Args:
+        values (np.ndarray): The values, simulations being on the last axis.
+        levels (float | list[float]): The confidence levels.
+
+    Returns:
+        tuple[np.ndarray]: The VaR and the TVaR, with one row per level followed by the leading
+            axes of values.
+    """
+    values = np.asarray(values, dtype=float)
+    levels = np.atleast_1d(levels)
+    shape = values.shape[:-1]
+    values = values.reshape(-1, values.shape[-1])
+
+    positions = [_quantile_positions(values.shape[-1], level) for level in levels]
+    kth = sorted({index for lower, upper, _ in positions for index in (lower, upper)})
+    selected = np.partition(values, kth, axis=-1)
+    first = kth[0]
+    top, boundary = selected[:, first:], selected[:, first]
+
+    value_at_risk = np.empty((len(levels), len(values)))
+    tail_value_at_risk = np.empty((len(levels), len(values)))
+    for index, (lower, upper, fraction) in enumerate(positions):
+        value_at_risk[index] = selected[:, lower] + (
+            selected[:, upper] - selected[:, lower]) * fraction
+        in_tail = top >= value_at_risk[index, :, None]
+        tail_sum = np.sum(top, axis=-1, where=in_tail)
+        tail_count = in_tail.sum(axis=-1)
+        # The values before the first selected index are at most the boundary, they are in the
+        # tail only when the VaR equals the boundary.
+        ties = np.flatnonzero(value_at_risk[index] <= boundary)
+        if len(ties) and first:
+            nb_ties = np.count_nonzero(
+                selected[ties, :first] >= value_at_risk[index, ties, None], axis=-1)
+            tail_sum[ties] += nb_ties * value_at_risk[index, ties]
+            tail_count[ties] += nb_ties
+        tail_value_at_risk[index] = tail_sum / tail_count
+
+    return (value_at_risk.reshape((len(levels),) + shape),
+            tail_value_at_risk.reshape((len(levels),) + shape))
+
+
+def weighted_value_and_tail_value_at_risk(values, weights, levels):  # pylint: disable=too-many-locals
+    """
+    Compute the VaR and TVaR at several confidence levels of weighted simulations.
+
+    The VaR is interpolated as in value_and_tail_value_at_risk, the position of every sorted
+    value being the weight of the values before it instead of their number, and the TVaR is
+    the weighted average of the values greater than or equal to the VaR. Equal weights
+    therefore give the unweighted VaR and TVaR. The values are fully sorted, as the weights
+    do not allow a partial sort.
+
+    Args:
+        values (np.ndarray): The values, simulations being on the last axis.
+        weights (np.ndarray): The weight of every simulation, broadcast against values.
+        levels (float | list[float]): The confidence levels.
+
+    Returns:
+        tuple[np.ndarray]: The VaR and the TVaR, with one row per level followed by the leading
+            axes of values.
+    """
+    values = np.asarray(values, dtype=float)
+    order = np.argsort(values, axis=-1)
+    values = np.take_along_axis(values, order, axis=-1)
+    weights = np.take_along_axis(np.broadcast_to(weights, values.shape), order, axis=-1)
+    cumulative_weights = np.cumsum(weights, axis=-1)
+    total_weights = cumulative_weights[..., -1:]
+    # Position of every sorted value, the weight of the values before it, from 0 to the
+    # position of the last value.
+    positions = cumulative_weights - weights
+    # Weights and weighted sums of the sorted values from every index onwards.
+    tail_weights = total_weights - cumulative_weights + weights
+    tail_sums = np.cumsum((weights * values)[..., ::-1], axis=-1)[..., ::-1]
+
+    value_at_risk, tail_value_at_risk = [], []
+    for level in np.atleast_1d(levels):
+        position = level * positions[..., -1:]
+        lower = np.maximum(np.sum(positions <= position, axis=-1, keepdims=True) - 1, 0)
+        upper = np.minimum(lower + 1, values.shape[-1] - 1)
+        lower_position = np.take_along_axis(positions, lower, axis=-1)
+        gap = np.take_along_axis(positions, upper, axis=-1) - lower_position
+        fraction = np.divide(position - lower_position, gap, out=np.zeros_like(gap),
+                             where=gap > 0)
+        lower_value = np.take_along_axis(values, lower, axis=-1)
+        level_value_at_risk = lower_value + (
+            np.take_along_axis(values, upper, axis=-1) - lower_value) * fraction
+        first = np.sum(values < level_value_at_risk, axis=-1, keepdims=True)
+        value_at_risk += [level_value_at_risk[..., 0]]
+        tail_value_at_risk += [(np.take_along_axis(tail_sums, first, axis=-1)
+                                / np.take_along_axis(tail_weights, first, axis=-1))[..., 0]]
+    return np.array(value_at_risk), np.array(tail_value_at_risk)
+
+
+def batch_means_error(batch_statistics, axis=-1):
+    """
+    Compute the standard error of a statistic from its values on independent batches.
+
+    Args:
+        batch_statistics (np.ndarray): The statistic of every batch.
+        axis (int, optional): The axis of the batches. Defaults to -1.
+
+    Returns:
+        np.ndarray: The standard error of the statistic on the union of the batches.
+    """
+    nb_batches = np.shape(batch_statistics)[axis]
+    return np.std(batch_statistics, axis=axis, ddof=1) / math.sqrt(nb_batches)
+
+
+def _pricing_statistics(samples, cost_of_capital, level, weights=None):
+    """Compute the average loss, TVaR and premium of samples on the last axis."""
+    if weights is None:
+        average_loss = samples.mean(axis=-1)
+        tail_value_at_risk = value_and_tail_value_at_risk(samples, level)[1][0]
+    else:
+        average_loss = np.sum(samples * weights, axis=-1) / np.sum(weights, axis=-1)
+        tail_value_at_risk = weighted_value_and_tail_value_at_risk(samples, weights, level)[1][0]
+    premium = average_loss + (tail_value_at_risk - average_loss) * cost_of_capital
+    return {'average_loss': average_loss, 'TVaR': tail_value_at_risk, 'premium': premium}
+
+
+def standard_errors(values, cost_of_capital, level=0.99, method='batch_means', nb_batches=32,  # pylint: disable=too-many-arguments
+                    seed=0, weights=None) -> dict:
+    """
+    Estimate the standard errors of the average loss, TVaR and premium.
+
+    With 'batch_means' the simulations are split into nb_batches contiguous batches of equal
+    size, the remaining simulations being left out, and the spread of the statistics of the
+    batches gives the standard errors. With 'bootstrap' the simulations are resampled with
+    replacement nb_batches times.
+
+    Args:
+        values (np.ndarray): The annual recoveries, simulations being on the last axis.
+        cost_of_capital (float): The cost of capital used in the premium formula.
+        level (float, optional): The confidence level of the TVaR. Defaults to 0.99.
+        method (str, optional): 'batch_means' or 'bootstrap'. Defaults to 'batch_means'.
+        nb_batches (int, optional): The number of batches or resamples. Defaults to 32.
+        seed (int, optional): The seed of the bootstrap resamples. Defaults to 0.
+        weights (np.ndarray, optional): The weight of every simulation of the last axis of
+            values, the statistics being weighted as in
+            weighted_value_and_tail_value_at_risk. Defaults to None.
+
+    Returns:
+        dict[str, np.ndarray]: The standard errors of 'average_loss', 'TVaR' and 'premium',
+            with the leading axes of values.
+
+    Raises:
+        ValueError: If the method is unknown or there are fewer simulations than batches.
+    """
+    values = np.asarray(values, dtype=float)
+    nb_values = values.shape[-1]
+    if nb_batches < 2 or nb_values < nb_batches:
+        raise ValueError(f'Cannot estimate standard errors with {nb_batches} batches of '
+                         f'{nb_values} simulations.')
+
+    if method == 'batch_means':
+        batch_size = nb_values // nb_batches
+        samples = values[..., :batch_size * nb_batches].reshape(
+            values.shape[:-1] + (nb_batches, batch_size))
+        if weights is not None:
+            weights = np.asarray(weights)[:batch_size * nb_batches].reshape(nb_batches,
+                                                                            batch_size)
+        return {name: batch_means_error(statistic) for name, statistic
+                in _pricing_statistics(samples, cost_of_capital, level, weights).items()}
+
+    if method == 'bootstrap':
+        generator = np.random.default_rng(seed)
+        block = max(1, BLOCK_SIZE // max(1, values.size))
+        resamples = []
+        for first in range(0, nb_batches, block):
+            indices = generator.integers(nb_values, size=(min(block, nb_batches - first),
+                                                          nb_values))
+            resamples += [_pricing_statistics(
+                values[..., indices], cost_of_capital, level,
+                None if weights is None else np.asarray(weights)[indices])]
+        return {name: np.std(np.concatenate([resample[name] for resample in resamples],
+                                            axis=-1), axis=-1, ddof=1)
+                for name in resamples[0]}
+
+    raise ValueError(f'Unknown standard error method {method!r}.')
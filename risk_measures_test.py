@@ -0,0 +1,107 @@
+"""
+This module provides classes for testing the risk measures and their standard errors.
+"""
+import unittest
+import numpy as np
+import pandas as pd
+from risk_measures import (value_and_tail_value_at_risk, standard_errors,  # pylint: disable=import-error
+                           weighted_value_and_tail_value_at_risk)
+
+LEVELS = [0.9, 0.99, 0.995, 0.999]
+
+
+class ValueAndTailValueAtRiskTests(unittest.TestCase):
+    """Test cases for the value_and_tail_value_at_risk function."""
+
+    def assert_matches_pandas(self, values):
+        """Assert that every row and level matches pandas' quantile and a boolean filter."""
+        value_at_risk, tail_value_at_risk = value_and_tail_value_at_risk(values, LEVELS)
+        self.assertEqual(value_at_risk.shape, (len(LEVELS),) + values.shape[:-1])
+        for index, level in enumerate(LEVELS):
+            for row in np.ndindex(values.shape[:-1]):
+                expected = pd.Series(values[row]).quantile(level)
+                self.assertAlmostEqual(value_at_risk[index][row], expected)
+                self.assertAlmostEqual(tail_value_at_risk[index][row],
+                                       values[row][values[row] >= expected].mean())
+
+    def test_continuous_values(self):
+        """Test rows of values without ties, with several leading axes."""
+        self.assert_matches_pandas(np.random.default_rng(0).pareto(1.2, (2, 3, 2_001)))
+
+    def test_ties(self):
+        """Test rows of mostly zero values, the VaR falling on repeated values."""
+        values = np.zeros((3, 1_000))
+        values[0, :5] = 1.0
+        values[1, :150] = 2.0
+        values[2, :995] = 3.0
+        self.assert_matches_pandas(values)
+
+    def test_single_row(self):
+        """Test values without leading axes."""
+        value_at_risk, tail_value_at_risk = value_and_tail_value_at_risk(np.arange(101.0), 0.9)
+        self.assertEqual(value_at_risk.tolist(), [90.0])
+        self.assertEqual(tail_value_at_risk.tolist(), [95.0])
+
+
+class WeightedValueAndTailValueAtRiskTests(unittest.TestCase):
+    """Test cases for the weighted_value_and_tail_value_at_risk function."""
+
+    def test_unit_weights_match_the_unweighted_measures(self):
+        """Test that unit weights give the VaR and TVaR of value_and_tail_value_at_risk."""
+        values = np.random.default_rng(0).pareto(1.2, (2, 1_000))
+        value_at_risk, tail_value_at_risk = weighted_value_and_tail_value_at_risk(
+            values, np.ones(1_000), LEVELS)
+        expected_value_at_risk, expected_tail_value_at_risk = value_and_tail_value_at_risk(
+            values, LEVELS)
+        self.assertTrue(np.array_equal(value_at_risk, expected_value_at_risk))
+        self.assertTrue(np.allclose(tail_value_at_risk, expected_tail_value_at_risk,
+                                    rtol=1e-12, atol=0))
+
+    def test_tail_of_the_weighted_value_at_risk(self):
+        """Test that the TVaR is the weighted average of the values from the VaR on."""
+        generator = np.random.default_rng(0)
+        values = generator.pareto(1.2, (2, 3_000))
+        weights = generator.uniform(0.5, 3, 3_000)
+        value_at_risk, tail_value_at_risk = weighted_value_and_tail_value_at_risk(
+            values, weights, LEVELS)
+        for row, row_values in enumerate(values):
+            for index, level in enumerate(LEVELS):
+                in_tail = row_values >= value_at_risk[index, row]
+                self.assertAlmostEqual(tail_value_at_risk[index, row], np.average(
+                    row_values[in_tail], weights=weights[in_tail]))
+                share = weights[row_values <= value_at_risk[index, row]].sum() / weights.sum()
+                self.assertAlmostEqual(share, level, delta=0.002)
+
+    def test_weighted_standard_errors(self):
+        """Test that unit weights give the standard errors of the unweighted average loss."""
+        values = np.random.default_rng(1).exponential(1.0, (2, 6_400))
+        weighted = standard_errors(values, 0.08, weights=np.ones(6_400))
+        unweighted = standard_errors(values, 0.08)
+        self.assertTrue(np.allclose(weighted['average_loss'], unweighted['average_loss']))
+
+
+class StandardErrorsTests(unittest.TestCase):
+    """Test cases for the standard_errors function."""
+
+    values = np.random.default_rng(1).exponential(1.0, (2, 64_000))
+
+    def test_average_loss(self):
+        """Test that the error of the average loss is close to sigma / sqrt(n)."""
+        for method in ('batch_means', 'bootstrap'):
+            with self.subTest(method=method):
+                errors = standard_errors(self.values, 0.08, method=method, nb_batches=64)
+                self.assertTrue(np.allclose(errors['average_loss'], 1 / np.sqrt(64_000),
+                                            rtol=0.35))
+                self.assertTrue(np.all(errors['TVaR'] > errors['average_loss']))
+                self.assertEqual(errors['premium'].shape, (2,))
+
+    def test_invalid_arguments(self):
+        """Test that unknown methods and too few simulations are rejected."""
+        with self.assertRaises(ValueError):
+            standard_errors(self.values, 0.08, method='jackknife')
+        with self.assertRaises(ValueError):
+            standard_errors(self.values[:, :10], 0.08, nb_batches=32)
+
+
+if __name__ == '__main__':
+    unittest.main()
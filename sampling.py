@@ -0,0 +1,141 @@
+"""
+This module provides the uniforms of the variance reduction methods of the claim generator.
+
+The available functions are:
+- antithetic_uniforms(size, generator): Draw uniforms in antithetic pairs.
+- scrambled_halton(size, dimensions, generator): Draw a randomly scrambled Halton point set.
+- severity_uniforms(method, nb_claims, generator, points=None): Draw the uniforms of the
+  severities of every claim, antithetic or quasi-random between claims of the same rank.
+- importance_uniforms(size, generator, tail_probability, tail_share): Draw uniforms
+  oversampling the top of the unit interval, with their likelihood ratios.
+
+The uniforms are turned into frequencies and severities by the inverse CDF of the
+distributions, so every method applies to any distribution with a quantile function.
+
+"""
+import math
+import numpy as np
+
+PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71, 73, 79,
+          83, 89, 97)
+
+
+def antithetic_uniforms(size, generator) -> np.ndarray:
+    """
+    Draw uniforms in antithetic pairs.
+
+    Args:
+        size (int): The number of uniforms.
+        generator (np.random.Generator): The random number generator to draw from.
+
+    Returns:
+        np.ndarray: The uniforms, every odd index being one minus the previous one. The last
+            uniform of an odd size is independent.
+    """
+    uniforms = generator.random(size)
+    uniforms[1::2] = 1 - uniforms[0::2][:size // 2]
+    return uniforms
+
+
+def scrambled_halton(size, dimensions, generator) -> np.ndarray:
+    """
+    Draw a randomly scrambled Halton point set.
+
+    The digits of the radical inverse of every dimension are permuted with an independent
+    random permutation per digit position, and the point is shifted uniformly within its last
+    digit cell, so every point is uniform on the unit hypercube while the set keeps the low
+    discrepancy of the Halton sequence.
+
+    Args:
+        size (int): The number of points.
+        dimensions (int): The number of dimensions, at most 25.
+        generator (np.random.Generator): The random number generator of the scrambling.
+
+    Returns:
+        np.ndarray: The points, with one row per point and one column per dimension.
+
+    Raises:
+        ValueError: If there are more dimensions than tabulated primes.
+    """
+    if dimensions > len(PRIMES):
+        raise ValueError(f'The Halton sequence is limited to {len(PRIMES)} dimensions.')
+    indices = np.arange(size, dtype=np.int64)
+    points = np.empty((size, dimensions))
+    for dimension, base in enumerate(PRIMES[:dimensions]):
+        nb_digits = max(1, math.ceil(math.log(max(size, 2)) / math.log(base)))
+        remainder = indices.copy()
+        values = np.zeros(size)
+        for digit in range(nb_digits):
+            values += generator.permutation(base)[remainder % base] / base ** (digit + 1)
+            remainder //= base
+        points[:, dimension] = values + generator.random(size) / base ** nb_digits
+    return points
+
+
+def severity_uniforms(method, nb_claims, generator, points=None) -> np.ndarray:
+    """
+    Draw the uniforms of the severities of every claim.
+
+    With 'antithetic', the claims of every odd simulation use one minus the uniforms of the
+    claims of the same rank in the previous simulation. With 'quasi', the claims use the
+    dimensions of the point of their simulation after the frequency one, the claims beyond
+    the dimensions of the points using independent uniforms.
+
+    Args:
+        method (str): 'antithetic' or 'quasi'.
+        nb_claims (np.ndarray): The number of claims of every simulation.
+        generator (np.random.Generator): The random number generator to draw from.
+        points (np.ndarray, optional): The quasi-random point of every simulation, the first
+            dimension being used by the frequency. Defaults to None.
+
+    Returns:
+        np.ndarray: The uniforms, the claims being ordered by simulation and rank.
+    """
+    first_claims = np.cumsum(nb_claims) - nb_claims
+    claim_sims = np.repeat(np.arange(len(nb_claims)), nb_claims)
+    claim_ranks = np.arange(len(claim_sims)) - first_claims[claim_sims]
+    uniforms = generator.random(len(claim_sims))
+
+    if method == 'antithetic':
+        partners = claim_sims - 1
+        paired = (claim_sims % 2 == 1) & (claim_ranks < nb_claims[partners])
+        uniforms[paired] = 1 - uniforms[first_claims[partners[paired]] + claim_ranks[paired]]
+    elif method == 'quasi':
+        in_points = claim_ranks < points.shape[1] - 1
+        uniforms[in_points] = points[claim_sims[in_points], 1 + claim_ranks[in_points]]
+    return uniforms
+
+
+def importance_uniforms(size, generator, tail_probability, tail_share) -> tuple:
+    """
+    Draw uniforms oversampling the top of the unit interval, with their likelihood ratios.
+
+    The uniforms are drawn from a defensive mixture: with probability tail_share from the top
+    tail_probability of the unit interval, otherwise from the whole interval. The likelihood
+    ratios are therefore bounded by 1 / (1 - tail_share).
+
+    Args:
+        size (int): The number of uniforms.
+        generator (np.random.Generator): The random number generator to draw from.
+        tail_probability (float): The length of the oversampled top of the unit interval.
+        tail_share (float): The probability of drawing from the oversampled top.
+
+    Returns:
+        tuple[np.ndarray]: The uniforms and the ratios of their density under the uniform
+            distribution to their density under the mixture.
+
+    Raises:
+        ValueError: If the tail probability is not in (0, 1], e.g. for a threshold at or beyond
+            the support of the severity, or the tail share is not in [0, 1).
+    """
+    if not 0 < tail_probability <= 1:
+        raise ValueError(f'The importance sampling threshold leaves a tail probability of '
+                         f'{tail_probability}, it must be in (0, 1].')
+    if not 0 <= tail_share < 1:
+        raise ValueError(f'The importance sampling tail share {tail_share} must be in [0, 1).')
+    uniforms = generator.random(size)
+    in_tail = generator.random(size) < tail_share
+    uniforms[in_tail] = 1 - tail_probability + tail_probability * uniforms[in_tail]
+    density = (1 - tail_share) + tail_share / tail_probability * (
+        uniforms >= 1 - tail_probability)
+    return uniforms, 1 / density
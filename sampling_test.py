@@ -0,0 +1,103 @@
+"""
+This module provides classes for testing the variance reduction methods.
+"""
+import unittest
+import numpy as np
+from config import config # pylint: disable=import-error
+from claims import generate_claims_batch, distribution_map # pylint: disable=import-error
+from main import simulate_claims, run_simulations, compute_statistics # pylint: disable=import-error
+from sampling import (antithetic_uniforms, scrambled_halton, severity_uniforms,  # pylint: disable=import-error
+                      importance_uniforms)
+
+
+class UniformsTests(unittest.TestCase):
+    """Test cases for the uniforms of the variance reduction methods."""
+
+    def test_antithetic_pairs(self):
+        """Test that every odd uniform is one minus the previous one."""
+        uniforms = antithetic_uniforms(7, np.random.default_rng(0))
+        self.assertTrue(np.allclose(uniforms[1::2], 1 - uniforms[0:6:2]))
+
+    def test_halton_stratification(self):
+        """Test that every dimension puts one point in every interval of its base."""
+        points = scrambled_halton(3 * 5 * 7, 4, np.random.default_rng(0))
+        self.assertTrue(np.all((points >= 0) & (points < 1)))
+        for dimension, base in enumerate((2, 3, 5)):
+            counts = np.bincount((points[:, dimension] * base).astype(int), minlength=base)
+            self.assertEqual(counts.max() - counts.min(), 0 if 105 % base == 0 else 1)
+
+    def test_severities_of_the_same_rank(self):
+        """Test that antithetic severities pair the claims of the same rank."""
+        nb_claims = np.array([2, 1, 0, 3])
+        uniforms = severity_uniforms('antithetic', nb_claims, np.random.default_rng(0))
+        self.assertEqual(len(uniforms), 6)
+        self.assertAlmostEqual(uniforms[2], 1 - uniforms[0])
+
+    def test_importance_weights(self):
+        """Test that the weighted uniforms keep the uniform distribution."""
+        uniforms, weights = importance_uniforms(200_000, np.random.default_rng(0), 0.01, 0.5)
+        self.assertAlmostEqual(np.mean(uniforms >= 0.99), 0.505, delta=0.005)
+        self.assertAlmostEqual(np.mean(weights), 1.0, delta=0.01)
+        self.assertAlmostEqual(np.mean(weights * (uniforms >= 0.99)), 0.01, delta=0.0005)
+
+    def test_invalid_importance_parameters(self):
+        """Test that an empty tail or a tail share of 1 are rejected."""
+        for tail_probability, tail_share in ((0.0, 0.5), (1.5, 0.5), (0.01, 1.0)):
+            with self.subTest(tail_probability=tail_probability, tail_share=tail_share):
+                with self.assertRaises(ValueError):
+                    importance_uniforms(10, np.random.default_rng(0), tail_probability,
+                                        tail_share)
+
+
+class VarianceReductionTests(unittest.TestCase):
+    """Test cases for the claims and statistics drawn with variance reduction."""
+
+    frequency = {'distribution': distribution_map['Poisson'], 'parameters': {'rate': 1}}
+    severity = {'distribution': distribution_map['Pareto'],
+                'parameters': {'shape': 1.2, 'scale': 2e6}}
+
+    def test_layer_average_loss(self):
+        """Test that every method estimates the average loss of a layer without bias."""
+        exact = 2e6 ** 1.2 / 0.2 * (5e6 ** -0.2 - 15e6 ** -0.2)
+        for method in ('antithetic', 'quasi', 'importance'):
+            with self.subTest(method=method):
+                claims = generate_claims_batch(
+                    50_000, self.frequency, self.severity, [1.0], seed=0,
+                    variance_reduction={'method': method, 'threshold': 5e6})
+                recoveries = np.minimum(np.maximum(claims.ultimate_amounts - 5e6, 0), 10e6)
+                weights = np.ones(50_000) if claims.weights is None else claims.weights
+                average_loss = np.sum(recoveries * weights[claims.sim_ids]) / weights.sum()
+                self.assertAlmostEqual(average_loss / exact, 1, delta=0.03)
+
+    def test_missing_quantile(self):
+        """Test that distributions without quantile function are rejected."""
+        with self.assertRaises(ValueError):
+            generate_claims_batch(10, self.frequency,
+                                  {'distribution': distribution_map['Gamma'],
+                                   'parameters': {'shape': 2, 'scale': 1}},
+                                  [1.0], variance_reduction={'method': 'quasi'})
+
+    def test_threshold_beyond_the_support(self):
+        """Test that a threshold the severities never exceed is rejected."""
+        severity = {'distribution': distribution_map['TruncatedPareto'],
+                    'parameters': {'shape': 1.2, 'scale': 2e6, 'truncation': 1e7}}
+        with self.assertRaises(ValueError):
+            generate_claims_batch(10, self.frequency, severity, [1.0],
+                                  variance_reduction={'method': 'importance', 'threshold': 2e7})
+
+    def test_importance_sampling_statistics(self):
+        """Test that the weighted statistics agree with plain Monte Carlo."""
+        simulations = {**config['simulations'], 'nb': 20_000, 'mode': 'batch', 'cache': {}}
+        importance = {**simulations, 'variance_reduction': {
+            'method': 'importance', 'threshold': 5e6, 'tail_share': 0.5}}
+        self.assertIsNotNone(simulate_claims(importance).weights)
+        plain, weighted = (
+            compute_statistics(run_simulations(sims, config['treaties'][1:2]), 0.08)
+            .set_index(['statistic', 'claimDevelopmentYear'])['value']
+            for sims in (simulations, importance))
+        for statistic in ('average_loss', 'TVaR', 'premium', 'average_payment_pattern'):
+            self.assertAlmostEqual(weighted[statistic, 2] / plain[statistic, 2], 1, delta=0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
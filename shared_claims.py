@@ -0,0 +1,118 @@
+"""
+This module shares a claim table between processes without copying it.
+
+The columns of the claim table are copied once into blocks of multiprocessing.shared_memory,
+described by a small picklable descriptor. Other processes attach to the blocks by name and
+rebuild the claim table on the shared buffers, every column being a read-only numpy view.
+
+Usage:
+    with SharedClaimTable(claims) as shared:
+        with ProcessPoolExecutor(initializer=attach_worker, initargs=(shared.descriptor,)):
+            ...  # the functions run by the workers read worker_claims()
+
+"""
+from multiprocessing import shared_memory
+import numpy as np
+from claims import ClaimTable  # pylint: disable=import-error
+
+# The attributes of the claim tables, in the order of the ClaimTable arguments.
+COLUMNS = ('sim_ids', 'claim_ids', 'ultimate_amounts', 'development_factors', 'weights')
+
+# The claim table of a worker process and the blocks holding its columns.
+_attached = None  # pylint: disable=invalid-name
+
+
+class SharedClaimTable:
+    """Class holding the columns of a claim table in shared memory."""
+
+    def __init__(self, claims):
+        """Copy the columns of a claim table into shared memory.
+
+        Args:
+            claims (ClaimTable): The claims.
+        """
+        self.blocks = []
+        self.descriptor = {}
+        try:
+            for column in COLUMNS:
+                values = getattr(claims, column)
+                if values is None:
+                    self.descriptor[column] = None
+                    continue
+                values = np.asarray(values)
+                block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                self.blocks += [block]
+                np.ndarray(values.shape, values.dtype, buffer=block.buf)[...] = values
+                self.descriptor[column] = (block.name, values.shape, values.dtype.str)
+        except BaseException:
+            self.close()
+            raise
+
+    @property
+    def nbytes(self):
+        """int: The size of the shared blocks in bytes."""
+        return sum(block.size for block in self.blocks)
+
+    def close(self):
+        """Release the shared blocks, the processes attached to them keep their mapping."""
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def attach(descriptor):
+    """
+    Attach to the columns of a shared claim table.
+
+    Args:
+        descriptor (dict): The descriptor of a SharedClaimTable.
+
+    Returns:
+        tuple: The claim table, whose columns are read-only views of the shared blocks, and the
+            blocks, which must be kept open as long as the claim table is used.
+    """
+    columns, blocks = [], []
+    for column in COLUMNS:
+        if descriptor[column] is None:
+            columns += [None]
+            continue
+        name, shape, dtype = descriptor[column]
+        block = shared_memory.SharedMemory(name=name)
+        blocks += [block]
+        values = np.ndarray(shape, dtype, buffer=block.buf)
+        values.flags.writeable = False
+        columns += [values]
+    return ClaimTable(*columns), blocks
+
+
+def attach_worker(descriptor):
+    """
+    Attach a worker process to a shared claim table, as the initializer of its pool.
+
+    Args:
+        descriptor (dict): The descriptor of a SharedClaimTable.
+    """
+    global _attached  # pylint: disable=global-statement
+    _attached = attach(descriptor)
+
+
+def worker_claims():
+    """
+    Get the claim table the worker process is attached to.
+
+    Returns:
+        ClaimTable: The shared claims.
+
+    Raises:
+        RuntimeError: If the process is not attached to a shared claim table.
+    """
+    if _attached is None:
+        raise RuntimeError('The process is not attached to a shared claim table.')
+    return _attached[0]
@@ -0,0 +1,63 @@
+"""
+This module provides classes for testing the shared claim tables.
+"""
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from claims import ClaimTable  # pylint: disable=import-error
+from shared_claims import SharedClaimTable, attach, attach_worker, worker_claims  # pylint: disable=import-error
+
+
+def total_claim_amounts(development_year):
+    """Sum the claim amounts of a development year of the shared claims."""
+    return float(worker_claims().claim_amounts(development_year).sum())
+
+
+class SharedClaimTableTests(unittest.TestCase):
+    """Test cases for the SharedClaimTable class."""
+
+    def setUp(self):
+        self.claims = ClaimTable.from_pattern(
+            np.array([0, 0, 1, 3]), np.array([0, 1, 0, 0]), np.array([1.0, 2.0, 3.0, 4.0]),
+            [0.5, 0.5])
+
+    def test_attach(self):
+        """Test that an attached claim table reads the shared columns without copying them."""
+        with SharedClaimTable(self.claims) as shared:
+            claims, blocks = attach(shared.descriptor)
+            self.assertTrue(np.array_equal(claims.claim_amounts(), self.claims.claim_amounts()))
+            self.assertTrue(np.array_equal(claims.sim_ids, self.claims.sim_ids))
+            self.assertIsNone(claims.weights)
+            self.assertFalse(claims.ultimate_amounts.flags.writeable)
+            self.assertFalse(claims.ultimate_amounts.flags.owndata)
+            del claims
+            for block in blocks:
+                block.close()
+        self.assertEqual(shared.blocks, [])
+
+    def test_weights(self):
+        """Test that the weights of the simulations are shared."""
+        self.claims.weights = np.array([0.5, 1.0, 1.5, 2.0])
+        with SharedClaimTable(self.claims) as shared:
+            claims, blocks = attach(shared.descriptor)
+            self.assertTrue(np.array_equal(claims.weights, self.claims.weights))
+            del claims
+            for block in blocks:
+                block.close()
+
+    def test_worker_pool(self):
+        """Test that the workers of a pool read the shared claims."""
+        with SharedClaimTable(self.claims) as shared, ProcessPoolExecutor(
+                max_workers=2, initializer=attach_worker,
+                initargs=(shared.descriptor,)) as executor:
+            totals = list(executor.map(total_claim_amounts, range(len(self.claims))))
+        self.assertEqual(totals, [5.0, 10.0])
+
+    def test_not_attached(self):
+        """Test that a process which is not attached cannot read shared claims."""
+        with self.assertRaises(RuntimeError):
+            worker_claims()
+
+
+if __name__ == '__main__':
+    unittest.main()
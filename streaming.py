@@ -0,0 +1,242 @@
+"""
+This module provides running aggregates for pricing simulations chunk by chunk.
+
+The available classes are:
+- TailBuffer: Keep the largest values of a sample, enough for its exact VaR and TVaR.
+- RunningStatistics: Accumulate the statistics of main.py over chunks of priced claims, with
+  their relative standard errors.
+
+Only sums, counts and a bounded tail buffer are kept per treaty and development year, so the
+memory used does not depend on the number of simulations. The standard errors are estimated by
+batch means, every chunk being a batch.
+
+"""
+import math
+import numpy as np
+import pandas as pd
+import risk_measures  # pylint: disable=import-error
+
+
+class TailBuffer:
+    """Class keeping the top values of a sample of known size."""
+
+    def __init__(self, size, level=0.99):
+        """Initialize an empty buffer.
+
+        Args:
+            size (int): The final size of the sample, or an upper bound of it.
+            level (float, optional): The lowest confidence level of the VaR. Defaults to 0.99.
+        """
+        self.size = size
+        self.level = level
+        # The linear interpolation of the quantile only reads the sorted values from index
+        # floor((size - 1) * level) onwards.
+        self.lower_index = math.floor((size - 1) * level)
+        self.capacity = size - self.lower_index
+        self.values = np.empty(0)
+        self.count = 0
+        # Number of discarded values equal to the smallest kept value, they belong to the tail
+        # when the VaR falls exactly on that value.
+        self.ties = 0
+
+    def update(self, values):
+        """Add a chunk of the sample to the buffer.
+
+        Args:
+            values (np.ndarray): The new values.
+        """
+        self.count += len(values)
+        combined = np.concatenate([self.values, np.asarray(values, dtype=float)])
+        nb_discarded = len(combined) - self.capacity
+        if nb_discarded <= 0:
+            self.values = combined
+            return
+
+        was_full = len(self.values) == self.capacity
+        previous_min = self.values.min() if was_full else None
+        combined = np.partition(combined, nb_discarded)
+        self.values, discarded = combined[nb_discarded:], combined[:nb_discarded]
+        new_min = self.values.min()
+        ties = self.ties if was_full and previous_min == new_min else 0
+        self.ties = ties + int(np.count_nonzero(discarded == new_min))
+
+    def value_at_risk(self, level=None):
+        """Compute the VaR of the sample, interpolated as pandas' quantile.
+
+        Args:
+            level (float, optional): The confidence level, at least that of the buffer.
+                Defaults to None, the level of the buffer.
+
+        Returns:
+            float: The VaR of the sample.
+        """
+        position = (self.count - 1) * (self.level if level is None else level)
+        # The kept values are the sorted sample from index count - len(values) onwards.
+        lower = math.floor(position) - (self.count - len(self.values))
+        upper = min(lower + 1, len(self.values) - 1)
+        values = np.partition(self.values, [lower, upper])
+        return values[lower] + (values[upper] - values[lower]) * (position - math.floor(position))
+
+    def tail_value_at_risk(self, level=None):
+        """Compute the TVaR of the sample, the average of the values above the VaR.
+
+        Args:
+            level (float, optional): The confidence level, at least that of the buffer.
+                Defaults to None, the level of the buffer.
+
+        Returns:
+            float: The TVaR of the sample.
+        """
+        value_at_risk = self.value_at_risk(level)
+        tail = self.values[self.values >= value_at_risk]
+        tail_sum, tail_count = tail.sum(), len(tail)
+        if self.ties and self.values.min() >= value_at_risk:
+            tail_sum += self.ties * self.values.min()
+            tail_count += self.ties
+        return tail_sum / tail_count
+
+
+class RunningStatistics:  # pylint: disable=too-many-instance-attributes
+    """Class accumulating the pricing statistics over chunks of simulations."""
+
+    def __init__(self, size, level=0.99, levels=(), standard_errors=False):
+        """Initialize empty aggregates.
+
+        Args:
+            size (int): The total number of simulations, or their maximal number when the
+                statistics are computed before every simulation is added.
+            level (float, optional): The confidence level of the VaR and TVaR used in the
+                premium formula. Defaults to 0.99.
+            levels (list[float], optional): Other confidence levels of the VaR and TVaR.
+                Defaults to ().
+            standard_errors (bool, optional): Whether to keep the average loss and TVaR of every
+                chunk for the standard errors. Defaults to False.
+        """
+        self.size = size
+        self.level = level
+        self.levels = [other_level for other_level in levels if other_level != level]
+        self.standard_errors = standard_errors
+        self.loss_sums = {}
+        self.tails = {}
+        self.batches = {}
+        self.pattern_sums = {}
+        self.pattern_counts = {}
+
+    def update(self, results):
+        """Add the priced claims of a chunk of simulations.
+
+        Args:
+            results (pd.DataFrame): The priced claims of complete simulations, as returned by
+                main.price_claims.
+
+        Raises:
+            ValueError: If the chunk brings the number of simulations above size, the tail
+                buffers being sized for at most size simulations.
+        """
+        recoveries_per_year = results.groupby(
+            ["treatyName", "claimDevelopmentYear", "simId"])["treatyRecoveries"].sum()
+        for key, count in recoveries_per_year.groupby(level=[0, 1]).size().items():
+            if key in self.tails:
+                count += self.tails[key].count
+            if count > self.size:
+                raise ValueError(f'{count} simulations of {key} exceed the {self.size} '
+                                 f'simulations the statistics were sized for.')
+        for key, recoveries in recoveries_per_year.groupby(level=[0, 1]):
+            if key not in self.tails:
+                self.loss_sums[key] = 0.0
+                self.tails[key] = TailBuffer(self.size, min([self.level] + self.levels))
+                self.batches[key] = []
+            self.loss_sums[key] += recoveries.sum()
+            self.tails[key].update(recoveries.to_numpy())
+            if self.standard_errors:
+                tail_value_at_risk = risk_measures.value_and_tail_value_at_risk(
+                    recoveries.to_numpy(), self.level)[1][0]
+                self.batches[key] += [(recoveries.mean(), tail_value_at_risk)]
+
+        total_recoveries = results.groupby(
+            ["treatyName", "simId", "claimId"])["treatyRecoveries"].transform("sum")
+        incurred = total_recoveries.astype(bool)
+        payment_pattern = (results["treatyRecoveries"][incurred]
+                           / total_recoveries[incurred]).groupby(
+            [results["treatyName"][incurred], results["claimDevelopmentYear"][incurred]])
+        for key, total in payment_pattern.sum().items():
+            self.pattern_sums[key] = self.pattern_sums.get(key, 0.0) + total
+        for key, count in payment_pattern.count().items():
+            self.pattern_counts[key] = self.pattern_counts.get(key, 0) + count
+
+    def frames(self, cost_of_capital):
+        """Compute the statistics from the aggregates.
+
+        Args:
+            cost_of_capital (float): The cost of capital used in the premium formula.
+
+        Returns:
+            tuple[pd.DataFrame]: The average loss, VaR, TVaR, premium and average payment
+                pattern, indexed by treaty with one column per development year.
+        """
+        keys = pd.MultiIndex.from_tuples(sorted(self.tails),
+                                         names=["treatyName", "claimDevelopmentYear"])
+        average_loss = pd.Series([self.loss_sums[key] / self.tails[key].count for key in keys],
+                                 index=keys).unstack()
+        VaR = pd.Series([self.tails[key].value_at_risk(self.level) for key in keys],  # pylint: disable=invalid-name
+                        index=keys).unstack()
+        TVaR = pd.Series([self.tails[key].tail_value_at_risk(self.level) for key in keys],  # pylint: disable=invalid-name
+                         index=keys).unstack()
+        premium = average_loss + (TVaR - average_loss) * cost_of_capital
+
+        pattern_keys = pd.MultiIndex.from_tuples(sorted(self.pattern_sums),
+                                                 names=["treatyName", "claimDevelopmentYear"])
+        average_payment_pattern = pd.Series(
+            [self.pattern_sums[key] / self.pattern_counts[key] for key in pattern_keys],
+            index=pattern_keys, dtype=float).unstack()
+        return average_loss, VaR, TVaR, premium, average_payment_pattern
+
+    def extra_frames(self, cost_of_capital):
+        """Compute the VaR and TVaR at the other levels and the standard errors.
+
+        Args:
+            cost_of_capital (float): The cost of capital used in the premium formula.
+
+        Returns:
+            dict[str, pd.DataFrame]: The statistics named as the extra statistics of
+                pricing_statistics.compute_statistics, indexed by treaty with one column per
+                development year.
+        """
+        keys = pd.MultiIndex.from_tuples(sorted(self.tails),
+                                         names=["treatyName", "claimDevelopmentYear"])
+        extra = {}
+        for level in self.levels:
+            extra[f'VaR_{level:g}'] = pd.Series(
+                [self.tails[key].value_at_risk(level) for key in keys], index=keys).unstack()
+            extra[f'TVaR_{level:g}'] = pd.Series(
+                [self.tails[key].tail_value_at_risk(level) for key in keys], index=keys).unstack()
+        if self.standard_errors:
+            batches = np.array([self.batches[key] for key in keys])
+            average_loss, tail_value_at_risk = batches[..., 0], batches[..., 1]
+            for name, values in (('average_loss', average_loss), ('TVaR', tail_value_at_risk),
+                                 ('premium', average_loss + (tail_value_at_risk - average_loss)
+                                  * cost_of_capital)):
+                extra[f'{name}_se'] = pd.Series(risk_measures.batch_means_error(values),
+                                                index=keys).unstack()
+        return extra
+
+    def relative_errors(self, cost_of_capital):
+        """Compute the relative standard errors of the average loss, TVaR and premium.
+
+        Args:
+            cost_of_capital (float): The cost of capital used in the premium formula.
+
+        Returns:
+            pd.DataFrame: The standard error divided by the absolute value of every statistic,
+                0 when both are 0, indexed by treaty and development year with one column per
+                statistic.
+        """
+        average_loss, _, TVaR, premium, _ = self.frames(cost_of_capital)  # pylint: disable=invalid-name
+        extra = self.extra_frames(cost_of_capital)
+        errors = {}
+        for name, values in (('average_loss', average_loss), ('TVaR', TVaR),
+                             ('premium', premium)):
+            error = extra[f'{name}_se']
+            with np.errstate(divide='ignore', invalid='ignore'):
+                errors[name] = (error / values.abs()).mask(error == 0, 0.0).stack()
+        return pd.DataFrame(errors)
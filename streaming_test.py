@@ -0,0 +1,99 @@
+"""
+This module provides classes for testing the running statistics of the streaming mode.
+"""
+import unittest
+import numpy as np
+import pandas as pd
+from config import config # pylint: disable=import-error
+from main import run_simulations, run_streaming, compute_statistics # pylint: disable=import-error
+from streaming import RunningStatistics, TailBuffer # pylint: disable=import-error
+
+
+class TailBufferTests(unittest.TestCase):
+    """Test cases for the TailBuffer class."""
+
+    @staticmethod
+    def fill(values, chunk_size):
+        """Fill a buffer with the values, chunk by chunk."""
+        tail = TailBuffer(len(values))
+        for first in range(0, len(values), chunk_size):
+            tail.update(values[first:first + chunk_size])
+        return tail
+
+    def assert_matches_pandas(self, values, chunk_size):
+        """Assert that the buffer reproduces the pandas VaR and TVaR."""
+        tail = self.fill(values, chunk_size)
+        value_at_risk = pd.Series(values).quantile(0.99)
+        self.assertAlmostEqual(tail.value_at_risk(), value_at_risk)
+        self.assertAlmostEqual(tail.tail_value_at_risk(), values[values >= value_at_risk].mean())
+        self.assertLessEqual(len(tail.values), len(values) // 100 + 2)
+
+    def test_continuous_values(self):
+        """Test values without ties."""
+        values = np.random.default_rng(0).pareto(1.2, 10_001)
+        self.assert_matches_pandas(values, 999)
+
+    def test_ties_at_the_var(self):
+        """Test a VaR falling on a value repeated well beyond the buffer capacity."""
+        values = np.zeros(10_000)
+        values[:300] = 10e6
+        values[:20] = np.linspace(11e6, 20e6, 20)
+        np.random.default_rng(0).shuffle(values)
+        self.assert_matches_pandas(values, 777)
+
+    def test_small_sample(self):
+        """Test a sample smaller than the chunks."""
+        self.assert_matches_pandas(np.arange(50, dtype=float), 100)
+
+
+class RunningStatisticsTests(unittest.TestCase):
+    """Test cases for the RunningStatistics class."""
+
+    def test_more_simulations_than_sized_for(self):
+        """Test that simulations beyond the declared size are rejected."""
+        results = run_simulations({**config['simulations'], 'nb': 300, 'mode': 'batch',
+                                   'shard_size': 0}, config['treaties'])
+        running_statistics = RunningStatistics(250)
+        running_statistics.update(results[results['simId'] < 200])
+        with self.assertRaises(ValueError):
+            running_statistics.update(results[results['simId'] >= 200])
+
+
+class RunStreamingTests(unittest.TestCase):
+    """Test cases for the run_streaming function."""
+
+    def test_streaming_matches_full_statistics(self):
+        """Test that streaming reproduces the statistics of the same shards priced at once."""
+        simulations = {**config['simulations'], 'nb': 3_000, 'mode': 'batch',
+                       'shard_size': 700, 'workers': 1}
+        cost_of_capital = config['financials']['cost_of_capital']
+        expected = compute_statistics(run_simulations(simulations, config['treaties']),
+                                      cost_of_capital)
+        statistics = run_streaming(simulations, config['treaties'], cost_of_capital)
+        self.assertTrue(expected[['treatyName', 'statistic', 'claimDevelopmentYear']].equals(
+            statistics[['treatyName', 'statistic', 'claimDevelopmentYear']]))
+        self.assertTrue(np.allclose(statistics['value'], expected['value'], rtol=1e-12))
+
+    def test_levels_and_standard_errors(self):
+        """Test the other confidence levels and the batch means over the shards."""
+        simulations = {**config['simulations'], 'nb': 3_000, 'mode': 'batch',
+                       'shard_size': 500, 'workers': 1}
+        cost_of_capital = config['financials']['cost_of_capital']
+        levels = [0.9, 0.995]
+        expected = compute_statistics(run_simulations(simulations, config['treaties']),
+                                      cost_of_capital, levels=levels)
+        statistics = run_streaming(simulations, config['treaties'], cost_of_capital,
+                                   levels=levels, standard_errors={'method': 'batch_means'})
+        errors = statistics['statistic'].str.endswith('_se')
+        self.assertEqual(sorted(statistics['statistic'][errors].unique()),
+                         ['TVaR_se', 'average_loss_se', 'premium_se'])
+        self.assertTrue(np.all(statistics['value'][errors] >= 0))
+        statistics = statistics[~errors].reset_index(drop=True)
+        self.assertTrue(expected[['treatyName', 'statistic', 'claimDevelopmentYear']].equals(
+            statistics[['treatyName', 'statistic', 'claimDevelopmentYear']]))
+        self.assertTrue(np.allclose(statistics['value'], expected['value'], rtol=1e-12,
+                                    equal_nan=True))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,188 @@
+"""
+This module prices a grid of excess of loss layers against a single simulated claim set.
+
+The claims are sorted once by amount. For every deductible only the claims exceeding it are
+kept, as the others are neither recovered nor eroding an aggregate deductible or limit, and the
+layers without AAD and AAL are evaluated for a whole block of limits in one vectorized
+operation. The simulations without any claim above the deductible are not materialized: they
+enter the statistics as a count of zero annual recoveries.
+
+Running the module prices the grid of the 'sweep' section of a configuration file, config.yaml
+by default, against the claims of its 'simulations' section and writes it to sweep.csv.
+
+"""
+import argparse
+import math
+import numpy as np
+import pandas as pd
+from reinsurance import ExcessOfLoss  # pylint: disable=import-error
+
+# Maximal number of recoveries evaluated at once by the vectorized layers.
+BLOCK_SIZE = 10_000_000
+
+
+def parameter_values(values) -> list[float]:
+    """
+    Expand a parameter range of the sweep section of the config.
+
+    Args:
+        values (list | dict | float): A list of values, a single value or a dictionary with
+            'start', 'stop' and 'step' keys, the stop being included.
+
+    Returns:
+        list[float]: The values of the parameter.
+    """
+    if isinstance(values, dict):
+        nb_values = math.floor((values['stop'] - values['start']) / values['step'] + 1e-9) + 1
+        return [values['start'] + index * values['step'] for index in range(nb_values)]
+    if isinstance(values, (list, tuple)):
+        return list(values)
+    return [values]
+
+
+def _layer_statistics(annual, nb_simulations, level):
+    """
+    Compute the average loss, VaR and TVaR of annual recoveries padded with zeros.
+
+    Args:
+        annual (np.ndarray): The annual recoveries of the simulations with claims in the layer,
+            simulations being on the last axis.
+        nb_simulations (int): The total number of simulations, the missing ones recovering 0.
+        level (float): The confidence level of the VaR and TVaR.
+
+    Returns:
+        tuple[np.ndarray]: The average loss, VaR and TVaR over the leading axes of annual.
+    """
+    nb_zeros = nb_simulations - annual.shape[-1]
+    position = (nb_simulations - 1) * level
+    lower = math.floor(position)
+    upper = min(lower + 1, nb_simulations - 1)
+
+    # The zeros come first in the sorted annual recoveries, which are never negative.
+    kth = [index - nb_zeros for index in (lower, upper) if index >= nb_zeros]
+    selected = np.partition(annual, kth, axis=-1) if kth else annual
+    lower_value, upper_value = (selected[..., index - nb_zeros] if index >= nb_zeros
+                                else np.zeros(annual.shape[:-1]) for index in (lower, upper))
+    value_at_risk = lower_value + (upper_value - lower_value) * (position - lower)
+
+    in_tail = annual >= value_at_risk[..., None]
+    tail_count = in_tail.sum(axis=-1) + np.where(value_at_risk <= 0, nb_zeros, 0)
+    tail_value_at_risk = np.sum(annual, axis=-1, where=in_tail) / tail_count
+    return annual.sum(axis=-1) / nb_simulations, value_at_risk, tail_value_at_risk
+
+
+def sweep_excess_of_loss(claims, deductibles, limits, aads=(0,), aals=(0,),  # pylint: disable=too-many-arguments,too-many-locals
+                         cost_of_capital=0.0, level=0.99) -> pd.DataFrame:
+    """
+    Price every combination of the excess of loss parameters against the same claims.
+
+    Args:
+        claims (ClaimTable): The generated claims.
+        deductibles (list[float]): The deductibles of the grid.
+        limits (list[float]): The limits of the grid.
+        aads (list[float], optional): The annual aggregate deductibles of the grid.
+            Defaults to (0,).
+        aals (list[float], optional): The annual aggregate limits of the grid, 0 meaning no
+            limit. Defaults to (0,).
+        cost_of_capital (float, optional): The cost of capital used in the premium formula.
+            Defaults to 0.0.
+        level (float, optional): The confidence level of the VaR and TVaR. Defaults to 0.99.
+
+    Returns:
+        pd.DataFrame: One row per layer and development year, with the columns 'deductible',
+            'limit', 'aad', 'aal', 'claimDevelopmentYear', 'average_loss', 'VaR', 'TVaR' and
+            'premium'.
+
+    Raises:
+        ValueError: If the simulations are weighted, e.g. drawn by importance sampling.
+    """
+    if claims.weights is not None:
+        raise ValueError('The sweep does not support weighted simulations.')
+    claim_amounts = claims.claim_amounts()
+    sim_codes, sims = pd.factorize(claims.sim_ids)
+    nb_years = len(claim_amounts)
+    limits = np.array(sorted(set(limits)), dtype=float)
+
+    largest_amounts = claim_amounts.max(axis=0)
+    order = np.argsort(largest_amounts, kind='stable')
+    sorted_largest_amounts = largest_amounts[order]
+
+    statistics = []
+    for deductible in sorted(set(deductibles)):
+        # The claims exceeding the deductible, in their original simulation order.
+        above = np.sort(order[np.searchsorted(sorted_largest_amounts, deductible, side='right'):])
+        layer_claims = claim_amounts[:, above]
+        layer_sims = sim_codes[above]
+        first_claims = np.flatnonzero(np.r_[True, layer_sims[1:] != layer_sims[:-1]])
+
+        def annual_recoveries(recoveries):
+            """Sum the recoveries per simulation, claims being on axis 1."""
+            if recoveries.shape[1] == 0:
+                return recoveries
+            return np.add.reduceat(recoveries, first_claims, axis=1)  # pylint: disable=cell-var-from-loop
+
+        for aad in sorted(set(aads)):
+            for aal in sorted(set(aals)):
+                if not aad and not aal:
+                    in_excess = np.maximum(layer_claims - deductible, 0)[..., None]
+                    block = max(1, BLOCK_SIZE // max(1, in_excess.size))
+                    layer_annuals = [
+                        annual_recoveries(np.minimum(in_excess, limits[first:first + block]))
+                        for first in range(0, len(limits), block)]
+                    annual = np.moveaxis(np.concatenate(layer_annuals, axis=-1), -1, 0)
+                else:
+                    annual = np.stack([annual_recoveries(
+                        ExcessOfLoss(deductible, limit, aad, aal).apply_batch(layer_claims,
+                                                                              layer_sims))
+                        for limit in limits])
+                average_loss, value_at_risk, tail_value_at_risk = _layer_statistics(
+                    annual, len(sims), level)
+                statistics += [pd.DataFrame({
+                    'deductible': deductible,
+                    'limit': np.repeat(limits, nb_years),
+                    'aad': aad,
+                    'aal': aal,
+                    'claimDevelopmentYear': np.tile(np.arange(nb_years), len(limits)),
+                    'average_loss': average_loss.ravel(),
+                    'VaR': value_at_risk.ravel(),
+                    'TVaR': tail_value_at_risk.ravel()})]
+
+    statistics = pd.concat(statistics, ignore_index=True)
+    statistics['premium'] = statistics['average_loss'] + (
+        statistics['TVaR'] - statistics['average_loss']) * cost_of_capital
+    return statistics
+
+
+def main(argv=None):
+    """
+    Price the grid of the sweep section of a configuration file and write it to a CSV file.
+
+    Args:
+        argv (list[str], optional): The arguments. Defaults to None, the arguments of the
+            process.
+    """
+    from config import DEFAULT_PATH, load_config  # pylint: disable=import-error,import-outside-toplevel
+    from main import simulate_claims  # pylint: disable=import-error,import-outside-toplevel
+
+    parser = argparse.ArgumentParser(description='Price a grid of excess of loss layers.')
+    parser.add_argument('--config', default=DEFAULT_PATH,
+                        help=f'configuration file of the grid (default: {DEFAULT_PATH})')
+    parser.add_argument('-o', '--output', default='sweep.csv',
+                        help='CSV file of the grid (default: sweep.csv)')
+    arguments = parser.parse_args(argv)
+    config = load_config(arguments.config)
+
+    grid = sweep_excess_of_loss(
+        simulate_claims(config['simulations']),
+        deductibles=parameter_values(config['sweep']['deductible']),
+        limits=parameter_values(config['sweep']['limit']),
+        aads=parameter_values(config['sweep'].get('aad', 0)),
+        aals=parameter_values(config['sweep'].get('aal', 0)),
+        cost_of_capital=config['financials']['cost_of_capital'],
+    )
+    print(grid)
+    grid.to_csv(arguments.output, index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+This module provides a class for testing the layer grid sweep.
+"""
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+import yaml
+from config import config # pylint: disable=import-error
+from config_test import raw_config # pylint: disable=import-error
+from main import simulate_claims, run_simulations, compute_statistics # pylint: disable=import-error
+from reinsurance import ExcessOfLoss # pylint: disable=import-error
+from sweep import sweep_excess_of_loss, parameter_values, main # pylint: disable=import-error
+
+
+class SweepExcessOfLossTests(unittest.TestCase):
+    """Test cases for the sweep_excess_of_loss function."""
+
+    def test_matches_main_statistics(self):
+        """Test that every grid point matches the statistics of main for the same treaty."""
+        simulations = {**config['simulations'], 'nb': 3_000, 'mode': 'batch'}
+        cost_of_capital = config['financials']['cost_of_capital']
+        deductibles, limits, aads, aals = [1e6, 5e6, 1e9], [2e6, 10e6], [0, 2e6], [0, 12e6]
+        grid = sweep_excess_of_loss(simulate_claims(simulations), deductibles, limits, aads,
+                                    aals, cost_of_capital)
+        self.assertEqual(len(grid), 3 * 2 * 2 * 2 * 3)
+
+        treaties = [{'name': f'{deductible:g} {limit:g} {aad:g} {aal:g}', 'type': ExcessOfLoss,
+                     'parameters': {'deductible': deductible, 'limit': limit, 'aad': aad,
+                                    'aal': aal}}
+                    for deductible in deductibles for limit in limits
+                    for aad in aads for aal in aals]
+        expected = compute_statistics(run_simulations(simulations, treaties),
+                                      cost_of_capital).set_index(
+            ['treatyName', 'statistic', 'claimDevelopmentYear'])['value']
+        for row in grid.itertuples():
+            name = f'{row.deductible:g} {row.limit:g} {row.aad:g} {row.aal:g}'
+            for statistic in ('average_loss', 'VaR', 'TVaR', 'premium'):
+                self.assertTrue(np.isclose(
+                    getattr(row, statistic),
+                    expected[name, statistic, row.claimDevelopmentYear], rtol=1e-12),
+                    (row, statistic))
+
+    def test_parameter_values(self):
+        """Test the expansion of the parameter ranges."""
+        self.assertEqual(parameter_values({'start': 1, 'stop': 2, 'step': 0.5}), [1, 1.5, 2])
+        self.assertEqual(parameter_values([3, 4]), [3, 4])
+        self.assertEqual(parameter_values(0), [0])
+
+    def test_main(self):
+        """Test that the command line prices the grid of the given configuration."""
+        content = raw_config()
+        content['simulations'].update({'nb': 500, 'mode': 'batch'})
+        content['sweep'] = {'deductible': [1e6, 5e6], 'limit': 5e6}
+        with tempfile.TemporaryDirectory() as directory:
+            path, output = (os.path.join(directory, name) for name in ('small.yaml', 'grid.csv'))
+            with open(path, 'w', encoding='UTF-8') as file:
+                yaml.safe_dump(content, file)
+            with contextlib.redirect_stdout(io.StringIO()):
+                main(['--config', path, '-o', output])
+            grid = pd.read_csv(output)
+        self.assertEqual(sorted(grid['deductible'].unique()), [1e6, 5e6])
+
+
+if __name__ == '__main__':
+    unittest.main()